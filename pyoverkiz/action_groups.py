@@ -0,0 +1,146 @@
+"""Cached, indexed registry of server-persisted action groups.
+
+`get_action_groups()` returns a freshly structured list on every call, and the
+only handle `execute_persisted_action_group()` accepts is the OID. The registry
+keeps the last listing indexed by OID, by label and by the devices each action
+group touches, applies deletions from `ActionGroupDeletedEvent`s in place, and
+marks itself stale on create/update events (whose payload does not carry a
+`PersistedActionGroup`) or once its TTL expires, so the next lookup refetches.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+from pyoverkiz.models import (
+    ActionGroupDeletedEvent,
+    ActionGroupEvent,
+    Event,
+    PersistedActionGroup,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ActionGroupCacheSettings:
+    """Settings for the persisted action group cache.
+
+    ``ttl`` is the number of seconds after which the cached listing is
+    refetched, even when no action group event was observed.
+    """
+
+    ttl: float = 300.0
+
+    def validate(self) -> None:
+        """Validate configuration values for the cache."""
+        if self.ttl <= 0:
+            raise ValueError(f"ttl must be positive, got {self.ttl!r}")
+
+
+class ActionGroupRegistry:
+    """Persisted action groups indexed by OID, label and device URL.
+
+    Load a listing with `load()`; lookups are dictionary reads. Labels are not
+    unique on the server, so label and device lookups return every match in
+    listing order.
+    """
+
+    def __init__(
+        self,
+        settings: ActionGroupCacheSettings | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create an empty registry with the given settings (uses defaults if None)."""
+        self._settings = settings or ActionGroupCacheSettings()
+        self._clock = clock
+        self._by_oid: dict[str, PersistedActionGroup] = {}
+        self._by_label: dict[str, list[str]] = {}
+        self._by_device: dict[str, list[str]] = {}
+        self._loaded_at: float | None = None
+
+    @property
+    def stale(self) -> bool:
+        """Return True if the registry must be reloaded before it is trusted."""
+        return (
+            self._loaded_at is None
+            or self._clock() - self._loaded_at >= self._settings.ttl
+        )
+
+    @property
+    def action_groups(self) -> list[PersistedActionGroup]:
+        """Return the cached action groups in listing order."""
+        return list(self._by_oid.values())
+
+    def __len__(self) -> int:
+        """Return the number of cached action groups."""
+        return len(self._by_oid)
+
+    def __iter__(self) -> Iterator[PersistedActionGroup]:
+        """Iterate over the cached action groups in listing order."""
+        return iter(self._by_oid.values())
+
+    def __contains__(self, oid: object) -> bool:
+        """Return True if an action group with this OID is cached."""
+        return oid in self._by_oid
+
+    def load(self, action_groups: Iterable[PersistedActionGroup]) -> None:
+        """Replace the cached action groups with a fresh listing."""
+        self._by_oid = {}
+        self._by_label = {}
+        self._by_device = {}
+        for action_group in action_groups:
+            self._by_oid[action_group.oid] = action_group
+            if action_group.label is not None:
+                self._by_label.setdefault(action_group.label, []).append(
+                    action_group.oid
+                )
+            for device_url in dict.fromkeys(
+                action.device_url for action in action_group.actions
+            ):
+                self._by_device.setdefault(device_url, []).append(action_group.oid)
+        self._loaded_at = self._clock()
+
+    def invalidate(self) -> None:
+        """Mark the registry stale so the next lookup reloads it."""
+        self._loaded_at = None
+
+    def get(self, oid: str) -> PersistedActionGroup | None:
+        """Return the action group with this OID, or None."""
+        return self._by_oid.get(oid)
+
+    def get_by_label(self, label: str) -> list[PersistedActionGroup]:
+        """Return the action groups with this label."""
+        return [self._by_oid[oid] for oid in self._by_label.get(label, ())]
+
+    def get_by_device(self, device_url: str) -> list[PersistedActionGroup]:
+        """Return the action groups with at least one action on this device."""
+        return [self._by_oid[oid] for oid in self._by_device.get(device_url, ())]
+
+    def observe_events(self, events: Iterable[Event]) -> None:
+        """Apply fetched action group events to the registry."""
+        for event in events:
+            if isinstance(event, ActionGroupDeletedEvent):
+                self._remove(event.action_group_oid)
+            elif isinstance(event, ActionGroupEvent):
+                self.invalidate()
+
+    def _remove(self, oid: str) -> None:
+        action_group = self._by_oid.pop(oid, None)
+        if action_group is None:
+            return
+        if action_group.label is not None:
+            _discard(self._by_label, action_group.label, oid)
+        for action in action_group.actions:
+            _discard(self._by_device, action.device_url, oid)
+
+
+def _discard(index: dict[str, list[str]], key: str, oid: str) -> None:
+    """Remove *oid* from the bucket *key*, dropping the bucket once empty."""
+    bucket = index.get(key)
+    if bucket is None or oid not in bucket:
+        return
+    bucket.remove(oid)
+    if not bucket:
+        del index[key]
@@ -4,22 +4,132 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import time
+from collections import Counter
 from collections.abc import Callable, Coroutine, Generator
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any
-
-from pyoverkiz.models import Action
-
-if TYPE_CHECKING:
-    from pyoverkiz.enums import ExecutionMode
+from enum import StrEnum
+from typing import Any
+
+from pyoverkiz.enums import ExecutionMode, OverkizCommand
+from pyoverkiz.instrumentation import Histogram
+from pyoverkiz.models import DEVICE_URL_RE, Action
+
+
+class QueuePriority(StrEnum):
+    """Dispatch lane of queued actions."""
+
+    # Latency-sensitive commands (e.g. a user pressing "stop"), dispatched
+    # immediately or after the short interactive_delay window.
+    INTERACTIVE = "interactive"
+    # Automation and bulk traffic, batched over the regular delay window.
+    BULK = "bulk"
+
+
+class FlushReason(StrEnum):
+    """Why a pending batch was dispatched."""
+
+    TIMER = "timer"
+    MAX_ACTIONS = "max_actions"
+    # The lane has no delay window (e.g. the default interactive lane).
+    IMMEDIATE = "immediate"
+    # Another bucket received commands for one of the batch's devices.
+    DEVICE_CONFLICT = "device_conflict"
+    FLUSH = "flush"
+    SHUTDOWN = "shutdown"
+
+
+# Upper bounds of the batch size histogram, in actions per action group.
+BATCH_SIZE_BUCKETS: tuple[float, ...] = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+# Commands driving the same actuator of a device. With superseding enabled, a
+# queued command replaces earlier pending commands of its family for that device.
+DEFAULT_SUPERSEDE_FAMILIES: tuple[frozenset[str], ...] = (
+    frozenset(
+        {
+            OverkizCommand.CLOSE,
+            OverkizCommand.DEPLOY,
+            OverkizCommand.DOWN,
+            OverkizCommand.MY,
+            OverkizCommand.OPEN,
+            OverkizCommand.SET_CLOSURE,
+            OverkizCommand.SET_CLOSURE_AND_LINEAR_SPEED,
+            OverkizCommand.SET_CLOSURE_OR_PEDESTRIAN_POSITION,
+            OverkizCommand.SET_DEPLOYMENT,
+            OverkizCommand.SET_PEDESTRIAN_POSITION,
+            OverkizCommand.SET_POSITION,
+            OverkizCommand.SET_POSITION_AND_LINEAR_SPEED,
+            OverkizCommand.STOP,
+            OverkizCommand.UNDEPLOY,
+            OverkizCommand.UP,
+        }
+    ),
+    frozenset(
+        {
+            OverkizCommand.CLOSE_SLATS,
+            OverkizCommand.OPEN_SLATS,
+            OverkizCommand.SET_ORIENTATION,
+        }
+    ),
+    frozenset(
+        {
+            OverkizCommand.LOWER_CLOSE,
+            OverkizCommand.LOWER_DOWN,
+            OverkizCommand.LOWER_OPEN,
+            OverkizCommand.LOWER_UP,
+            OverkizCommand.SET_LOWER_CLOSURE,
+            OverkizCommand.SET_LOWER_POSITION,
+        }
+    ),
+    frozenset(
+        {
+            OverkizCommand.SET_UPPER_CLOSURE,
+            OverkizCommand.SET_UPPER_POSITION,
+            OverkizCommand.UPPER_CLOSE,
+            OverkizCommand.UPPER_DOWN,
+            OverkizCommand.UPPER_OPEN,
+            OverkizCommand.UPPER_UP,
+        }
+    ),
+    frozenset(
+        {
+            OverkizCommand.OFF,
+            OverkizCommand.ON,
+            OverkizCommand.SET_INTENSITY,
+            OverkizCommand.SET_ON_OFF,
+        }
+    ),
+)
 
 
 @dataclass(frozen=True, slots=True)
 class ActionQueueSettings:
-    """Settings for configuring the action queue behavior."""
+    """Settings for configuring the action queue behavior.
+
+    ``delay`` and ``max_actions`` apply to the bulk lane; the interactive lane
+    uses ``interactive_delay`` (0 dispatches immediately) and
+    ``interactive_max_actions``.
+
+    With ``adaptive_delay`` enabled, the bulk lane ignores ``delay`` and picks
+    its window per batch between ``min_delay`` and ``max_delay`` from the
+    observed inter-arrival rate and batch fill ratio.
+
+    With ``supersede_commands`` enabled, a queued command replaces pending
+    commands for the same device that were queued by earlier calls and share
+    its name or one of the ``supersede_families``.
+    """
 
     delay: float = 0.1
     max_actions: int = 20
+    partition_by_gateway: bool = False
+    interactive_delay: float = 0.0
+    interactive_max_actions: int = 20
+    adaptive_delay: bool = False
+    min_delay: float = 0.01
+    max_delay: float = 0.5
+    supersede_commands: bool = False
+    supersede_families: tuple[frozenset[str], ...] = DEFAULT_SUPERSEDE_FAMILIES
 
     def validate(self) -> None:
         """Validate configuration values for the action queue."""
@@ -29,6 +139,28 @@ class ActionQueueSettings:
             raise ValueError(
                 f"max_actions must be at least 1, got {self.max_actions!r}"
             )
+        if self.interactive_delay < 0:
+            raise ValueError(
+                f"interactive_delay must not be negative, got {self.interactive_delay!r}"
+            )
+        if self.interactive_max_actions < 1:
+            raise ValueError(
+                "interactive_max_actions must be at least 1, "
+                f"got {self.interactive_max_actions!r}"
+            )
+        if self.min_delay < 0:
+            raise ValueError(f"min_delay must not be negative, got {self.min_delay!r}")
+        if self.max_delay <= 0 or self.max_delay < self.min_delay:
+            raise ValueError(
+                "max_delay must be positive and at least min_delay, "
+                f"got {self.max_delay!r}"
+            )
+
+
+def _gateway_id(device_url: str) -> str | None:
+    """Return the gateway id encoded in a device URL, or None if it cannot be parsed."""
+    match = DEVICE_URL_RE.match(device_url)
+    return match.group("gatewayId") if match else None
 
 
 class QueuedExecution:
@@ -70,6 +202,158 @@ class QueuedExecution:
         return self._ensure_future().__await__()
 
 
+class _AdaptiveWindow:
+    """Chooses the bulk batching window from recent traffic.
+
+    Calls arriving more than ``max_delay`` after the previous one are treated
+    as sparse traffic and get ``min_delay``, keeping single-command latency near
+    zero. Within a burst, the window is the time needed to fill the batch at the
+    observed inter-arrival rate, scaled by how well previous windows were
+    filled: when bursts keep ending before the window closes, the window
+    shrinks; when arrivals keep coming as predicted, it grows back.
+    """
+
+    _ALPHA = 0.3
+    _MIN_YIELD = 0.1
+
+    def __init__(self, min_delay: float, max_delay: float) -> None:
+        """Create a window tuner bounded by *min_delay* and *max_delay*."""
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._last_arrival: float | None = None
+        self._in_burst = False
+        # EWMA of gaps between calls within a burst.
+        self._gap: float | None = None
+        # EWMA of actual / expected calls per batch, in [_MIN_YIELD, 1].
+        self._yield = 1.0
+        self.current = min_delay
+
+    def observe_arrival(self, now: float) -> None:
+        """Record a call arriving at loop time *now*."""
+        last, self._last_arrival = self._last_arrival, now
+        if last is None or now - last >= self._max_delay:
+            self._in_burst = False
+            return
+
+        gap = now - last
+        self._gap = (
+            gap
+            if self._gap is None
+            else self._ALPHA * gap + (1 - self._ALPHA) * self._gap
+        )
+        self._in_burst = True
+
+    def open_window(self, batch: _PendingBatch, max_actions: int) -> float:
+        """Choose the window for a new batch and record the calls it should gather."""
+        gap = self._gap
+        if not self._in_burst or gap is None:
+            window = self._min_delay
+            batch.expected_calls = len(batch.waiters)
+        else:
+            remaining = max(max_actions - len(batch.actions), 0)
+            window = min(
+                max(gap * remaining * self._yield, self._min_delay), self._max_delay
+            )
+            batch.expected_calls = len(batch.waiters) + (
+                window / gap if gap > 0 else remaining
+            )
+
+        self.current = window
+        return window
+
+    def observe_flush(self, batch: _PendingBatch) -> None:
+        """Update the fill feedback from a batch leaving the queue."""
+        if not batch.expected_calls:
+            return
+        ratio = min(len(batch.waiters) / batch.expected_calls, 1.0)
+        self._yield = max(
+            self._ALPHA * ratio + (1 - self._ALPHA) * self._yield, self._MIN_YIELD
+        )
+
+
+class ActionQueueStats:
+    """Batching metrics collected by an `ActionQueue`.
+
+    Latencies are measured per caller: ``queue_wait`` from add() until the
+    batch is handed to the executor, ``execution`` from dispatch until the
+    exec_id is returned, and ``end_to_end`` from add() until the exec_id.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty set of metrics."""
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait = Histogram()
+        self.execution = Histogram()
+        self.end_to_end = Histogram()
+        self.flush_reasons: Counter[FlushReason] = Counter()
+        self.executor_errors: Counter[str] = Counter()
+        self.submitted_actions = 0
+        self.submitted_commands = 0
+        self.dispatched_actions = 0
+        self.dispatched_commands = 0
+
+    @property
+    def merge_ratio(self) -> float | None:
+        """Return submitted actions per dispatched action, or None before any dispatch.
+
+        A ratio above 1 means calls targeting the same device were merged.
+        """
+        if not self.dispatched_actions:
+            return None
+        return self.submitted_actions / self.dispatched_actions
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return a JSON-serializable snapshot of the metrics."""
+        return {
+            "batches": self.batch_sizes.count,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait": self.queue_wait.snapshot(),
+            "execution": self.execution.snapshot(),
+            "end_to_end": self.end_to_end.snapshot(),
+            "flush_reasons": {
+                str(reason): count for reason, count in self.flush_reasons.items()
+            },
+            "executor_errors": dict(self.executor_errors),
+            "submitted_actions": self.submitted_actions,
+            "submitted_commands": self.submitted_commands,
+            "dispatched_actions": self.dispatched_actions,
+            "dispatched_commands": self.dispatched_commands,
+            "merge_ratio": self.merge_ratio,
+        }
+
+
+# (lane, partition, execution mode, label) of a pending batch.
+_BatchKey = tuple[QueuePriority, str | None, ExecutionMode | None, str | None]
+
+
+class _PendingBatch:
+    """Actions waiting in one queue partition, flushed together as one action group."""
+
+    __slots__ = (
+        "actions",
+        "added_at",
+        "expected_calls",
+        "flush_task",
+        "index",
+        "label",
+        "mode",
+        "waiters",
+    )
+
+    def __init__(self, mode: ExecutionMode | None, label: str | None) -> None:
+        """Create an empty batch for the given execution mode and label."""
+        self.actions: list[Action] = []
+        self.index: dict[str, Action] = {}
+        self.mode = mode
+        self.label = label
+        self.waiters: list[QueuedExecution] = []
+        # perf_counter() timestamps of each waiter's add() call.
+        self.added_at: list[float] = []
+        self.flush_task: asyncio.Task[None] | None = None
+        # Calls the adaptive window expects this batch to gather, if adaptive.
+        self.expected_calls: float | None = None
+
+
 class ActionQueue:
     """Batches device actions into single API calls (action groups).
 
@@ -95,10 +379,37 @@ class ActionQueue:
     Three separate devices would remain three separate actions in the group.
     Merging only happens when the same device_url appears more than once.
 
-    The queue flushes when:
+    Actions are queued in one of two priority lanes, each with its own delay and
+    ``max_actions`` limit. ``INTERACTIVE`` submissions (the default for the
+    ``HIGH_PRIORITY`` execution mode) are dispatched immediately or after a short
+    window, while ``BULK`` traffic keeps batching. The lanes never delay each
+    other: an interactive dispatch does not reset or extend the bulk timer, and
+    when an interactive call targets a device with pending bulk commands, that
+    bulk batch is dispatched first so commands still reach the device in order.
+
+    With ``partition_by_gateway`` enabled, pending actions are partitioned by
+    the gateway of their device URLs. Each partition has its own delay timer,
+    ``max_actions`` limit and executions, so a slow or failing gateway does not
+    hold back commands for the others. A single add() call whose actions span
+    several gateways is kept intact in a shared partition, so it still resolves
+    to one exec_id.
+
+    With ``adaptive_delay`` enabled, the bulk window is tuned per batch: sparse
+    calls are dispatched after ``min_delay``, while bursts (e.g. a scene touching
+    many devices through separate calls) wait long enough to fill the batch, up
+    to ``max_delay``. get_current_delay() reports the window in use.
+
+    Within a lane and partition, calls are further bucketed by (mode, label):
+    each bucket is an independent batch with its own timer and ``max_actions``
+    limit, so interleaved callers using different labels still batch. As the
+    gateway executes action groups in submission order, a call targeting a
+    device that has pending commands in another bucket dispatches that bucket
+    first.
+
+    A bucket flushes when:
     - The delay timer expires
     - The max actions limit is reached
-    - The execution mode or label changes
+    - Another bucket receives commands for one of its devices
     - flush() or shutdown() is called
     """
 
@@ -117,13 +428,28 @@ class ActionQueue:
         self._executor = executor
         self._settings = settings or ActionQueueSettings()
 
-        self._pending_actions: list[Action] = []
-        self._pending_mode: ExecutionMode | None = None
-        self._pending_label: str | None = None
-        self._pending_waiters: list[QueuedExecution] = []
-
-        self._flush_task: asyncio.Task[None] | None = None
+        # Pending batches keyed by (lane, partition, mode, label). The partition
+        # is the gateway id, or None when the queue is not partitioned or a call
+        # spans gateways.
+        self._batches: dict[_BatchKey, _PendingBatch] = {}
         self._lock = asyncio.Lock()
+        self.stats = ActionQueueStats()
+        # Maps command names to their supersede family; names without a family
+        # only supersede themselves.
+        self._supersede_keys: dict[str, object] | None = (
+            {
+                name: family
+                for family in self._settings.supersede_families
+                for name in family
+            }
+            if self._settings.supersede_commands
+            else None
+        )
+        self._adaptive = (
+            _AdaptiveWindow(self._settings.min_delay, self._settings.max_delay)
+            if self._settings.adaptive_delay
+            else None
+        )
 
     @staticmethod
     def _merge_actions(
@@ -132,12 +458,14 @@ class ActionQueue:
         source: list[Action],
         *,
         copy: bool = False,
+        supersede_keys: dict[str, object] | None = None,
     ) -> None:
         """Merge *source* actions into *target*, combining commands for duplicate devices.
 
         New device_urls are appended to *target*; existing ones get their commands
         extended. When *copy* is True, source actions are copied to avoid mutating
-        caller-owned objects.
+        caller-owned objects. When *supersede_keys* is given, existing commands
+        with the same name or family as an incoming command are dropped first.
         """
         for action in source:
             existing = index.get(action.device_url)
@@ -150,13 +478,60 @@ class ActionQueue:
                 target.append(merged)
                 index[action.device_url] = merged
             else:
+                if supersede_keys is not None:
+                    replaced = {
+                        supersede_keys.get(command.name, command.name)
+                        for command in action.commands
+                    }
+                    existing.commands[:] = [
+                        command
+                        for command in existing.commands
+                        if supersede_keys.get(command.name, command.name)
+                        not in replaced
+                    ]
                 existing.commands.extend(action.commands)
 
+    def _partition_key(self, actions: list[Action]) -> str | None:
+        """Return the partition for a call: its gateway id, or None for the shared partition."""
+        if not self._settings.partition_by_gateway:
+            return None
+
+        gateways = {_gateway_id(action.device_url) for action in actions}
+        if len(gateways) == 1:
+            return gateways.pop()
+        return None
+
+    def _lane_limits(self, priority: QueuePriority) -> tuple[float, int]:
+        """Return the (delay, max_actions) limits of a lane."""
+        if priority == QueuePriority.INTERACTIVE:
+            return (
+                self._settings.interactive_delay,
+                self._settings.interactive_max_actions,
+            )
+        return self._settings.delay, self._settings.max_actions
+
+    def _prepare_conflicting_flushes(
+        self, key: _BatchKey, actions: list[Action]
+    ) -> list[_PendingBatch]:
+        """Detach other batches that hold any of *actions*' devices (lock held).
+
+        Dispatching them before the new batch keeps per-device command order
+        across lanes, partitions and (mode, label) buckets.
+        """
+        return [
+            self._prepare_flush(other_key, FlushReason.DEVICE_CONFLICT)
+            for other_key, batch in list(self._batches.items())
+            if other_key != key
+            and any(action.device_url in batch.index for action in actions)
+        ]
+
     async def add(
         self,
         actions: list[Action],
         mode: ExecutionMode | None = None,
         label: str | None = None,
+        *,
+        priority: QueuePriority | None = None,
     ) -> QueuedExecution:
         """Add actions to the queue.
 
@@ -166,133 +541,187 @@ class ActionQueue:
 
         Args:
             actions: Actions to queue.
-            mode: Execution mode, which triggers a flush if it differs from the
-                pending mode.
+            mode: Execution mode of the action group; each (mode, label) pair
+                is batched separately.
             label: Label for the action group.
+            priority: Lane to queue the actions in. Defaults to ``INTERACTIVE``
+                for the ``HIGH_PRIORITY`` execution mode and ``BULK`` otherwise.
 
         Returns:
             A `QueuedExecution` that resolves to the `exec_id` when the batch
             executes.
         """
-        batches_to_execute: list[
-            tuple[list[Action], ExecutionMode | None, str | None, list[QueuedExecution]]
-        ] = []
+        batches_to_execute: list[_PendingBatch] = []
 
         if not actions:
             raise ValueError("actions must contain at least one Action")
 
+        added_at = time.perf_counter()
+        self.stats.submitted_actions += len(actions)
+        self.stats.submitted_commands += sum(len(action.commands) for action in actions)
+
         normalized_actions: list[Action] = []
         normalized_index: dict[str, Action] = {}
         self._merge_actions(normalized_actions, normalized_index, actions, copy=True)
+        if priority is None:
+            priority = (
+                QueuePriority.INTERACTIVE
+                if mode == ExecutionMode.HIGH_PRIORITY
+                else QueuePriority.BULK
+            )
+        key: _BatchKey = (
+            priority,
+            self._partition_key(normalized_actions),
+            mode,
+            label,
+        )
+        delay, max_actions = self._lane_limits(priority)
+        adaptive = self._adaptive if priority == QueuePriority.BULK else None
 
         async with self._lock:
-            # If mode or label changes, flush existing queue first
-            if self._pending_actions and (
-                mode != self._pending_mode or label != self._pending_label
-            ):
-                batches_to_execute.append(self._prepare_flush())
+            if adaptive is not None:
+                adaptive.observe_arrival(asyncio.get_running_loop().time())
+
+            batches_to_execute.extend(
+                self._prepare_conflicting_flushes(key, normalized_actions)
+            )
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = self._batches[key] = _PendingBatch(mode, label)
 
-            pending_index = {a.device_url: a for a in self._pending_actions}
             self._merge_actions(
-                self._pending_actions, pending_index, normalized_actions
+                batch.actions,
+                batch.index,
+                normalized_actions,
+                supersede_keys=self._supersede_keys,
             )
-            self._pending_mode = mode
-            self._pending_label = label
 
-            # Create waiter for this caller. This waiter is added to the current
-            # batch being built, even if we flushed a previous batch above due to
-            # a mode/label change. This ensures the waiter belongs to the batch
-            # containing the actions we just added.
+            # Create waiter for this caller. This waiter is added to the batch
+            # being built, even if conflicting batches were flushed above. This
+            # ensures the waiter belongs to the batch containing our actions.
             waiter = QueuedExecution()
-            self._pending_waiters.append(waiter)
+            batch.waiters.append(waiter)
+            batch.added_at.append(added_at)
+
+            if adaptive is not None and batch.expected_calls is None:
+                delay = adaptive.open_window(batch, max_actions)
 
-            # If we hit max actions, flush immediately
-            if len(self._pending_actions) >= self._settings.max_actions:
+            # If we hit max actions (or the lane has no delay), flush immediately
+            if len(batch.actions) >= max_actions or delay == 0:
                 # Prepare the current batch for flushing (which includes the actions
-                # we just added). If we already flushed due to mode change, this is
-                # a second batch.
-                batches_to_execute.append(self._prepare_flush())
-            elif self._flush_task is None or self._flush_task.done():
+                # we just added), after any conflicting batch flushed above.
+                batches_to_execute.append(
+                    self._prepare_flush(
+                        key,
+                        FlushReason.MAX_ACTIONS
+                        if len(batch.actions) >= max_actions
+                        else FlushReason.IMMEDIATE,
+                    )
+                )
+            elif batch.flush_task is None or batch.flush_task.done():
                 # Schedule delayed flush if not already scheduled
-                self._flush_task = asyncio.create_task(self._delayed_flush())
+                batch.flush_task = asyncio.create_task(
+                    self._delayed_flush(key, batch, delay)
+                )
 
         # Execute batches outside the lock if we flushed
-        for batch in batches_to_execute:
-            batch_actions, batch_mode, batch_label, batch_waiters = batch
-            if batch_actions:
-                await self._execute_batch(
-                    batch_actions, batch_mode, batch_label, batch_waiters
-                )
+        for flushed in batches_to_execute:
+            await self._execute_batch(flushed)
 
         return waiter
 
-    async def _delayed_flush(self) -> None:
-        """Wait for the delay period, then flush the queue."""
-        await asyncio.sleep(self._settings.delay)
+    async def _delayed_flush(
+        self, key: _BatchKey, batch: _PendingBatch, delay: float
+    ) -> None:
+        """Wait for the lane's delay period, then flush the batch."""
+        await asyncio.sleep(delay)
         async with self._lock:
-            self._flush_task = None
-            # Another coroutine may have already flushed the queue before we acquired the lock.
-            actions, mode, label, waiters = self._prepare_flush()
-            if not actions:
+            # Another coroutine may have already flushed this batch before we
+            # acquired the lock; never flush a newer batch on this timer.
+            if self._batches.get(key) is not batch:
                 return
+            batch.flush_task = None
+            flushed = self._prepare_flush(key, FlushReason.TIMER)
 
-        await self._execute_batch(actions, mode, label, waiters)
+        await self._execute_batch(flushed)
 
-    def _prepare_flush(
-        self,
-    ) -> tuple[list[Action], ExecutionMode | None, str | None, list[QueuedExecution]]:
-        """Prepare a flush by taking snapshot and clearing state (must be called with lock held).
+    def _prepare_flush(self, key: _BatchKey, reason: FlushReason) -> _PendingBatch:
+        """Detach the partition's pending batch for execution (must be called with lock held).
 
-        Returns a tuple of (actions, mode, label, waiters) that should be executed
-        outside the lock using _execute_batch().
+        The returned batch should be executed outside the lock using
+        _execute_batch(). An empty batch is returned if nothing is pending.
         """
-        if not self._pending_actions:
-            return ([], None, None, [])
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return _PendingBatch(None, None)
+
+        self.stats.flush_reasons[reason] += 1
 
         # Cancel any pending flush task
-        if self._flush_task and not self._flush_task.done():
-            self._flush_task.cancel()
-        self._flush_task = None
+        if batch.flush_task and not batch.flush_task.done():
+            batch.flush_task.cancel()
+        batch.flush_task = None
 
-        # Take snapshot of current batch
-        actions = self._pending_actions
-        mode = self._pending_mode
-        label = self._pending_label
-        waiters = self._pending_waiters
+        if self._adaptive is not None and batch.expected_calls is not None:
+            self._adaptive.observe_flush(batch)
 
-        # Clear pending state
-        self._pending_actions = []
-        self._pending_mode = None
-        self._pending_label = None
-        self._pending_waiters = []
+        return batch
 
-        return (actions, mode, label, waiters)
+    def _prepare_flush_all(self, reason: FlushReason) -> list[_PendingBatch]:
+        """Detach every pending batch for execution (must be called with lock held).
 
-    async def _execute_batch(
-        self,
-        actions: list[Action],
-        mode: ExecutionMode | None,
-        label: str | None,
-        waiters: list[QueuedExecution],
-    ) -> None:
+        Interactive batches come first so they are dispatched ahead of bulk ones.
+        """
+        return [
+            self._prepare_flush(key, reason)
+            for key in sorted(
+                self._batches, key=lambda k: k[0] != QueuePriority.INTERACTIVE
+            )
+        ]
+
+    async def _execute_batch(self, batch: _PendingBatch) -> None:
         """Execute a batch of actions and notify waiters (must be called without lock)."""
-        if not actions:
+        if not batch.actions:
             return
 
+        stats = self.stats
+        dispatched_at = time.perf_counter()
+        stats.batch_sizes.observe(len(batch.actions))
+        stats.dispatched_actions += len(batch.actions)
+        stats.dispatched_commands += sum(
+            len(action.commands) for action in batch.actions
+        )
+        for added_at in batch.added_at:
+            stats.queue_wait.observe(dispatched_at - added_at)
+
         try:
-            exec_id = await self._executor(actions, mode, label)
-            # Notify all waiters
-            for waiter in waiters:
-                waiter.set_result(exec_id)
+            exec_id = await self._executor(batch.actions, batch.mode, batch.label)
         except asyncio.CancelledError as exc:
             # Propagate cancellation to all waiters, then re-raise.
-            for waiter in waiters:
+            for waiter in batch.waiters:
                 waiter.set_exception(exc)
             raise
         except Exception as exc:  # noqa: BLE001
             # Propagate exceptions to all waiters without swallowing system-level exits.
-            for waiter in waiters:
+            stats.executor_errors[type(exc).__name__] += 1
+            for waiter in batch.waiters:
                 waiter.set_exception(exc)
+            return
+
+        completed_at = time.perf_counter()
+        stats.execution.observe(completed_at - dispatched_at)
+        for added_at in batch.added_at:
+            stats.end_to_end.observe(completed_at - added_at)
+        # Notify all waiters
+        for waiter in batch.waiters:
+            waiter.set_result(exec_id)
+
+    async def _execute_batches(self, batches: list[_PendingBatch]) -> None:
+        """Execute independent batches concurrently (must be called without lock)."""
+        if len(batches) == 1:
+            await self._execute_batch(batches[0])
+        elif batches:
+            await asyncio.gather(*(self._execute_batch(batch) for batch in batches))
 
     async def flush(self) -> None:
         """Force flush all pending actions immediately.
@@ -304,14 +733,11 @@ class ActionQueue:
         This method is useful for forcing immediate execution without having to
         wait for the delay timer to expire.
         """
-        batch_to_execute = None
         async with self._lock:
-            if self._pending_actions:
-                batch_to_execute = self._prepare_flush()
+            batches_to_execute = self._prepare_flush_all(FlushReason.FLUSH)
 
         # Execute outside the lock
-        if batch_to_execute:
-            await self._execute_batch(*batch_to_execute)
+        await self._execute_batches(batches_to_execute)
 
     def get_pending_count(self) -> int:
         """Get the (approximate) number of actions currently waiting in the queue.
@@ -321,24 +747,49 @@ class ActionQueue:
         being modified concurrently by other coroutines. Do not rely on this
         value for critical control flow or for making flush decisions.
         """
-        return len(self._pending_actions)
+        return sum(len(batch.actions) for batch in list(self._batches.values()))
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return a JSON-serializable snapshot of the queue metrics.
+
+        Includes the batch size histogram, per-caller queue wait, execution and
+        end-to-end latencies, flush reasons, merge ratio and executor error
+        counts (see `ActionQueueStats`), plus the current pending count and
+        bulk window.
+        """
+        return {
+            **self.stats.snapshot(),
+            "pending_actions": self.get_pending_count(),
+            "current_delay": self.get_current_delay(),
+        }
+
+    def reset_stats(self) -> None:
+        """Discard the collected metrics and start a new measurement window."""
+        self.stats = ActionQueueStats()
+
+    def get_current_delay(self) -> float:
+        """Return the bulk lane window, in seconds, used for the latest batch.
+
+        This is the fixed ``delay`` unless ``adaptive_delay`` is enabled.
+        """
+        if self._adaptive is not None:
+            return self._adaptive.current
+        return self._settings.delay
 
     async def shutdown(self) -> None:
         """Shutdown the queue, flushing any pending actions."""
-        cancelled_task: asyncio.Task[None] | None = None
-        batch_to_execute = None
+        cancelled_tasks: list[asyncio.Task[None]] = []
         async with self._lock:
-            if self._flush_task and not self._flush_task.done():
-                cancelled_task = self._flush_task
-                cancelled_task.cancel()
-                self._flush_task = None
+            for batch in self._batches.values():
+                if batch.flush_task and not batch.flush_task.done():
+                    cancelled_tasks.append(batch.flush_task)
+                    batch.flush_task.cancel()
+                    batch.flush_task = None
 
-            if self._pending_actions:
-                batch_to_execute = self._prepare_flush()
+            batches_to_execute = self._prepare_flush_all(FlushReason.SHUTDOWN)
 
-        if cancelled_task:
+        for task in cancelled_tasks:
             with contextlib.suppress(asyncio.CancelledError):
-                await cancelled_task
+                await task
 
-        if batch_to_execute:
-            await self._execute_batch(*batch_to_execute)
+        await self._execute_batches(batches_to_execute)
@@ -6,7 +6,11 @@ from pyoverkiz.auth.base import (
     AuthContext,
     AuthStrategy,
     GatewayCandidate,
+    StoredSession,
+    SupportsCachedAuthHeaders,
     SupportsGatewaySelection,
+    SupportsSessionRestore,
+    SupportsTokenRefresh,
 )
 from pyoverkiz.auth.credentials import (
     Credentials,
@@ -17,17 +21,31 @@ from pyoverkiz.auth.credentials import (
     UsernamePasswordCredentials,
 )
 from pyoverkiz.auth.factory import build_auth_strategy
+from pyoverkiz.auth.store import (
+    FileSessionStore,
+    MemorySessionStore,
+    SessionStore,
+    session_key,
+)
 
 __all__ = [
     "AuthContext",
     "AuthStrategy",
     "Credentials",
+    "FileSessionStore",
     "GatewayCandidate",
     "LocalTokenCredentials",
+    "MemorySessionStore",
     "RexelOAuthCodeCredentials",
     "RexelTokenCredentials",
+    "SessionStore",
+    "StoredSession",
+    "SupportsCachedAuthHeaders",
     "SupportsGatewaySelection",
+    "SupportsSessionRestore",
+    "SupportsTokenRefresh",
     "TokenCredentials",
     "UsernamePasswordCredentials",
     "build_auth_strategy",
+    "session_key",
 ]
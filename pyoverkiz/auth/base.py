@@ -38,6 +38,45 @@ class AuthContext:
             )
 
 
+@dataclass(slots=True)
+class StoredSession:
+    """Authentication state persisted between runs to skip the login exchange.
+
+    OAuth strategies store their tokens (and the selected gateway, if any);
+    session-login strategies store the cookies of the Overkiz API session.
+    """
+
+    access_token: str | None = field(default=None, repr=False)
+    refresh_token: str | None = field(default=None, repr=False)
+    expires_at: datetime.datetime | None = None
+    cookies: dict[str, str] = field(default_factory=dict, repr=False)
+    gateway_id: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable representation."""
+        return {
+            "access_token": self.access_token,
+            "refresh_token": self.refresh_token,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "cookies": dict(self.cookies),
+            "gateway_id": self.gateway_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> StoredSession:
+        """Create a stored session from the output of `to_dict()`."""
+        expires_at = data.get("expires_at")
+        return cls(
+            access_token=data.get("access_token"),
+            refresh_token=data.get("refresh_token"),
+            expires_at=(
+                datetime.datetime.fromisoformat(expires_at) if expires_at else None
+            ),
+            cookies=dict(data.get("cookies") or {}),
+            gateway_id=data.get("gateway_id"),
+        )
+
+
 class AuthStrategy(Protocol):
     """Protocol for authentication strategies."""
 
@@ -58,6 +97,35 @@ class AuthStrategy(Protocol):
         """Clean up any resources held by the strategy."""
 
 
+@runtime_checkable
+class SupportsTokenRefresh(Protocol):
+    """Optional capability: refresh an expiring access token ahead of time."""
+
+    context: AuthContext
+
+    async def refresh(self) -> bool:
+        """Refresh the access token now. Return False if it cannot be refreshed."""
+
+
+@runtime_checkable
+class SupportsSessionRestore(Protocol):
+    """Optional capability: export and restore the authenticated session."""
+
+    def export_session(self) -> StoredSession | None:
+        """Return the current session, or None if there is nothing to store."""
+
+    def restore_session(self, session: StoredSession) -> bool:
+        """Restore a stored session. Return False if it cannot be used."""
+
+
+@runtime_checkable
+class SupportsCachedAuthHeaders(Protocol):
+    """Optional capability: precomputed headers that can be read without awaiting."""
+
+    def cached_auth_headers(self) -> Mapping[str, str] | None:
+        """Return the current headers, or None if `auth_headers()` must be awaited."""
+
+
 @dataclass(slots=True)
 class GatewayCandidate:
     """A selectable Overkiz gateway behind a multi-account directory."""
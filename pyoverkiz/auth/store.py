@@ -0,0 +1,147 @@
+"""Persistent stores for authenticated sessions.
+
+Logging in runs the full credential exchange of the server (OAuth password
+grant, the Cozytouch and Brandt JWT chains, Nexity Cognito, …). When a
+`SessionStore` is configured on the client, the tokens or session cookies
+obtained at login are saved, and the next `login()` restores them instead
+of logging in. A restored session is validated lazily by the first request:
+expired tokens are refreshed, and a rejected session falls back to a full
+login with the credentials.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Protocol
+
+from pyoverkiz.auth.base import StoredSession
+from pyoverkiz.auth.credentials import (
+    Credentials,
+    TokenCredentials,
+    UsernamePasswordCredentials,
+)
+from pyoverkiz.models import ServerConfig
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SessionStore(Protocol):
+    """Protocol for storing authenticated sessions by key."""
+
+    async def load(self, key: str) -> StoredSession | None:
+        """Return the session stored under *key*, or None."""
+
+    async def save(self, key: str, session: StoredSession) -> None:
+        """Store *session* under *key*, replacing any previous one."""
+
+    async def delete(self, key: str) -> None:
+        """Remove the session stored under *key*, if any."""
+
+
+def session_key(
+    server: ServerConfig, credentials: Credentials, *, account: str | None = None
+) -> str | None:
+    """Return the store key of an account on a server, or None.
+
+    The key is derived from *account* when given, otherwise from the username
+    or the API token of the credentials. Other credentials (Rexel OAuth codes
+    and externally managed tokens) carry no stable account identity, so None
+    is returned and the session must not be stored: a shared key would let one
+    account restore the session of another. The identity is hashed, so stores
+    do not hold it in clear.
+    """
+    if account is not None:
+        identity = f"account:{account}"
+    elif isinstance(credentials, UsernamePasswordCredentials):
+        identity = credentials.username
+    elif isinstance(credentials, TokenCredentials):
+        identity = f"token:{credentials.token}"
+    else:
+        return None
+    digest = hashlib.sha256(identity.encode()).hexdigest()[:16]
+    return f"{server.server or server.name}/{digest}"
+
+
+class MemorySessionStore:
+    """Session store kept in memory, shared by the clients of one process."""
+
+    def __init__(self) -> None:
+        """Create an empty store."""
+        self._sessions: dict[str, dict[str, Any]] = {}
+
+    async def load(self, key: str) -> StoredSession | None:
+        """Return the session stored under *key*, or None."""
+        data = self._sessions.get(key)
+        return StoredSession.from_dict(data) if data is not None else None
+
+    async def save(self, key: str, session: StoredSession) -> None:
+        """Store a copy of *session* under *key*."""
+        self._sessions[key] = session.to_dict()
+
+    async def delete(self, key: str) -> None:
+        """Remove the session stored under *key*, if any."""
+        self._sessions.pop(key, None)
+
+
+class FileSessionStore:
+    """Session store backed by a JSON file.
+
+    The file holds one entry per key and is readable by its owner only.
+    Writes replace the file atomically; an unreadable file is treated as
+    empty.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        """Create a store reading and writing *path*."""
+        self.path = Path(path).expanduser()
+        self._lock = asyncio.Lock()
+
+    async def load(self, key: str) -> StoredSession | None:
+        """Return the session stored under *key*, or None."""
+        data = (await asyncio.to_thread(self._read)).get(key)
+        if not isinstance(data, dict):
+            return None
+        try:
+            return StoredSession.from_dict(data)
+        except (TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid stored session %r: %s", key, err)
+            return None
+
+    async def save(self, key: str, session: StoredSession) -> None:
+        """Store *session* under *key*."""
+        async with self._lock:
+            await asyncio.to_thread(self._update, key, session.to_dict())
+
+    async def delete(self, key: str) -> None:
+        """Remove the session stored under *key*, if any."""
+        async with self._lock:
+            await asyncio.to_thread(self._update, key, None)
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as err:
+            _LOGGER.warning("Ignoring unreadable session store %s: %s", self.path, err)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _update(self, key: str, value: dict[str, Any] | None) -> None:
+        data = self._read()
+        if value is None:
+            if data.pop(key, None) is None:
+                return
+        else:
+            data[key] = value
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(f".{self.path.name}.tmp")
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        temporary.replace(self.path)
@@ -9,14 +9,21 @@ import json
 import ssl
 from collections.abc import Mapping
 from http import HTTPStatus
+from types import MappingProxyType
 from typing import TYPE_CHECKING, Any, cast
 
 if TYPE_CHECKING:
     from botocore.client import BaseClient
 
 from aiohttp import ClientResponse, ClientSession, FormData
+from yarl import URL
 
-from pyoverkiz.auth.base import AuthContext, AuthStrategy, GatewayCandidate
+from pyoverkiz.auth.base import (
+    AuthContext,
+    AuthStrategy,
+    GatewayCandidate,
+    StoredSession,
+)
 from pyoverkiz.auth.credentials import (
     LocalTokenCredentials,
     RexelOAuthCodeCredentials,
@@ -61,6 +68,15 @@ from pyoverkiz.response_handler import check_response
 
 MIN_JWT_SEGMENTS = 2
 
+_NO_HEADERS: Mapping[str, str] = MappingProxyType({})
+
+
+def _bearer_headers(token: str | None) -> Mapping[str, str]:
+    """Return an immutable Bearer authorization header, or no headers without a token."""
+    if not token:
+        return _NO_HEADERS
+    return MappingProxyType({"Authorization": f"Bearer {token}"})
+
 
 async def _raise_for_server_error(response: ClientResponse) -> None:
     """Map a 5xx token-endpoint response to a typed Overkiz exception.
@@ -73,8 +89,44 @@ async def _raise_for_server_error(response: ClientResponse) -> None:
         await check_response(response)
 
 
+def _export_context(context: AuthContext) -> StoredSession | None:
+    """Return the tokens of an OAuth context as a stored session."""
+    if not context.access_token:
+        return None
+    return StoredSession(
+        access_token=context.access_token,
+        refresh_token=context.refresh_token,
+        expires_at=context.expires_at,
+    )
+
+
+def _restore_context(context: AuthContext, session: StoredSession) -> bool:
+    """Load stored tokens into an OAuth context, unless they are unusable.
+
+    Expired tokens are accepted when a refresh token was stored: the client
+    refreshes them before the first request.
+    """
+    if not session.access_token:
+        return False
+    context.access_token = session.access_token
+    context.refresh_token = session.refresh_token
+    context.expires_at = session.expires_at
+    if context.is_expired() and not context.refresh_token:
+        context.access_token = None
+        return False
+    return True
+
+
 class BaseAuthStrategy(AuthStrategy):
-    """Base class for authentication strategies."""
+    """Base class for authentication strategies.
+
+    Strategies with header-based authentication precompute their headers:
+    ``_headers`` is rebuilt only when the token it was built from
+    (``_headers_token``) is replaced.
+    """
+
+    _headers: Mapping[str, str] = _NO_HEADERS
+    _headers_token: str | None = None
 
     def __init__(
         self,
@@ -104,6 +156,10 @@ class BaseAuthStrategy(AuthStrategy):
         """Return authentication headers for a request path."""
         return {}
 
+    def cached_auth_headers(self) -> Mapping[str, str] | None:
+        """Return precomputed headers, or None if `auth_headers()` must be awaited."""
+        return None
+
     async def close(self) -> None:
         """Close any resources held by the strategy; default is no-op."""
         return
@@ -131,6 +187,28 @@ class SessionLoginStrategy(BaseAuthStrategy):
         }
         await self._post_login(payload)
 
+    def cached_auth_headers(self) -> Mapping[str, str]:
+        """Return no headers: requests are authenticated by the session cookie."""
+        return _NO_HEADERS
+
+    def export_session(self) -> StoredSession | None:
+        """Return the Overkiz API session cookies."""
+        cookies = self.session.cookie_jar.filter_cookies(URL(self.server.endpoint))
+        if not cookies:
+            return None
+        return StoredSession(
+            cookies={name: morsel.value for name, morsel in cookies.items()}
+        )
+
+    def restore_session(self, session: StoredSession) -> bool:
+        """Load stored session cookies; they are validated by the first request."""
+        if not session.cookies:
+            return False
+        self.session.cookie_jar.update_cookies(
+            session.cookies, URL(self.server.endpoint)
+        )
+        return True
+
     async def _post_login(self, data: Mapping[str, Any]) -> None:
         """Post login data to the server and handle response."""
         async with self.session.post(
@@ -179,7 +257,14 @@ class SomfyAuthStrategy(BaseAuthStrategy):
 
     async def refresh_if_needed(self) -> bool:
         """Refresh Somfy OAuth2 tokens if needed."""
-        if not self.context.is_expired() or not self.context.refresh_token:
+        if not self.context.is_expired():
+            return False
+
+        return await self.refresh()
+
+    async def refresh(self) -> bool:
+        """Refresh Somfy OAuth2 tokens now; return False without a refresh token."""
+        if not self.context.refresh_token:
             return False
 
         await self._request_access_token(
@@ -190,10 +275,23 @@ class SomfyAuthStrategy(BaseAuthStrategy):
 
     async def auth_headers(self, path: str | None = None) -> Mapping[str, str]:
         """Return authentication headers for a request path."""
-        if self.context.access_token:
-            return {"Authorization": f"Bearer {self.context.access_token}"}
+        return self.cached_auth_headers()
 
-        return {}
+    def cached_auth_headers(self) -> Mapping[str, str]:
+        """Return the Bearer header of the current access token."""
+        token = self.context.access_token
+        if token is not self._headers_token:
+            self._headers = _bearer_headers(token)
+            self._headers_token = token
+        return self._headers
+
+    def export_session(self) -> StoredSession | None:
+        """Return the current Somfy OAuth2 tokens."""
+        return _export_context(self.context)
+
+    def restore_session(self, session: StoredSession) -> bool:
+        """Load stored Somfy OAuth2 tokens."""
+        return _restore_context(self.context, session)
 
     async def _request_access_token(
         self, *, grant_type: str, extra_fields: Mapping[str, str]
@@ -398,7 +496,15 @@ class LocalTokenAuthStrategy(BaseAuthStrategy):
 
     async def auth_headers(self, path: str | None = None) -> Mapping[str, str]:
         """Return authentication headers for a request path."""
-        return {"Authorization": f"Bearer {self.credentials.token}"}
+        return self.cached_auth_headers()
+
+    def cached_auth_headers(self) -> Mapping[str, str]:
+        """Return the Bearer header of the local API token."""
+        token = self.credentials.token
+        if token is not self._headers_token:
+            self._headers = MappingProxyType({"Authorization": f"Bearer {token}"})
+            self._headers_token = token
+        return self._headers
 
 
 class RexelGatewayMixin:
@@ -411,6 +517,9 @@ class RexelGatewayMixin:
     session: ClientSession
     _ssl: ssl.SSLContext | bool
     _gateway_id: str | None
+    _headers: Mapping[str, str]
+    _headers_token: str | None
+    _headers_gateway: str | None = None
 
     async def _current_access_token(self) -> str | None:
         """Return the current access token. Overridden per strategy."""
@@ -475,10 +584,22 @@ class RexelGatewayMixin:
 
     async def auth_headers(self, path: str | None = None) -> Mapping[str, str]:
         """Return Bearer + gatewayId headers, or {} before a token exists."""
-        token = await self._current_access_token()
+        return self._headers_for(await self._current_access_token())
+
+    def _headers_for(self, token: str | None) -> Mapping[str, str]:
+        """Return the headers for *token*, rebuilt when it or the gateway changed."""
+        if token is self._headers_token and self._gateway_id is self._headers_gateway:
+            return self._headers
         if not token:
-            return {}
-        return {"Authorization": f"Bearer {token}", **self._gateway_headers()}
+            headers = _NO_HEADERS
+        else:
+            headers = MappingProxyType(
+                {"Authorization": f"Bearer {token}", **self._gateway_headers()}
+            )
+        self._headers = headers
+        self._headers_token = token
+        self._headers_gateway = self._gateway_id
+        return headers
 
 
 class RexelAuthStrategy(RexelGatewayMixin, BaseAuthStrategy):
@@ -501,6 +622,10 @@ class RexelAuthStrategy(RexelGatewayMixin, BaseAuthStrategy):
         """Return the access token from the OAuth2 code-exchange context."""
         return self.context.access_token
 
+    def cached_auth_headers(self) -> Mapping[str, str]:
+        """Return the Bearer + gatewayId headers of the current access token."""
+        return self._headers_for(self.context.access_token)
+
     async def login(self) -> None:
         """Exchange the authorization code, then auto-select a sole gateway."""
         await self._exchange_token(
@@ -519,7 +644,14 @@ class RexelAuthStrategy(RexelGatewayMixin, BaseAuthStrategy):
 
     async def refresh_if_needed(self) -> bool:
         """Refresh Rexel OAuth2 tokens if needed."""
-        if not self.context.is_expired() or not self.context.refresh_token:
+        if not self.context.is_expired():
+            return False
+
+        return await self.refresh()
+
+    async def refresh(self) -> bool:
+        """Refresh Rexel OAuth2 tokens now; return False without a refresh token."""
+        if not self.context.refresh_token:
             return False
 
         await self._exchange_token(
@@ -532,6 +664,20 @@ class RexelAuthStrategy(RexelGatewayMixin, BaseAuthStrategy):
         )
         return True
 
+    def export_session(self) -> StoredSession | None:
+        """Return the current Rexel OAuth2 tokens and the selected gateway."""
+        session = _export_context(self.context)
+        if session is not None:
+            session.gateway_id = self._gateway_id
+        return session
+
+    def restore_session(self, session: StoredSession) -> bool:
+        """Load stored Rexel OAuth2 tokens and gateway selection."""
+        if not _restore_context(self.context, session):
+            return False
+        self._gateway_id = session.gateway_id
+        return True
+
     async def _exchange_token(self, payload: Mapping[str, str]) -> None:
         """Exchange authorization code or refresh token for access token."""
         async with self.session.post(
@@ -602,6 +748,12 @@ class RexelTokenAuthStrategy(RexelGatewayMixin, BaseAuthStrategy):
             return await self.credentials.access_token_callback()
         return self.credentials.access_token
 
+    def cached_auth_headers(self) -> Mapping[str, str] | None:
+        """Return the headers of a static token; None when a callback supplies it."""
+        if self.credentials.access_token_callback:
+            return None
+        return self._headers_for(self.credentials.access_token)
+
 
 class BearerTokenAuthStrategy(BaseAuthStrategy):
     """Authentication strategy using a static bearer token."""
@@ -619,9 +771,15 @@ class BearerTokenAuthStrategy(BaseAuthStrategy):
 
     async def auth_headers(self, path: str | None = None) -> Mapping[str, str]:
         """Return authentication headers for a request path."""
-        if self.credentials.token:
-            return {"Authorization": f"Bearer {self.credentials.token}"}
-        return {}
+        return self.cached_auth_headers()
+
+    def cached_auth_headers(self) -> Mapping[str, str]:
+        """Return the Bearer header of the static token."""
+        token = self.credentials.token
+        if token is not self._headers_token:
+            self._headers = _bearer_headers(token)
+            self._headers_token = token
+        return self._headers
 
 
 def _decode_jwt_payload(token: str) -> dict[str, Any]:
@@ -3,9 +3,13 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import datetime as dt
 import logging
 import ssl
+import time
 import urllib.parse
+from collections.abc import Awaitable, Callable, Mapping
 from dataclasses import dataclass
 from http import HTTPStatus
 from pathlib import Path
@@ -22,27 +26,45 @@ from aiohttp import (
 )
 from backoff.types import Details
 
-from pyoverkiz.action_queue import ActionQueue, ActionQueueSettings
+from pyoverkiz.action_groups import ActionGroupCacheSettings, ActionGroupRegistry
+from pyoverkiz.action_queue import ActionQueue, ActionQueueSettings, QueuePriority
 from pyoverkiz.auth import (
     AuthStrategy,
     Credentials,
     GatewayCandidate,
+    SessionStore,
+    SupportsCachedAuthHeaders,
     SupportsGatewaySelection,
+    SupportsSessionRestore,
+    SupportsTokenRefresh,
     build_auth_strategy,
+    session_key,
 )
-from pyoverkiz.const import SUPPORTED_SERVERS, USER_AGENT
+from pyoverkiz.const import USER_AGENT
 from pyoverkiz.converter import converter
 from pyoverkiz.enums import APIType, ExecutionMode, Protocol, Server
 from pyoverkiz.exceptions import (
+    BadCredentialsError,
+    BaseOverkizError,
     ExecutionQueueFullError,
     InvalidEventListenerIdError,
+    InvalidTokenError,
     NoRegisteredEventListenerError,
     NotAuthenticatedError,
-    OverkizError,
     TooManyConcurrentRequestsError,
     TooManyExecutionsError,
     UnsupportedOperationError,
 )
+from pyoverkiz.execution_slots import ExecutionSlots, ExecutionSlotSettings
+from pyoverkiz.instrumentation import (
+    AuthRefreshSample,
+    Instrumentation,
+    RequestSample,
+    RetrySample,
+    StructureSample,
+    endpoint_template,
+    type_label,
+)
 from pyoverkiz.models import (
     Action,
     Command,
@@ -68,8 +90,17 @@ from pyoverkiz.models import (
     UIProfileDefinition,
 )
 from pyoverkiz.obfuscate import obfuscate_sensitive_data
+from pyoverkiz.rate_budget import RateLimiter
 from pyoverkiz.response_handler import check_response
+from pyoverkiz.scheduler import ActionScheduler, ActionSchedulerSettings
 from pyoverkiz.serializers import prepare_payload
+from pyoverkiz.setup_diff import SetupDiff, diff_setups
+from pyoverkiz.setup_index import SetupIndex
+from pyoverkiz.setup_versions import SetupVersions
+from pyoverkiz.state_columns import StateColumns
+from pyoverkiz.state_history import StateHistorySettings, StateHistoryStore
+from pyoverkiz.utils import normalize_server
+from pyoverkiz.validation import CommandValidator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -83,7 +114,17 @@ def _get_client_from_invocation(invocation: Details) -> OverkizClient:
 
 async def relogin(invocation: Details) -> None:
     """Re-authenticate using the main `OverkizClient` instance."""
-    await _get_client_from_invocation(invocation).login()
+    client = _get_client_from_invocation(invocation)
+    instrumentation = client.settings.instrumentation
+    if instrumentation is None:
+        await client.login()
+        return
+
+    started = time.perf_counter()
+    await client.login()
+    instrumentation.record_auth_refresh(
+        AuthRefreshSample(kind="relogin", duration=time.perf_counter() - started)
+    )
 
 
 async def refresh_listener(invocation: Details) -> None:
@@ -91,13 +132,30 @@ async def refresh_listener(invocation: Details) -> None:
     await _get_client_from_invocation(invocation).register_event_listener()
 
 
+async def record_retry(invocation: Details) -> None:
+    """Report a scheduled retry to the client instrumentation, if configured."""
+    instrumentation = _get_client_from_invocation(invocation).settings.instrumentation
+    if instrumentation is None:
+        return
+
+    exception = cast(dict[str, Any], invocation).get("exception")
+    instrumentation.record_retry(
+        RetrySample(
+            target=invocation["target"].__name__,
+            reason=type(exception).__name__,
+            tries=invocation["tries"],
+            wait=invocation.get("wait", 0.0),
+        )
+    )
+
+
 retry_on_auth_error = backoff.on_exception(
     backoff.expo,
     NotAuthenticatedError,
     max_tries=2,
     max_time=60,
     jitter=backoff.full_jitter,
-    on_backoff=relogin,
+    on_backoff=[record_retry, relogin],
     logger=_LOGGER,
 )
 
@@ -107,6 +165,7 @@ retry_on_connection_failure = backoff.on_exception(
     max_tries=3,
     max_time=30,
     jitter=backoff.full_jitter,
+    on_backoff=record_retry,
     logger=_LOGGER,
 )
 
@@ -116,6 +175,7 @@ retry_on_concurrent_requests = backoff.on_exception(
     max_tries=5,
     max_time=120,
     jitter=backoff.full_jitter,
+    on_backoff=record_retry,
     logger=_LOGGER,
 )
 
@@ -125,6 +185,7 @@ retry_on_too_many_executions = backoff.on_exception(
     max_tries=5,
     max_time=300,
     jitter=backoff.full_jitter,
+    on_backoff=record_retry,
     logger=_LOGGER,
 )
 
@@ -134,7 +195,7 @@ retry_on_listener_error = backoff.on_exception(
     max_tries=2,
     max_time=30,
     jitter=backoff.full_jitter,
-    on_backoff=refresh_listener,
+    on_backoff=[record_retry, refresh_listener],
     logger=_LOGGER,
 )
 
@@ -144,6 +205,7 @@ retry_on_execution_queue_full = backoff.on_exception(
     max_tries=5,
     max_time=120,
     jitter=backoff.full_jitter,
+    on_backoff=record_retry,
     logger=_LOGGER,
 )
 
@@ -182,6 +244,17 @@ class OverkizClientSettings:
 
     action_queue: ActionQueueSettings | None = None
     default_rts_command_duration: int | None = None
+    instrumentation: Instrumentation | None = None
+    execution_slots: ExecutionSlotSettings | None = None
+    validate_commands: bool = False
+    action_groups: ActionGroupCacheSettings | None = None
+    scheduler: ActionSchedulerSettings | None = None
+    state_history: StateHistorySettings | None = None
+    setup_versions: bool = False
+    token_refresh_margin: float | None = None
+    session_store: SessionStore | None = None
+    session_account: str | None = None
+    rate_limiter: RateLimiter | None = None
 
 
 class OverkizClient:
@@ -191,10 +264,28 @@ class OverkizClient:
     setup: Setup | None
     devices: list[Device]
     gateways: list[Gateway]
+    last_setup_diff: SetupDiff | None = None
     session: ClientSession
     _ssl: ssl.SSLContext | bool = True
     _auth: AuthStrategy
+    _token_refresher: SupportsTokenRefresh | None = None
+    _header_source: SupportsCachedAuthHeaders | None = None
+    _token_refresh: asyncio.Task[bool] | None = None
+    _token_refresh_timer: asyncio.Task[None] | None = None
+    _session_key: str | None = None
+    _session_restore_attempted: bool = False
     _action_queue: ActionQueue | None = None
+    _execution_slots: ExecutionSlots | None = None
+    _validator: CommandValidator | None = None
+    _validated_devices: list[Device] | None = None
+    _action_groups: ActionGroupRegistry | None = None
+    _scheduler: ActionScheduler | None = None
+    _setup_index: SetupIndex | None = None
+    _indexed_devices: list[Device] | None = None
+    _state_history: StateHistoryStore | None = None
+    _state_columns: StateColumns | None = None
+    _columned_devices: list[Device] | None = None
+    _setup_versions: SetupVersions | None = None
     _event_listener_id: str | None
     settings: OverkizClientSettings
 
@@ -203,6 +294,26 @@ class OverkizClient:
         """Return the current event listener ID (read-only)."""
         return self._event_listener_id
 
+    @property
+    def execution_slots(self) -> ExecutionSlots | None:
+        """Return the local execution-slot scheduler, if enabled (read-only)."""
+        return self._execution_slots
+
+    @property
+    def scheduler(self) -> ActionScheduler | None:
+        """Return the local scheduler for deferred actions, if enabled (read-only)."""
+        return self._scheduler
+
+    @property
+    def state_history(self) -> StateHistoryStore | None:
+        """Return the recorded state histories, if enabled (read-only)."""
+        return self._state_history
+
+    @property
+    def setup_versions(self) -> SetupVersions | None:
+        """Return the copy-on-write setup versions, if enabled (read-only)."""
+        return self._setup_versions
+
     def __init__(
         self,
         *,
@@ -221,7 +332,7 @@ class OverkizClient:
             session: Optional ClientSession.
             settings: Behavioral settings for the client.
         """
-        self.server_config = self._normalize_server(server)
+        self.server_config = normalize_server(server)
 
         self.setup: Setup | None = None
         self.devices: list[Device] = []
@@ -239,6 +350,24 @@ class OverkizClient:
 
         self.settings = settings or OverkizClientSettings()
 
+        if self.settings.validate_commands:
+            self._validator = CommandValidator()
+
+        if self.settings.setup_versions:
+            self._setup_versions = SetupVersions()
+
+        if self.settings.action_groups:
+            self.settings.action_groups.validate()
+            self._action_groups = ActionGroupRegistry(self.settings.action_groups)
+
+        if self.settings.state_history:
+            self.settings.state_history.validate()
+            self._state_history = StateHistoryStore(self.settings.state_history)
+
+        if self.settings.execution_slots:
+            self.settings.execution_slots.validate()
+            self._execution_slots = ExecutionSlots(self.settings.execution_slots)
+
         if self.settings.action_queue:
             self.settings.action_queue.validate()
             self._action_queue = ActionQueue(
@@ -246,12 +375,35 @@ class OverkizClient:
                 settings=self.settings.action_queue,
             )
 
+        if self.settings.scheduler:
+            self.settings.scheduler.validate()
+            self._scheduler = ActionScheduler(
+                executor=self._execute_scheduled_actions,
+                settings=self.settings.scheduler,
+            )
+
         self._auth = build_auth_strategy(
             server_config=self.server_config,
             credentials=credentials,
             session=self.session,
             ssl_context=self._ssl,
         )
+        if isinstance(self._auth, SupportsTokenRefresh):
+            self._token_refresher = self._auth
+        if isinstance(self._auth, SupportsCachedAuthHeaders):
+            self._header_source = self._auth
+        if self.settings.session_store is not None:
+            self._session_key = session_key(
+                self.server_config,
+                credentials,
+                account=self.settings.session_account,
+            )
+            if self._session_key is None:
+                _LOGGER.warning(
+                    "Not using the session store: %s has no stable account "
+                    "identity, set session_account to enable it",
+                    type(credentials).__name__,
+                )
 
     async def __aenter__(self) -> Self:
         """Enter async context manager and return the client instance."""
@@ -266,27 +418,30 @@ class OverkizClient:
         """Exit the async context manager and close the client session."""
         await self.close()
 
-    @staticmethod
-    def _normalize_server(server: ServerConfig | Server | str) -> ServerConfig:
-        """Resolve user-provided server identifiers into a `ServerConfig`."""
-        if isinstance(server, ServerConfig):
-            return server
-
-        server_key = server.value if isinstance(server, Server) else str(server)
-
-        try:
-            return SUPPORTED_SERVERS[server_key]
-        except KeyError as error:
-            raise OverkizError(
-                f"Unknown server '{server_key}'. Provide a supported server key or ServerConfig instance."
-            ) from error
-
     async def close(self) -> None:
         """Close the session."""
+        # Stop holding executions back, so the queue flush below cannot block
+        # on slots that are only freed by events nobody is polling anymore.
+        if self._execution_slots:
+            self._execution_slots.close()
+
+        # Drop pending timers and let already-due scheduled actions reach the queue.
+        if self._scheduler:
+            await self._scheduler.close()
+
         # Flush any pending actions in queue
         if self._action_queue:
             await self._action_queue.shutdown()
 
+        if self._token_refresh_timer is not None:
+            self._token_refresh_timer.cancel()
+            self._token_refresh_timer = None
+
+        # Let a running refresh finish, so the session is not closed under it.
+        if self._token_refresh is not None:
+            with contextlib.suppress(Exception):
+                await asyncio.shield(self._token_refresh)
+
         if self.event_listener_id:
             await self.unregister_event_listener()
 
@@ -306,21 +461,74 @@ class OverkizClient:
             TooManyAttemptsBannedError: When too many failed login attempts have been made.
             TooManyRequestsError: When the API rate limit has been exceeded.
         """
-        await self._auth.login()
+        restored = await self._restore_session()
+        if not restored:
+            await self._auth.login()
+            await self.save_session()
+        self._schedule_token_refresh()
+
+        try:
+            if self.server_config.api_type == APIType.LOCAL:
+                if register_event_listener:
+                    await self.register_event_listener()
+                else:
+                    # Validate local API token by calling a simple endpoint
+                    await self.get_gateways()
+
+                return
 
-        if self.server_config.api_type == APIType.LOCAL:
             if register_event_listener:
                 await self.register_event_listener()
-            else:
-                # Validate local API token by calling a simple endpoint
-                await self.get_gateways()
+        except (NotAuthenticatedError, BadCredentialsError, InvalidTokenError):
+            if not restored:
+                raise
+            # The stored session was rejected: log in with the credentials.
+            await self.login(register_event_listener)
+
+    async def save_session(self) -> None:
+        """Save the authenticated session to the configured session store.
 
+        Called after login and after each token refresh; call it after
+        `select_gateway()` to persist the selection as well.
+        """
+        store = self.settings.session_store
+        key = self._session_key
+        if (
+            store is None
+            or key is None
+            or not isinstance(self._auth, SupportsSessionRestore)
+        ):
+            return
+        session = self._auth.export_session()
+        if session is None:
             return
+        try:
+            await store.save(key, session)
+        except OSError as err:
+            _LOGGER.warning("Could not save the session: %r", err)
 
-        if register_event_listener:
-            await self.register_event_listener()
+    async def _restore_session(self) -> bool:
+        """Restore a stored session on the first login; return True if restored.
 
-        return
+        Later logins (e.g. the re-login after an authentication error) always
+        use the credentials.
+        """
+        store = self.settings.session_store
+        key = self._session_key
+        if (
+            store is None
+            or key is None
+            or self._session_restore_attempted
+            or not isinstance(self._auth, SupportsSessionRestore)
+        ):
+            return False
+        self._session_restore_attempted = True
+        try:
+            session = await store.load(key)
+        except OSError as err:
+            _LOGGER.warning("Could not load the stored session: %r", err)
+            return False
+        return session is not None and self._auth.restore_session(session)
 
     @retry_on_auth_error
     async def get_setup(self, refresh: bool = False) -> Setup:
@@ -339,21 +547,96 @@ class OverkizClient:
         Data of one or several devices can be also get by setting the device(s) url as request parameter.
 
         Per-session rate-limit : 1 calls per 1d period for this particular operation (bulk-load)
+
+        On a refresh, the differences with the previous setup are stored in
+        `last_setup_diff` and applied to the setup index, state columns and
+        setup versions instead of rebuilding them.
         """
         if self.setup and not refresh:
             return self.setup
 
         response = await self._get("setup")
 
-        setup = converter.structure(response, Setup)
+        setup = self._structure(response, Setup)
+        previous = self.setup
 
         # Cache response
         self.setup = setup
         self.gateways = setup.gateways
         self.devices = setup.devices
+        if previous is None:
+            if self._setup_versions is not None:
+                self._setup_versions.load(setup)
+            return setup
+
+        # Update the caches built from the previous setup from the diff
+        # rather than rebuilding them.
+        diff = self.last_setup_diff = diff_setups(previous, setup)
+        if self._setup_index is not None and self._indexed_devices is previous.devices:
+            self._setup_index.apply_diff(diff, setup)
+            self._indexed_devices = setup.devices
+        if (
+            self._state_columns is not None
+            and self._columned_devices is previous.devices
+        ):
+            self._state_columns.apply_diff(diff)
+            self._columned_devices = setup.devices
+        if self._setup_versions is not None:
+            self._setup_versions.apply_diff(diff, setup)
 
         return setup
 
+    def restore_setup(self, setup: Setup) -> None:
+        """Seed the setup cache with a setup fetched earlier.
+
+        Use this with `pyoverkiz.snapshot.load_setup()` to start from a saved
+        setup after a restart: `get_setup()`, `get_devices()` and
+        `get_gateways()` then return the restored data without calling the
+        rate-limited bulk-load endpoint until called with ``refresh=True``.
+        """
+        self.setup = setup
+        self.gateways = setup.gateways
+        self.devices = setup.devices
+        if self._setup_versions is not None:
+            self._setup_versions.load(setup)
+
+    def get_setup_index(self) -> SetupIndex:
+        """Return hash indexes over the cached setup for fast device queries.
+
+        The index is built from the setup (or device list) cached by
+        `get_setup()` / `get_devices()`, rebuilt when either is refreshed, and
+        kept current from events returned by `fetch_events()`. Check
+        `SetupIndex.stale` to know when a refresh is needed to pick up newly
+        created devices. The place tree is not refetched here: when
+        `SetupIndex.places_stale` is set, call `get_places()`, which reloads
+        it into the index.
+        """
+        if self._setup_index is None:
+            self._setup_index = SetupIndex()
+        if self._indexed_devices is not self.devices:
+            if self.setup is not None and self.setup.devices is self.devices:
+                self._setup_index.load(self.setup)
+            else:
+                self._setup_index.load_devices(self.devices)
+            self._indexed_devices = self.devices
+        return self._setup_index
+
+    def get_state_columns(self) -> StateColumns:
+        """Return the numeric states of the cached devices, stored by column.
+
+        Rows follow the device order of `get_setup_index()`. The columns are
+        rebuilt when the device list is refreshed and kept current from
+        state change events returned by `fetch_events()`.
+        """
+        if self._state_columns is None or self._columned_devices is not self.devices:
+            devices = self.get_setup_index().devices
+            if self._state_columns is None:
+                self._state_columns = StateColumns(devices)
+            else:
+                self._state_columns.load(devices)
+            self._columned_devices = self.devices
+        return self._state_columns
+
     @retry_on_auth_error
     async def get_diagnostic_data(
         self, mask_sensitive_data: bool = True
@@ -393,12 +676,14 @@ class OverkizClient:
             return self.devices
 
         response = await self._get("setup/devices")
-        devices = converter.structure(response, list[Device])
+        devices = self._structure(response, list[Device])
 
         # Cache response
         self.devices = devices
         if self.setup:
             self.setup.devices = devices
+        if self._setup_versions is not None:
+            self._setup_versions.load_devices(devices, setup=self.setup)
 
         return devices
 
@@ -412,7 +697,7 @@ class OverkizClient:
             return self.gateways
 
         response = await self._get("setup/gateways")
-        gateways = converter.structure(response, list[Gateway])
+        gateways = self._structure(response, list[Gateway])
 
         # Cache response
         self.gateways = gateways
@@ -425,7 +710,7 @@ class OverkizClient:
     async def get_execution_history(self) -> list[HistoryExecution]:
         """List past executions and their outcomes."""
         response = await self._get("history/executions")
-        return converter.structure(response, list[HistoryExecution])
+        return self._structure(response, list[HistoryExecution])
 
     @retry_on_auth_error
     async def get_device_definition(self, device_url: str) -> Definition | None:
@@ -438,7 +723,7 @@ class OverkizClient:
         if raw is None:
             return None
 
-        return converter.structure(raw, Definition)
+        return self._structure(raw, Definition)
 
     @retry_on_auth_error
     async def get_state(self, device_url: str) -> list[State]:
@@ -446,7 +731,10 @@ class OverkizClient:
         response = await self._get(
             f"setup/devices/{urllib.parse.quote_plus(device_url)}/states"
         )
-        return converter.structure(response, list[State])
+        states = self._structure(response, list[State])
+        if self._state_history is not None:
+            self._state_history.record_states(device_url, states)
+        return states
 
     @retry_on_auth_error
     async def refresh_states(self) -> None:
@@ -488,7 +776,20 @@ class OverkizClient:
         operation (polling).
         """
         response = await self._post(f"events/{self.event_listener_id}/fetch")
-        return converter.structure(response, list[Event])
+        events = self._structure(response, list[Event])
+        if self._execution_slots:
+            self._execution_slots.observe_events(events)
+        if self._action_groups is not None:
+            self._action_groups.observe_events(events)
+        if self._setup_index is not None:
+            self._setup_index.observe_events(events)
+        if self._state_history is not None:
+            self._state_history.observe_events(events)
+        if self._state_columns is not None:
+            self._state_columns.observe_events(events)
+        if self._setup_versions is not None:
+            self._setup_versions.observe_events(events)
+        return events
 
     async def unregister_event_listener(self) -> None:
         """Unregister an event listener.
@@ -508,13 +809,17 @@ class OverkizClient:
         if not response or not isinstance(response, dict):
             return None
 
-        return converter.structure(response, Execution)
+        return self._structure(response, Execution)
 
     @retry_on_auth_error
     async def get_current_executions(self) -> list[Execution]:
         """Get all currently running executions."""
+        since = asyncio.get_running_loop().time()
         response = await self._get("exec/current")
-        return converter.structure(response, list[Execution])
+        executions = self._structure(response, list[Execution])
+        if self._execution_slots:
+            self._execution_slots.reconcile(executions, since=since)
+        return executions
 
     @retry_on_auth_error
     async def get_api_version(self) -> str:
@@ -588,13 +893,34 @@ class OverkizClient:
 
         The executed action group does not have to be persisted on the server before use.
         Per-session rate-limit : 1 calls per 28min 48s period for all operations of the same category (exec)
+
+        When execution slots are enabled, the call waits for a free slot first
+        and the returned exec_id holds that slot until the execution finishes.
         """
         payload = {"label": label, "actions": [a.to_payload() for a in actions]}
         url = f"exec/apply/{mode.value}" if mode else "exec/apply"
 
-        response: dict = await self._post(url, prepare_payload(payload))
+        return await self._start_execution(url, prepare_payload(payload))
+
+    async def _start_execution(
+        self, path: str, payload: dict[str, Any] | None = None
+    ) -> str:
+        """Start an execution and return its exec_id, holding an execution slot if enabled."""
+        slots = self._execution_slots
+        if slots is None:
+            response = await self._post(path, payload)
+            return cast(str, response["execId"])
+
+        await slots.acquire()
+        try:
+            response = await self._post(path, payload)
+        except BaseException:
+            slots.release_reservation()
+            raise
 
-        return cast(str, response["execId"])
+        exec_id = cast(str, response["execId"])
+        slots.register(exec_id)
+        return exec_id
 
     async def execute_action_group(
         self,
@@ -602,6 +928,7 @@ class OverkizClient:
         actions: list[Action],
         mode: ExecutionMode | None = None,
         label: str | None = "pyOverkiz",
+        priority: QueuePriority | None = None,
     ) -> str:
         """Execute an ad-hoc action group built from the given actions.
 
@@ -615,8 +942,17 @@ class OverkizClient:
         targeting the same device are combined into a single action. The method
         blocks until the batch executes and returns the resulting exec_id.
 
+        Queued actions go to the ``INTERACTIVE`` lane (dispatched immediately by
+        default) or the ``BULK`` lane (batched). The lane defaults to
+        ``INTERACTIVE`` for ``HIGH_PRIORITY`` mode and ``BULK`` otherwise.
+
         When the action queue is disabled, the action group is sent immediately.
 
+        With ``validate_commands`` enabled, commands are first checked against
+        the cached device definitions (and any UI profile fetched with
+        ``get_reference_ui_profile``); an invalid call raises
+        ``InvalidCommandError`` without a round trip and never joins a batch.
+
         Args:
             actions: One or more actions to execute. Each action targets a
                 single device and holds one or more commands.
@@ -625,17 +961,48 @@ class OverkizClient:
                 API rejects requests that specify an execution mode (see
                 https://github.com/Somfy-Developer/Somfy-TaHoma-Developer-Mode/issues/227).
             label: Human-readable label for the execution.
+            priority: Optional queue lane; ignored when the action queue is
+                disabled.
 
         Returns:
             The ``exec_id`` identifying the execution on the server.
         """
         actions = self._apply_rts_duration(actions)
+        self._validate_actions(actions)
 
         if self._action_queue:
-            queued = await self._action_queue.add(actions, mode, label)
+            queued = await self._action_queue.add(
+                actions, mode, label, priority=priority
+            )
             return await queued
         return await self._execute_action_group_direct(actions, mode, label)
 
+    async def _execute_scheduled_actions(
+        self,
+        actions: list[Action],
+        mode: ExecutionMode | None,
+        label: str | None,
+    ) -> str:
+        """Execute actions fired by the scheduler, on the queue's bulk lane."""
+        return await self.execute_action_group(
+            actions=actions, mode=mode, label=label, priority=QueuePriority.BULK
+        )
+
+    def _validate_actions(self, actions: list[Action]) -> None:
+        """Validate commands against the cached devices, if validation is enabled.
+
+        Raises:
+            InvalidCommandError: A command is unknown to its device, has too
+                many parameters or a value outside its UI profile range.
+        """
+        if self._validator is None:
+            return
+        # get_setup()/get_devices() replace the device list on refresh.
+        if self._validated_devices is not self.devices:
+            self._validator.set_devices(self.devices)
+            self._validated_devices = self.devices
+        self._validator.validate(actions)
+
     async def flush_action_queue(self) -> None:
         """Force flush all pending actions in the queue immediately.
 
@@ -655,16 +1022,82 @@ class OverkizClient:
             return self._action_queue.get_pending_count()
         return 0
 
+    def get_action_queue_stats(self) -> dict[str, Any] | None:
+        """Get a snapshot of the action queue batching metrics.
+
+        See `ActionQueue.get_stats()`. Returns None if the action queue is
+        disabled.
+        """
+        if self._action_queue:
+            return self._action_queue.get_stats()
+        return None
+
+    def get_action_queue_delay(self) -> float | None:
+        """Get the batching window, in seconds, currently used by the action queue.
+
+        With ``ActionQueueSettings.adaptive_delay`` enabled this is the window
+        chosen for the latest bulk batch. Returns None if the action queue is
+        disabled.
+        """
+        if self._action_queue:
+            return self._action_queue.get_current_delay()
+        return None
+
     @retry_on_auth_error
     async def cancel_execution(self, exec_id: str) -> None:
         """Cancel a running execution by its exec_id."""
         await self._delete(f"exec/current/setup/{exec_id}")
+        if self._execution_slots:
+            self._execution_slots.release(exec_id)
+
+    async def get_action_groups(
+        self, refresh: bool = False
+    ) -> list[PersistedActionGroup]:
+        """List action groups persisted on the server.
+
+        With `OverkizClientSettings.action_groups` set, the listing is cached
+        until its TTL expires or an action group event invalidates it; pass
+        `refresh=True` to bypass the cache.
+        """
+        return (await self._get_action_group_registry(refresh)).action_groups
+
+    async def get_action_group(self, oid: str) -> PersistedActionGroup | None:
+        """Return the persisted action group with this OID, or None."""
+        return (await self._get_action_group_registry()).get(oid)
+
+    async def get_action_groups_by_label(
+        self, label: str
+    ) -> list[PersistedActionGroup]:
+        """Return the persisted action groups with this label."""
+        return (await self._get_action_group_registry()).get_by_label(label)
+
+    async def get_action_groups_for_device(
+        self, device_url: str
+    ) -> list[PersistedActionGroup]:
+        """Return the persisted action groups with an action on this device."""
+        return (await self._get_action_group_registry()).get_by_device(device_url)
+
+    async def _get_action_group_registry(
+        self, refresh: bool = False
+    ) -> ActionGroupRegistry:
+        """Return the action group index, (re)loading it when needed.
+
+        Without the cache enabled, a one-off index of a fresh listing is built.
+        """
+        registry = self._action_groups
+        if registry is not None and not refresh and not registry.stale:
+            return registry
+
+        action_groups = await self._fetch_action_groups()
+        if registry is None:
+            registry = ActionGroupRegistry()
+        registry.load(action_groups)
+        return registry
 
     @retry_on_auth_error
-    async def get_action_groups(self) -> list[PersistedActionGroup]:
-        """List action groups persisted on the server."""
+    async def _fetch_action_groups(self) -> list[PersistedActionGroup]:
         response = await self._get("actionGroups")
-        return converter.structure(response, list[PersistedActionGroup])
+        return self._structure(response, list[PersistedActionGroup])
 
     @retry_on_auth_error
     async def get_places(self) -> Place:
@@ -677,15 +1110,19 @@ class OverkizClient:
         - `label`: Human-readable name for the place
         - `type`: Numeric identifier for the place type
         - `sub_places`: List of nested places within this location
+
+        The place tree of `get_setup_index()` is replaced with the result.
         """
         response = await self._get("setup/places")
-        return converter.structure(response, Place)
+        place = self._structure(response, Place)
+        if self._setup_index is not None:
+            self._setup_index.load_places(place)
+        return place
 
     @retry_on_auth_error
     async def execute_persisted_action_group(self, oid: str) -> str:
         """Execute a server-side action group by its OID (see ``get_action_groups``)."""
-        response = await self._post(f"exec/{oid}")
-        return cast(str, response["execId"])
+        return await self._start_execution(f"exec/{oid}")
 
     @retry_on_auth_error
     async def schedule_persisted_action_group(self, oid: str, timestamp: int) -> str:
@@ -701,7 +1138,7 @@ class OverkizClient:
         Access scope : Full enduser API access (enduser/*).
         """
         response = await self._get("setup/options")
-        return converter.structure(response, list[Option])
+        return self._structure(response, list[Option])
 
     @retry_on_auth_error
     async def get_setup_option(self, option: str) -> Option | None:
@@ -712,7 +1149,7 @@ class OverkizClient:
         response = await self._get(f"setup/options/{option}")
 
         if response:
-            return converter.structure(response, Option)
+            return self._structure(response, Option)
 
         return None
 
@@ -730,7 +1167,7 @@ class OverkizClient:
         response = await self._get(f"setup/options/{option}/{parameter}")
 
         if response:
-            return converter.structure(response, OptionParameter)
+            return self._structure(response, OptionParameter)
 
         return None
 
@@ -768,7 +1205,7 @@ class OverkizClient:
             }
         """
         response = await self._post("reference/devices/search", payload)
-        return converter.structure(response, DeviceSearchResult)
+        return self._structure(response, DeviceSearchResult)
 
     @retry_on_auth_error
     async def get_reference_protocol_types(self) -> list[ProtocolType]:
@@ -781,7 +1218,7 @@ class OverkizClient:
         - label: Human-readable protocol label
         """
         response = await self._get("reference/protocolTypes")
-        return converter.structure(response, list[ProtocolType])
+        return self._structure(response, list[ProtocolType])
 
     @retry_on_auth_error
     async def get_reference_timezones(self) -> list[dict[str, Any]]:
@@ -811,7 +1248,10 @@ class OverkizClient:
         response = await self._get(
             f"reference/ui/profile/{urllib.parse.quote_plus(profile_name)}"
         )
-        return converter.structure(response, UIProfileDefinition)
+        profile = self._structure(response, UIProfileDefinition)
+        if self._validator:
+            self._validator.add_ui_profile(profile)
+        return profile
 
     @retry_on_auth_error
     async def get_reference_ui_profile_names(self) -> list[str]:
@@ -827,7 +1267,7 @@ class OverkizClient:
     async def get_devices_not_up_to_date(self) -> list[Device]:
         """Get all devices whose firmware is not up to date."""
         response = await self._get("setup/devices/notUpToDate")
-        return converter.structure(response, list[Device])
+        return self._structure(response, list[Device])
 
     @retry_on_auth_error
     async def get_device_firmware_status(
@@ -843,7 +1283,7 @@ class OverkizClient:
             )
         except UnsupportedOperationError:
             return None
-        return converter.structure(response, FirmwareStatus)
+        return self._structure(response, FirmwareStatus)
 
     @retry_on_auth_error
     async def get_device_firmware_update_capability(self, device_url: str) -> bool:
@@ -890,7 +1330,7 @@ class OverkizClient:
         )
         if response is None:
             return None
-        return converter.structure(response, Definition)
+        return self._structure(response, Definition)
 
     @retry_on_auth_error
     async def get_device_alternative_controllables(self, device_url: str) -> list[str]:
@@ -907,7 +1347,7 @@ class OverkizClient:
         response = await self._get(
             f"setup/devices/{urllib.parse.quote_plus(device_url)}/manufacturerReferences"
         )
-        return converter.structure(response, list[DeviceManufacturerReference])
+        return self._structure(response, list[DeviceManufacturerReference])
 
     async def discover_gateways(self) -> list[GatewayCandidate]:
         """Discover selectable gateways.
@@ -970,7 +1410,7 @@ class OverkizClient:
     ) -> list[LocalToken]:
         """Get all active local API tokens for a gateway with a given scope."""
         response = await self._get(f"config/{gateway_id}/local/tokens/{scope}")
-        return converter.structure(response, list[LocalToken])
+        return self._structure(response, list[LocalToken])
 
     @retry_on_auth_error
     async def delete_local_token(self, gateway_id: str, uuid: str) -> None:
@@ -1010,7 +1450,7 @@ class OverkizClient:
     async def get_developer_mode(self, gateway_id: str) -> DeveloperMode:
         """Get the developer mode status for a gateway."""
         response = await self._get(f"setup/gateways/{gateway_id}/developerMode")
-        return converter.structure(response, DeveloperMode)
+        return self._structure(response, DeveloperMode)
 
     @retry_on_auth_error
     async def deactivate_developer_mode(self, gateway_id: str) -> None:
@@ -1027,14 +1467,7 @@ class OverkizClient:
     @retry_on_connection_failure
     async def _get(self, path: str) -> Any:
         """Make a GET request to the OverKiz API."""
-        await self._refresh_token_if_expired()
-
-        async with self.session.get(
-            f"{self._auth.endpoint}{path}",
-            headers=await self._auth.auth_headers(path),
-            ssl=self._ssl,
-        ) as response:
-            return await self._parse_response(response)
+        return await self._send("GET", path)
 
     @retry_on_connection_failure
     async def _post(
@@ -1044,53 +1477,217 @@ class OverkizClient:
         data: dict[str, Any] | None = None,
     ) -> Any:
         """Make a POST request to the OverKiz API."""
-        await self._refresh_token_if_expired()
-
-        async with self.session.post(
-            f"{self._auth.endpoint}{path}",
-            data=data,
-            json=payload,
-            headers=await self._auth.auth_headers(path),
-            ssl=self._ssl,
-        ) as response:
-            return await self._parse_response(response)
+        return await self._send("POST", path, data=data, json=payload)
 
     @retry_on_connection_failure
     async def _put(self, path: str, payload: dict[str, Any] | None = None) -> Any:
         """Make a PUT request to the OverKiz API."""
-        await self._refresh_token_if_expired()
-
-        async with self.session.put(
-            f"{self._auth.endpoint}{path}",
-            json=payload,
-            headers=await self._auth.auth_headers(path),
-            ssl=self._ssl,
-        ) as response:
-            return await self._parse_response(response)
+        return await self._send("PUT", path, json=payload)
 
     @retry_on_connection_failure
     async def _delete(self, path: str) -> None:
         """Make a DELETE request to the OverKiz API."""
+        await self._send("DELETE", path, parse_json=False)
+
+    async def _send(
+        self, method: str, path: str, *, parse_json: bool = True, **kwargs: Any
+    ) -> Any:
+        """Send a request and return its parsed response.
+
+        Failures without an Overkiz error response (connection errors,
+        timeouts, unreadable bodies) are reported to the instrumentation here;
+        `_parse_response()` reports the others.
+        """
+        headers = await self._request_headers(path)
+        request = getattr(self.session, method.lower())
+
+        started = time.perf_counter()
+        try:
+            async with request(
+                f"{self._auth.endpoint}{path}",
+                headers=headers,
+                ssl=self._ssl,
+                **kwargs,
+            ) as response:
+                return await self._parse_response(
+                    response, method, path, started, parse_json=parse_json
+                )
+        except BaseOverkizError:
+            raise
+        except Exception as err:
+            instrumentation = self.settings.instrumentation
+            if instrumentation is not None:
+                instrumentation.record_request(
+                    RequestSample(
+                        method=method,
+                        endpoint=endpoint_template(path),
+                        duration=time.perf_counter() - started,
+                        error=type(err).__name__,
+                    )
+                )
+            raise
+
+    async def _request_headers(self, path: str) -> Mapping[str, str]:
+        """Wait for the rate limiter, then return the auth headers for *path*.
+
+        The limiter is awaited first, so a token that expires while waiting is
+        refreshed before the headers are read.
+        """
+        if self.settings.rate_limiter is not None:
+            await self.settings.rate_limiter.acquire()
         await self._refresh_token_if_expired()
+        headers = self._cached_auth_headers()
+        if headers is None:
+            headers = await self._auth.auth_headers(path)
+        return headers
 
-        async with self.session.delete(
-            f"{self._auth.endpoint}{path}",
-            headers=await self._auth.auth_headers(path),
-            ssl=self._ssl,
-        ) as response:
-            await check_response(response)
+    def _cached_auth_headers(self) -> Mapping[str, str] | None:
+        """Return the strategy's precomputed auth headers, or None to await them."""
+        source = self._header_source
+        return source.cached_auth_headers() if source is not None else None
 
-    @staticmethod
-    async def _parse_response(response: ClientResponse) -> Any:
+    async def _parse_response(
+        self,
+        response: ClientResponse,
+        method: str,
+        path: str,
+        started: float,
+        *,
+        parse_json: bool = True,
+    ) -> Any:
         """Check response status and parse JSON body (returns None for 204)."""
-        await check_response(response)
-        if response.status == HTTPStatus.NO_CONTENT:
-            return None
-        return await response.json()
+        instrumentation = self.settings.instrumentation
+        if instrumentation is None:
+            await check_response(response)
+            if not parse_json or response.status == HTTPStatus.NO_CONTENT:
+                return None
+            return await response.json()
+
+        # Read the body first to count the bytes actually received: the
+        # Content-Length header is missing from chunked and compressed replies.
+        # Failures to read it are reported by `_send()`.
+        response_bytes = len(await response.read())
+        error: str | None = None
+        try:
+            await check_response(response)
+            if not parse_json or response.status == HTTPStatus.NO_CONTENT:
+                return None
+            return await response.json()
+        except BaseOverkizError as err:
+            error = type(err).__name__
+            raise
+        finally:
+            instrumentation.record_request(
+                RequestSample(
+                    method=method,
+                    endpoint=endpoint_template(path),
+                    duration=time.perf_counter() - started,
+                    status=response.status,
+                    response_bytes=response_bytes,
+                    error=error,
+                )
+            )
+
+    def _structure[T](self, payload: Any, cls: type[T]) -> T:
+        """Structure a response payload into models, timing it when instrumented."""
+        instrumentation = self.settings.instrumentation
+        if instrumentation is None:
+            return converter.structure(payload, cls)
+
+        started = time.perf_counter()
+        result = converter.structure(payload, cls)
+        instrumentation.record_structure(
+            StructureSample(
+                type_name=type_label(cls),
+                duration=time.perf_counter() - started,
+            )
+        )
+        return result
 
     async def _refresh_token_if_expired(self) -> None:
-        """Check if token is expired and request a new one."""
-        refreshed = await self._auth.refresh_if_needed()
+        """Check if token is expired and request a new one.
+
+        Requests only wait for a refresh when the token is expired: a
+        background refresh started ahead of expiry does not hold back requests
+        sent with the still valid token. Concurrent callers of an expired token
+        share a single refresh, including the listener re-registration.
+        """
+        refresher = self._token_refresher
+        if refresher is None:
+            # Other strategies decide in refresh_if_needed() on every request.
+            await self._run_token_refresh(self._auth.refresh_if_needed, "refresh")
+            return
+
+        if not refresher.context.is_expired():
+            return
+        if self._token_refresh is asyncio.current_task():
+            # A request made by the refresh itself (listener re-registration).
+            return
+        await self._refresh_token(self._auth.refresh_if_needed, kind="refresh")
+
+    async def _refresh_token(
+        self, refresh: Callable[[], Awaitable[bool]], *, kind: str
+    ) -> bool:
+        """Run *refresh* once for all concurrent callers; return True if refreshed."""
+        if self._token_refresh is None:
+            self._token_refresh = asyncio.create_task(
+                self._run_token_refresh(refresh, kind)
+            )
+        return await asyncio.shield(self._token_refresh)
 
-        if refreshed and self.event_listener_id:
-            await self.register_event_listener()
+    async def _run_token_refresh(
+        self, refresh: Callable[[], Awaitable[bool]], kind: str
+    ) -> bool:
+        """Refresh the token, re-register the listener and reschedule the timer."""
+        try:
+            instrumentation = self.settings.instrumentation
+            started = time.perf_counter() if instrumentation is not None else 0.0
+            refreshed = await refresh()
+
+            if refreshed and instrumentation is not None:
+                instrumentation.record_auth_refresh(
+                    AuthRefreshSample(kind=kind, duration=time.perf_counter() - started)
+                )
+
+            if refreshed:
+                await self.save_session()
+            if refreshed and self.event_listener_id:
+                await self.register_event_listener()
+        finally:
+            self._token_refresh = None
+
+        if refreshed:
+            self._schedule_token_refresh()
+        return refreshed
+
+    def _schedule_token_refresh(self) -> None:
+        """(Re)start the background refresh ahead of the token expiry, if enabled."""
+        if self._token_refresh_timer is not None:
+            self._token_refresh_timer.cancel()
+            self._token_refresh_timer = None
+
+        margin = self.settings.token_refresh_margin
+        refresher = self._token_refresher
+        if margin is None or refresher is None:
+            return
+        expires_at = refresher.context.expires_at
+        if expires_at is None or not refresher.context.refresh_token:
+            return
+
+        remaining = (expires_at - dt.datetime.now(dt.UTC)).total_seconds()
+        # Refresh `margin` seconds ahead, but never in the first half of the
+        # token lifetime, so a short-lived token does not refresh in a loop.
+        delay = max(remaining - margin, remaining / 2, 0.0)
+        self._token_refresh_timer = asyncio.create_task(
+            self._refresh_token_later(refresher, delay)
+        )
+
+    async def _refresh_token_later(
+        self, refresher: SupportsTokenRefresh, delay: float
+    ) -> None:
+        await asyncio.sleep(delay)
+        try:
+            await self._refresh_token(refresher.refresh, kind="background")
+        except Exception as err:  # noqa: BLE001
+            # Requests fall back to refreshing (or logging in again) inline.
+            _LOGGER.warning("Background token refresh failed: %r", err)
@@ -0,0 +1,463 @@
+"""Pool of clients for many accounts sharing transport, polling and rate budgets.
+
+Running one `OverkizClient` per account duplicates a connection pool, a DNS
+cache and a polling loop for every account. `OverkizClientPool` holds the
+accounts of one process instead:
+
+- clients of the same endpoint share one connector, and with it the
+  keep-alive connections and the DNS cache; each client keeps its own
+  `ClientSession`, so session cookies never leak between accounts;
+- clients are created and logged in on first use, and closed again after
+  ``idle_timeout`` seconds without use;
+- one scheduler task polls the event listeners of all listening accounts,
+  earliest deadline first, with at most ``poll_concurrency`` fetches in
+  flight; an account is polled again ``poll_interval`` seconds after its
+  previous poll finished, so a slow account never delays the others;
+- every request of a client draws from the budget shared by the pool and
+  from the budget of its account.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import dataclasses
+import heapq
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Self
+
+from aiohttp import ClientSession, TCPConnector
+from yarl import URL
+
+from pyoverkiz.auth.credentials import Credentials
+from pyoverkiz.client import DEFAULT_TIMEOUT, OverkizClient, OverkizClientSettings
+from pyoverkiz.const import USER_AGENT
+from pyoverkiz.enums import Server
+from pyoverkiz.models import Event, ServerConfig
+from pyoverkiz.rate_budget import CombinedRateBudget, RateBudget, RateLimiter
+from pyoverkiz.utils import normalize_server
+
+_LOGGER = logging.getLogger(__name__)
+
+EventCallback = Callable[[str, list[Event]], Awaitable[None]]
+
+# Consecutive failures after which the poll backoff stops doubling.
+_MAX_BACKOFF_EXPONENT = 16
+
+
+@dataclass(frozen=True, slots=True)
+class ClientPoolSettings:
+    """Settings of an `OverkizClientPool`.
+
+    ``max_requests_per_second`` caps the requests of all accounts together and
+    ``account_requests_per_second`` those of each account; None disables the
+    cap. ``poll_interval`` defaults to the per-session rate limit of the event
+    fetch endpoint. Failed polls are retried with an exponential backoff up to
+    ``max_poll_backoff`` seconds. ``idle_timeout`` of None keeps clients until
+    the pool is closed.
+    """
+
+    connection_limit: int = 100
+    connection_limit_per_host: int = 0
+    dns_cache_ttl: int | None = 300
+    max_requests_per_second: float | None = None
+    account_requests_per_second: float | None = None
+    poll_interval: float = 1.0
+    poll_concurrency: int = 10
+    max_poll_backoff: float = 60.0
+    idle_timeout: float | None = 900.0
+
+    def validate(self) -> None:
+        """Validate configuration values for the client pool."""
+        if self.connection_limit < 0:
+            raise ValueError(
+                f"connection_limit must not be negative, got {self.connection_limit!r}"
+            )
+        if self.connection_limit_per_host < 0:
+            raise ValueError(
+                "connection_limit_per_host must not be negative, "
+                f"got {self.connection_limit_per_host!r}"
+            )
+        for name in ("max_requests_per_second", "account_requests_per_second"):
+            value = getattr(self, name)
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive, got {value!r}")
+        if self.poll_interval <= 0:
+            raise ValueError(
+                f"poll_interval must be positive, got {self.poll_interval!r}"
+            )
+        if self.poll_concurrency < 1:
+            raise ValueError(
+                f"poll_concurrency must be at least 1, got {self.poll_concurrency!r}"
+            )
+        if self.max_poll_backoff < self.poll_interval:
+            raise ValueError(
+                "max_poll_backoff must be at least poll_interval, "
+                f"got {self.max_poll_backoff!r}"
+            )
+        if self.idle_timeout is not None and self.idle_timeout <= 0:
+            raise ValueError(
+                f"idle_timeout must be positive, got {self.idle_timeout!r}"
+            )
+
+
+@dataclass(slots=True, eq=False)
+class _Account:
+    """An account of the pool and its client, if logged in."""
+
+    key: str
+    server: ServerConfig
+    credentials: Credentials
+    verify_ssl: bool
+    settings: OverkizClientSettings
+    client: OverkizClient | None = None
+    login: asyncio.Task[OverkizClient] | None = None
+    last_used: float = field(default_factory=time.monotonic)
+    in_use: int = 0
+    callback: EventCallback | None = None
+    # Matches the scheduler entry polling this account; older entries are stale.
+    poll_entry: int | None = None
+    poll_failures: int = 0
+
+
+class OverkizClientPool:
+    """Clients for many accounts, created lazily and polled by one scheduler."""
+
+    def __init__(self, settings: ClientPoolSettings | None = None) -> None:
+        """Create an empty pool; no connection is opened before first use."""
+        self.settings = settings or ClientPoolSettings()
+        self.settings.validate()
+        self._accounts: dict[str, _Account] = {}
+        self._connectors: dict[str, TCPConnector] = {}
+        self._budget = (
+            RateBudget(self.settings.max_requests_per_second)
+            if self.settings.max_requests_per_second is not None
+            else None
+        )
+        self._account_budgets: dict[str, RateBudget] = {}
+        # Poll deadlines as (due, entry, account), earliest first.
+        self._schedule: list[tuple[float, int, _Account]] = []
+        self._entries = 0
+        self._polls: set[asyncio.Task[None]] = set()
+        self._poll_slots = asyncio.Semaphore(self.settings.poll_concurrency)
+        self._wake = asyncio.Event()
+        self._runner: asyncio.Task[None] | None = None
+        self._last_eviction = time.monotonic()
+        self._closed = False
+
+    async def __aenter__(self) -> Self:
+        """Enter async context manager and return the pool."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Exit the async context manager and close the pool."""
+        await self.close()
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether an account is registered under *key*."""
+        return key in self._accounts
+
+    def __len__(self) -> int:
+        """Return the number of registered accounts."""
+        return len(self._accounts)
+
+    @property
+    def active_clients(self) -> int:
+        """Return the number of accounts with a logged-in client."""
+        return sum(account.client is not None for account in self._accounts.values())
+
+    def add_account(
+        self,
+        key: str,
+        *,
+        server: ServerConfig | Server | str,
+        credentials: Credentials,
+        verify_ssl: bool = True,
+        settings: OverkizClientSettings | None = None,
+    ) -> None:
+        """Register an account under *key*; it logs in on first use.
+
+        The pool sets ``rate_limiter`` in the client *settings* when it
+        enforces request budgets. With a ``session_store`` and no
+        ``session_account``, the account key identifies the account in the
+        store, so accounts sharing a store never restore each other's session.
+
+        Raises:
+            ValueError: When an account is already registered under *key*.
+        """
+        if key in self._accounts:
+            raise ValueError(f"Account {key!r} is already registered")
+        settings = settings or OverkizClientSettings()
+        limiter = self._rate_limiter(key)
+        if limiter is not None:
+            settings = dataclasses.replace(settings, rate_limiter=limiter)
+        if settings.session_store is not None and settings.session_account is None:
+            settings = dataclasses.replace(settings, session_account=key)
+        self._accounts[key] = _Account(
+            key=key,
+            server=normalize_server(server),
+            credentials=credentials,
+            verify_ssl=verify_ssl,
+            settings=settings,
+        )
+
+    async def remove_account(self, key: str) -> None:
+        """Close the client of an account and forget the account."""
+        account = self._accounts.pop(key, None)
+        if account is None:
+            return
+        self._account_budgets.pop(key, None)
+        account.callback = None
+        account.poll_entry = None
+        await self._close_account(account)
+
+    async def client(self, key: str) -> OverkizClient:
+        """Return the client of an account, logging in on first use.
+
+        Concurrent callers share one login. Prefer `acquire()` when holding
+        the client across awaits, so idle eviction cannot close it meanwhile.
+
+        Raises:
+            KeyError: When no account is registered under *key*.
+        """
+        account = self._accounts[key]
+        account.last_used = time.monotonic()
+        if account.client is not None:
+            return account.client
+        self._ensure_runner()
+        if account.login is None:
+            account.login = asyncio.create_task(self._login(account))
+        return await asyncio.shield(account.login)
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, key: str) -> AsyncIterator[OverkizClient]:
+        """Hold the client of an account; it is not evicted while held."""
+        account = self._accounts[key]
+        account.in_use += 1
+        try:
+            yield await self.client(key)
+        finally:
+            account.in_use -= 1
+            account.last_used = time.monotonic()
+
+    def listen(self, key: str, callback: EventCallback) -> None:
+        """Poll the events of an account and pass each non-empty batch to *callback*.
+
+        The callback receives the account key and the events. The account
+        logs in with its first poll, and is not evicted while listening.
+
+        Raises:
+            KeyError: When no account is registered under *key*.
+        """
+        account = self._accounts[key]
+        account.callback = callback
+        if account.poll_entry is None:
+            self._schedule_poll(account, time.monotonic())
+        self._ensure_runner()
+
+    async def unlisten(self, key: str) -> None:
+        """Stop polling an account and unregister its event listener."""
+        account = self._accounts.get(key)
+        if account is None or account.callback is None:
+            return
+        account.callback = None
+        account.poll_entry = None
+        account.last_used = time.monotonic()
+        client = account.client
+        if client is not None and client.event_listener_id is not None:
+            try:
+                await client.unregister_event_listener()
+            except Exception as err:  # noqa: BLE001
+                _LOGGER.warning("Failed to unregister the listener of %s: %s", key, err)
+
+    async def evict_idle(self) -> int:
+        """Close the clients unused for ``idle_timeout`` and return their count.
+
+        Listening and held clients are kept. Evicted accounts stay registered
+        and log in again on next use. Called periodically by the pool.
+        """
+        timeout = self.settings.idle_timeout
+        self._last_eviction = now = time.monotonic()
+        if timeout is None:
+            return 0
+        idle = [
+            account
+            for account in self._accounts.values()
+            if account.client is not None
+            and account.callback is None
+            and account.in_use == 0
+            and now - account.last_used >= timeout
+        ]
+        for account in idle:
+            await self._close_account(account)
+        if idle:
+            _LOGGER.debug("Evicted %d idle clients", len(idle))
+        return len(idle)
+
+    async def close(self) -> None:
+        """Stop polling, close every client and the shared connectors."""
+        self._closed = True
+        tasks = [*self._polls]
+        if self._runner is not None:
+            tasks.append(self._runner)
+            self._runner = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._schedule.clear()
+        for account in self._accounts.values():
+            account.callback = None
+            account.poll_entry = None
+        await asyncio.gather(
+            *(self._close_account(account) for account in self._accounts.values()),
+            return_exceptions=True,
+        )
+        connectors = list(self._connectors.values())
+        self._connectors.clear()
+        await asyncio.gather(
+            *(connector.close() for connector in connectors), return_exceptions=True
+        )
+
+    def _rate_limiter(self, key: str) -> RateLimiter | None:
+        budgets = [self._budget] if self._budget is not None else []
+        if self.settings.account_requests_per_second is not None:
+            budget = RateBudget(self.settings.account_requests_per_second)
+            self._account_budgets[key] = budget
+            budgets.append(budget)
+        if len(budgets) > 1:
+            return CombinedRateBudget(budgets)
+        return budgets[0] if budgets else None
+
+    def _connector(self, server: ServerConfig) -> TCPConnector:
+        """Return the connector shared by the clients of an endpoint."""
+        origin = str(URL(server.endpoint).origin())
+        connector = self._connectors.get(origin)
+        if connector is None or connector.closed:
+            connector = self._connectors[origin] = TCPConnector(
+                limit=self.settings.connection_limit,
+                limit_per_host=self.settings.connection_limit_per_host,
+                use_dns_cache=self.settings.dns_cache_ttl is not None,
+                ttl_dns_cache=self.settings.dns_cache_ttl,
+            )
+        return connector
+
+    async def _login(self, account: _Account) -> OverkizClient:
+        if self._closed:
+            raise RuntimeError("The client pool is closed")
+        session = ClientSession(
+            connector=self._connector(account.server),
+            connector_owner=False,
+            headers={"User-Agent": USER_AGENT},
+            timeout=DEFAULT_TIMEOUT,
+        )
+        client = OverkizClient(
+            server=account.server,
+            credentials=account.credentials,
+            verify_ssl=account.verify_ssl,
+            session=session,
+            settings=account.settings,
+        )
+        try:
+            await client.login(register_event_listener=account.callback is not None)
+        except BaseException:
+            await client.close()
+            raise
+        finally:
+            account.login = None
+        account.client = client
+        return client
+
+    async def _close_account(self, account: _Account) -> None:
+        if account.login is not None:
+            account.login.cancel()
+            account.login = None
+        client, account.client = account.client, None
+        if client is None:
+            return
+        try:
+            await client.close()
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.warning("Failed to close the client of %s: %s", account.key, err)
+
+    def _ensure_runner(self) -> None:
+        if self._runner is None and not self._closed:
+            self._runner = asyncio.create_task(self._run())
+
+    def _schedule_poll(self, account: _Account, due: float) -> None:
+        self._entries += 1
+        account.poll_entry = self._entries
+        heapq.heappush(self._schedule, (due, self._entries, account))
+        self._wake.set()
+
+    async def _run(self) -> None:
+        """Start due polls in deadline order and evict idle clients."""
+        idle_timeout = self.settings.idle_timeout
+        while True:
+            now = time.monotonic()
+            if (
+                idle_timeout is not None
+                and now - self._last_eviction >= idle_timeout / 2
+            ):
+                await self.evict_idle()
+            while self._schedule and self._schedule[0][0] <= now:
+                _, entry, account = heapq.heappop(self._schedule)
+                if account.poll_entry != entry:
+                    continue
+                # Waiting here keeps later deadlines behind earlier ones.
+                await self._poll_slots.acquire()
+                task = asyncio.create_task(self._poll(account))
+                self._polls.add(task)
+                task.add_done_callback(self._polls.discard)
+
+            deadlines = []
+            if self._schedule:
+                deadlines.append(self._schedule[0][0])
+            if idle_timeout is not None:
+                deadlines.append(self._last_eviction + idle_timeout / 2)
+            self._wake.clear()
+            timeout = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout)
+
+    async def _poll(self, account: _Account) -> None:
+        entry = account.poll_entry
+        events: list[Event] = []
+        try:
+            client = await self.client(account.key)
+            if client.event_listener_id is None:
+                await client.register_event_listener()
+            events = await client.fetch_events()
+            account.poll_failures = 0
+        except Exception as err:  # noqa: BLE001
+            account.poll_failures += 1
+            _LOGGER.warning("Failed to fetch events of %s: %s", account.key, err)
+        finally:
+            self._poll_slots.release()
+
+        callback = account.callback
+        if events and callback is not None:
+            try:
+                await callback(account.key, events)
+            except Exception:
+                _LOGGER.exception("Event callback of %s failed", account.key)
+
+        # Skip rescheduling when the account stopped listening meanwhile.
+        if account.poll_entry == entry and account.callback is not None:
+            self._schedule_poll(account, time.monotonic() + self._poll_delay(account))
+
+    def _poll_delay(self, account: _Account) -> float:
+        """Return the delay before the next poll, backing off after failures."""
+        # The exponent is capped so long failure streaks cannot overflow.
+        exponent = min(account.poll_failures, _MAX_BACKOFF_EXPONENT)
+        return min(
+            self.settings.poll_interval * 2**exponent, self.settings.max_poll_backoff
+        )
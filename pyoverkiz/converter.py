@@ -4,13 +4,14 @@ from __future__ import annotations
 
 import logging
 import types
+from collections.abc import Callable
 from enum import Enum
 from typing import Any, Union, get_args, get_origin
 
 import attr
 import cattrs
 from cattrs.errors import ClassValidationError
-from cattrs.gen import make_dict_structure_fn, override
+from cattrs.gen import make_dict_structure_fn, make_dict_unstructure_fn, override
 
 from pyoverkiz._case import camelize_key
 from pyoverkiz.enums import EventName, GatewaySubType
@@ -21,27 +22,37 @@ from pyoverkiz.models import (
     CommandDefinitions,
     Device,
     Event,
+    Feature,
     State,
     StateDefinition,
     StateDefinitions,
     States,
+    Zone,
+    ZoneItem,
 )
 from pyoverkiz.obfuscate import obfuscate_id
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _contains_attrs(t: Any) -> bool:
+    """True if *t* is an attrs class or a generic over one (e.g. list[Zone])."""
+    if isinstance(t, type) and attr.has(t):
+        return True
+    return any(_contains_attrs(arg) for arg in get_args(t))
+
+
 def _is_primitive_union(t: Any) -> bool:
     """True for unions of JSON-native types (e.g. StateType).
 
-    Excludes unions containing attrs classes (e.g. Definition | None) since those
-    need actual structuring by cattrs.
+    Excludes unions containing attrs classes (e.g. Definition | None or
+    list[Zone] | None) since those need actual structuring by cattrs.
     """
     origin = get_origin(t)
     if origin is not Union and not isinstance(t, types.UnionType):
         return False
     non_none = [arg for arg in get_args(t) if arg is not type(None)]
-    if any(isinstance(arg, type) and attr.has(arg) for arg in non_none):
+    if any(_contains_attrs(arg) for arg in non_none):
         return False
     return not all(isinstance(arg, type) and issubclass(arg, Enum) for arg in non_none)
 
@@ -60,6 +71,52 @@ def _rename_hook_factory(cls: type, converter: cattrs.Converter) -> Any:
     return make_dict_structure_fn(cls, converter, **overrides)  # type: ignore[arg-type]  # ty: ignore[invalid-argument-type]
 
 
+def _unrename_hook_factory(cls: type, converter: cattrs.Converter) -> Any:
+    """Generate an unstructuring hook that emits the camelCase API keys.
+
+    Computed fields (``init=False``) are left out; they are derived again when
+    the payload is structured.
+    """
+    overrides = {}
+    for f in attr.fields(cls):
+        if not f.init:
+            overrides[f.name] = override(omit=True)
+            continue
+        if f.name.startswith("_") or (f.alias and f.alias != f.name):
+            continue
+        api_key = camelize_key(f.name)
+        if api_key != f.name:
+            overrides[f.name] = override(rename=api_key)
+    return make_dict_unstructure_fn(cls, converter, **overrides)  # type: ignore[arg-type]  # ty: ignore[invalid-argument-type]
+
+
+def _skip_incomplete_hooks(
+    converter: cattrs.Converter, item_type: type
+) -> tuple[Callable[[Any], bool], Callable[[Any, Any], list[Any]]]:
+    """Generate a predicate and hook structuring ``list[item_type]``.
+
+    Items that cannot be structured are skipped with a warning.
+    """
+    list_type = types.GenericAlias(list, (item_type,))
+
+    def _structure(val: Any, _: Any) -> list[Any]:
+        if not val:
+            return []
+        items: list[Any] = []
+        for raw in val:
+            try:
+                items.append(converter.structure(raw, item_type))
+            except (ClassValidationError, ValueError, TypeError) as err:
+                _LOGGER.warning(
+                    "Skipping %s: incomplete data from hub (%s)",
+                    item_type.__name__,
+                    err,
+                )
+        return items
+
+    return (lambda t: t == list_type), _structure
+
+
 def _make_converter() -> cattrs.Converter:
     # Converter (not GenConverter) so unknown API keys are silently dropped for forward-compat.
     c = cattrs.Converter()
@@ -112,6 +169,22 @@ def _make_converter() -> cattrs.Converter:
         _rename_hook_factory,
     )
 
+    # Unstructuring mirrors the hooks above, so that
+    # converter.structure(converter.unstructure(obj), type(obj)) round-trips:
+    # the containers become the list they were built from (their __reduce__
+    # arguments) and attrs classes use the API's camelCase keys.
+    def _unstructure_container(
+        val: States | CommandDefinitions | StateDefinitions,
+    ) -> list[Any]:
+        return [c.unstructure(item) for item in val.__reduce__()[1][0]]
+
+    for container in skip:
+        c.register_unstructure_hook(container, _unstructure_container)
+    c.register_unstructure_hook_factory(
+        lambda t: isinstance(t, type) and attr.has(t) and t not in skip,
+        _unrename_hook_factory,
+    )
+
     # Event is a discriminated union keyed on "name". Pre-build each subtype's
     # hook and call it directly; routing via c.structure(val, subtype) would
     # re-enter this hook (subclass dispatches to its base) and recurse forever.
@@ -178,6 +251,11 @@ def _make_converter() -> cattrs.Converter:
 
     c.register_structure_hook_func(lambda t: t == list[Device], _structure_device_list)
 
+    # Zones and features are optional setup details: drop the entries missing
+    # a required field rather than failing the whole setup.
+    for item_type in (Zone, ZoneItem, Feature):
+        c.register_structure_hook_func(*_skip_incomplete_hooks(c, item_type))
+
     return c
 
 
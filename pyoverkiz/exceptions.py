@@ -137,6 +137,10 @@ class NoOverkizUserError(ResourceAccessDeniedError):
     """
 
 
+class InvalidSnapshotError(BaseOverkizError):
+    """Raised when a setup snapshot is corrupt or was written by an incompatible version."""
+
+
 # Nexity
 class NexityBadCredentialsError(BadCredentialsError):
     """Raised when invalid credentials are provided to Nexity authentication API."""
@@ -0,0 +1,241 @@
+"""Local scheduler limiting the number of concurrent executions.
+
+The Overkiz server rejects new action groups with `TooManyExecutionsError` or
+`ExecutionQueueFullError` once too many executions are running. Instead of
+learning about the limit through these errors (and the jittered retries that
+follow), the client can track its in-flight executions locally and hold new
+action groups in a FIFO queue until a slot frees up.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from pyoverkiz.enums import ExecutionState
+from pyoverkiz.models import (
+    Event,
+    Execution,
+    ExecutionRegisteredEvent,
+    ExecutionStateChangedEvent,
+)
+
+# Execution states after which an execution no longer occupies a slot.
+TERMINAL_EXECUTION_STATES = frozenset({ExecutionState.COMPLETED, ExecutionState.FAILED})
+
+# Number of untracked exec_ids remembered as finished, for executions whose
+# terminal event is fetched before `register()` runs.
+_FINISHED_HISTORY = 256
+
+
+@dataclass(frozen=True, slots=True)
+class ExecutionSlotSettings:
+    """Settings for the local execution-slot scheduler.
+
+    ``max_executions`` is the number of executions allowed to run at once.
+    ``slot_timeout`` releases a slot whose execution was never seen finishing
+    (for example when no event listener is polled), in seconds.
+    """
+
+    max_executions: int = 10
+    slot_timeout: float = 300.0
+
+    def validate(self) -> None:
+        """Validate configuration values for the scheduler."""
+        if self.max_executions < 1:
+            raise ValueError(
+                f"max_executions must be at least 1, got {self.max_executions!r}"
+            )
+        if self.slot_timeout <= 0:
+            raise ValueError(
+                f"slot_timeout must be positive, got {self.slot_timeout!r}"
+            )
+
+
+class ExecutionSlots:
+    """Tracks in-flight executions and hands out execution slots in FIFO order.
+
+    A caller reserves a slot with `acquire()` before starting an execution, then
+    either `register()`s the resulting exec_id or gives the slot back with
+    `release_reservation()` if the request failed. Registered executions hold
+    their slot until they reach a terminal state, which is observed through
+    `ExecutionStateChangedEvent`s (`observe_events()`), a
+    `get_current_executions()` listing (`reconcile()`), an explicit `release()`,
+    or the slot timeout.
+
+    Executions started by other clients of the same account are adopted from
+    `ExecutionRegisteredEvent`s and listings, since they count towards the same
+    server-side limit.
+    """
+
+    def __init__(self, settings: ExecutionSlotSettings | None = None) -> None:
+        """Create a scheduler with the given settings (uses defaults if None)."""
+        self._settings = settings or ExecutionSlotSettings()
+        # exec_id -> loop time at which the execution was first seen.
+        self._in_flight: dict[str, float] = {}
+        # Slots handed out by acquire() that have no exec_id yet.
+        self._reserved = 0
+        # Untracked exec_ids seen finishing, oldest first (used as an ordered set).
+        self._finished: OrderedDict[str, None] = OrderedDict()
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._expiry: asyncio.TimerHandle | None = None
+        self._closed = False
+
+    @property
+    def in_flight(self) -> frozenset[str]:
+        """Return the exec_ids currently occupying a slot."""
+        return frozenset(self._in_flight)
+
+    @property
+    def waiting(self) -> int:
+        """Return the number of callers waiting for a slot."""
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    @property
+    def available(self) -> int:
+        """Return the number of free slots."""
+        return max(
+            self._settings.max_executions - len(self._in_flight) - self._reserved, 0
+        )
+
+    async def acquire(self) -> None:
+        """Wait for a free slot and reserve it.
+
+        Callers are served in arrival order. The reservation must be followed
+        by `register()` or `release_reservation()`.
+        """
+        if self._closed:
+            return
+        if not self._waiters and self.available:
+            self._reserved += 1
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # A slot was handed over as we were cancelled; pass it on.
+                self.release_reservation()
+            else:
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove(future)
+            raise
+
+    def release_reservation(self) -> None:
+        """Give back a slot reserved by `acquire()` that was not used."""
+        if self._closed:
+            return
+        self._reserved = max(self._reserved - 1, 0)
+        self._wake()
+
+    def register(self, exec_id: str) -> None:
+        """Turn a reservation into an in-flight execution identified by *exec_id*."""
+        if self._closed:
+            return
+        self._reserved = max(self._reserved - 1, 0)
+        # The execution may already have finished, or been adopted from an event.
+        self._track(exec_id)
+        self._wake()
+
+    def release(self, exec_id: str) -> None:
+        """Free the slot held by *exec_id*.
+
+        The exec_id is remembered as finished, so a `register()` arriving
+        later, after the execution was adopted from its registered event and
+        released again, or for a fast execution never tracked, does not take
+        the slot back.
+        """
+        self._finished[exec_id] = None
+        self._finished.move_to_end(exec_id)
+        if len(self._finished) > _FINISHED_HISTORY:
+            self._finished.popitem(last=False)
+        if self._in_flight.pop(exec_id, None) is not None:
+            self._schedule_expiry()
+            self._wake()
+
+    def observe_events(self, events: Iterable[Event]) -> None:
+        """Update the in-flight executions from fetched events."""
+        for event in events:
+            if isinstance(event, ExecutionStateChangedEvent):
+                if event.new_state in TERMINAL_EXECUTION_STATES:
+                    self.release(event.exec_id)
+            elif isinstance(event, ExecutionRegisteredEvent):
+                self._track(event.exec_id)
+
+    def reconcile(self, executions: Iterable[Execution], *, since: float) -> None:
+        """Synchronise the in-flight executions with a server listing.
+
+        Executions missing from the listing are released, unless they were
+        registered after *since* (the loop time at which the listing was
+        requested). Running executions not tracked yet are adopted.
+        """
+        running = {
+            execution.id
+            for execution in executions
+            if execution.state not in TERMINAL_EXECUTION_STATES
+        }
+        for exec_id, seen_at in list(self._in_flight.items()):
+            if exec_id not in running and seen_at < since:
+                del self._in_flight[exec_id]
+        for exec_id in running:
+            self._track(exec_id)
+        self._schedule_expiry()
+        self._wake()
+
+    def close(self) -> None:
+        """Stop limiting executions and let every waiting caller proceed.
+
+        Used when the client closes, so pending actions can still be flushed.
+        """
+        self._closed = True
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _track(self, exec_id: str) -> None:
+        if exec_id in self._in_flight:
+            return
+        if exec_id in self._finished:
+            return
+        self._in_flight[exec_id] = asyncio.get_running_loop().time()
+        if self._expiry is None:
+            self._schedule_expiry()
+
+    def _wake(self) -> None:
+        """Hand free slots to waiting callers in FIFO order."""
+        while self._waiters and self.available:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._reserved += 1
+            waiter.set_result(None)
+
+    def _schedule_expiry(self) -> None:
+        """Arm a timer releasing the oldest execution once its slot times out."""
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+        if not self._in_flight or self._closed:
+            return
+        oldest = min(self._in_flight.values())
+        self._expiry = asyncio.get_running_loop().call_at(
+            oldest + self._settings.slot_timeout, self._expire
+        )
+
+    def _expire(self) -> None:
+        self._expiry = None
+        deadline = asyncio.get_running_loop().time() - self._settings.slot_timeout
+        for exec_id, seen_at in list(self._in_flight.items()):
+            if seen_at <= deadline:
+                del self._in_flight[exec_id]
+        self._schedule_expiry()
+        self._wake()
@@ -0,0 +1,309 @@
+"""Pluggable instrumentation hooks for observing client performance.
+
+The client reports request latency, retries, structuring time and auth
+refreshes to an `Instrumentation` implementation configured through
+`OverkizClientSettings.instrumentation`. When no instrumentation is configured
+the client skips all measurement work.
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Protocol, get_args, get_origin
+
+# Upper bounds (in seconds) of the default latency buckets, roughly log-spaced
+# from 1 ms to 60 s. Values above the last bound land in an overflow bucket.
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+_MAX_PERCENTILE = 100
+
+_STATIC_SEGMENT_RE = re.compile(r"[A-Za-z]+")
+
+
+def endpoint_template(path: str) -> str:
+    """Collapse the dynamic segments of an API path into a stable template.
+
+    Static segments in the Overkiz API are plain words (``setup``, ``devices``,
+    ``exec``); identifiers such as quoted device URLs, exec ids, listener ids
+    and gateway ids contain digits or punctuation and are replaced with
+    ``{id}``, so ``setup/devices/io%3A%2F%2F1234.../states`` becomes
+    ``setup/devices/{id}/states``.
+    """
+    path = path.split("?", 1)[0]
+    return "/".join(
+        segment if _STATIC_SEGMENT_RE.fullmatch(segment) else "{id}"
+        for segment in path.split("/")
+    )
+
+
+def type_label(cls: Any) -> str:
+    """Return a short label for a structuring target, e.g. ``list[Device]``."""
+    origin = get_origin(cls)
+    if origin is None:
+        return getattr(cls, "__name__", str(cls))
+    return (
+        f"{type_label(origin)}[{', '.join(type_label(arg) for arg in get_args(cls))}]"
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class RequestSample:
+    """A single HTTP request made to the Overkiz API.
+
+    `status` and `response_bytes` are None when no response was received, for
+    example on a timeout; `error` then names the exception.
+    """
+
+    method: str
+    endpoint: str
+    duration: float
+    status: int | None = None
+    response_bytes: int | None = None
+    error: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class RetrySample:
+    """A retry scheduled by one of the client retry decorators."""
+
+    target: str
+    reason: str
+    tries: int
+    wait: float
+
+
+@dataclass(frozen=True, slots=True)
+class StructureSample:
+    """Time spent structuring a response payload into models."""
+
+    type_name: str
+    duration: float
+
+
+@dataclass(frozen=True, slots=True)
+class AuthRefreshSample:
+    """An authentication refresh or re-login performed by the client."""
+
+    kind: str
+    duration: float
+
+
+class Instrumentation(Protocol):
+    """Protocol for receiving client performance samples.
+
+    Implementations are called inline on the request path and must not block.
+    """
+
+    def record_request(self, sample: RequestSample) -> None:
+        """Record a completed HTTP request."""
+
+    def record_retry(self, sample: RetrySample) -> None:
+        """Record a retry scheduled after a failed attempt."""
+
+    def record_structure(self, sample: StructureSample) -> None:
+        """Record the time spent structuring a response."""
+
+    def record_auth_refresh(self, sample: AuthRefreshSample) -> None:
+        """Record a token refresh or re-login."""
+
+
+class NoOpInstrumentation(Instrumentation):
+    """Instrumentation that discards every sample.
+
+    Useful as a base class for implementations that only care about a subset
+    of the samples.
+    """
+
+    def record_request(self, sample: RequestSample) -> None:
+        """Discard the request sample."""
+
+    def record_retry(self, sample: RetrySample) -> None:
+        """Discard the retry sample."""
+
+    def record_structure(self, sample: StructureSample) -> None:
+        """Discard the structuring sample."""
+
+    def record_auth_refresh(self, sample: AuthRefreshSample) -> None:
+        """Discard the auth refresh sample."""
+
+
+class Histogram:
+    """Fixed-bucket histogram with running count, sum, min and max."""
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """Create an empty histogram with the given (sorted) bucket upper bounds."""
+        if list(bounds) != sorted(bounds):
+            raise ValueError("Histogram bounds must be sorted in ascending order")
+        self.bounds = bounds
+        # One extra bucket for values above the last bound.
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def observe(self, value: float) -> None:
+        """Add a value to the histogram."""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean of the observed values, or None when empty."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, q: float) -> float | None:
+        """Estimate the q-th percentile (0-100) as the upper bound of its bucket.
+
+        The estimate is capped by the largest observed value, so the overflow
+        bucket and sparse histograms still return a meaningful number.
+        """
+        if not 0 <= q <= _MAX_PERCENTILE:
+            raise ValueError(f"q must be between 0 and 100, got {q!r}")
+        if not self.count or self.max is None:
+            return None
+
+        rank = q / 100 * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if bucket_count and cumulative >= rank:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.max)
+                return self.max
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return a JSON-serializable summary of the histogram."""
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": dict(
+                zip([*map(str, self.bounds), "+Inf"], self.counts, strict=True)
+            ),
+        }
+
+
+@dataclass(slots=True)
+class EndpointStats:
+    """Aggregated metrics for one (method, endpoint template) pair."""
+
+    latency: Histogram = field(default_factory=Histogram)
+    statuses: Counter[int] = field(default_factory=Counter)
+    errors: Counter[str] = field(default_factory=Counter)
+    response_bytes: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return a JSON-serializable summary of the endpoint metrics."""
+        return {
+            "latency": self.latency.snapshot(),
+            "statuses": dict(self.statuses),
+            "errors": dict(self.errors),
+            "response_bytes": self.response_bytes,
+        }
+
+
+class InMemoryInstrumentation(Instrumentation):
+    """Instrumentation that aggregates samples into in-memory histograms.
+
+    Call `snapshot()` to export the collected metrics (e.g. to a metrics
+    backend or a diagnostics dump) and `reset()` to start a new window.
+    """
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """Create an empty metrics store using the given latency buckets."""
+        self._bounds = bounds
+        self.endpoints: dict[tuple[str, str], EndpointStats] = {}
+        self.retries: Counter[tuple[str, str]] = Counter()
+        self.structuring: dict[str, Histogram] = {}
+        self.auth_refreshes: dict[str, Histogram] = {}
+
+    def record_request(self, sample: RequestSample) -> None:
+        """Aggregate a request into its endpoint's latency/status metrics."""
+        key = (sample.method, sample.endpoint)
+        stats = self.endpoints.get(key)
+        if stats is None:
+            stats = self.endpoints[key] = EndpointStats(latency=Histogram(self._bounds))
+        stats.latency.observe(sample.duration)
+        if sample.status is not None:
+            stats.statuses[sample.status] += 1
+        if sample.error is not None:
+            stats.errors[sample.error] += 1
+        if sample.response_bytes is not None:
+            stats.response_bytes += sample.response_bytes
+
+    def record_retry(self, sample: RetrySample) -> None:
+        """Count a retry by target and reason."""
+        self.retries[(sample.target, sample.reason)] += 1
+
+    def record_structure(self, sample: StructureSample) -> None:
+        """Aggregate structuring time per target type."""
+        self._histogram(self.structuring, sample.type_name).observe(sample.duration)
+
+    def record_auth_refresh(self, sample: AuthRefreshSample) -> None:
+        """Aggregate auth refresh time per kind."""
+        self._histogram(self.auth_refreshes, sample.kind).observe(sample.duration)
+
+    def _histogram(self, store: dict[str, Histogram], key: str) -> Histogram:
+        histogram = store.get(key)
+        if histogram is None:
+            histogram = store[key] = Histogram(self._bounds)
+        return histogram
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return a JSON-serializable snapshot of all collected metrics."""
+        return {
+            "requests": {
+                f"{method} {endpoint}": stats.snapshot()
+                for (method, endpoint), stats in self.endpoints.items()
+            },
+            "retries": [
+                {"target": target, "reason": reason, "count": count}
+                for (target, reason), count in self.retries.items()
+            ],
+            "structuring": {
+                name: histogram.snapshot()
+                for name, histogram in self.structuring.items()
+            },
+            "auth_refreshes": {
+                kind: histogram.snapshot()
+                for kind, histogram in self.auth_refreshes.items()
+            },
+        }
+
+    def reset(self) -> None:
+        """Discard all collected metrics."""
+        self.endpoints.clear()
+        self.retries.clear()
+        self.structuring.clear()
+        self.auth_refreshes.clear()
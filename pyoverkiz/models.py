@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import json
 import re
-from collections.abc import Iterator, Mapping
+from collections.abc import Callable, Iterable, Iterator, Mapping
 from typing import Any, cast
 
 from attr import define, field
@@ -42,89 +42,138 @@ from pyoverkiz.types import DATA_TYPE_TO_PYTHON, CommandParameterValue, StateTyp
 
 @define(kw_only=True)
 class State:
-    """A single device state with typed accessors for its value."""
+    """A single device state with typed accessors for its value.
+
+    The value is normalised to the Python type of its declared data type when
+    the state is created: the cloud API returns most values as strings and the
+    local API may return whole numbers for `FLOAT` states (or floats for
+    `INTEGER` ones). The typed accessors then only check the data type.
+    """
 
     name: str
     type: DataType
     value: StateType = None
 
+    def __attrs_post_init__(self) -> None:
+        """Normalise the value to the Python type of the declared data type."""
+        if type(self.type) is not DataType:
+            self.type = DataType(self.type)
+        value = self.value
+        if value is None or type(value) is _PYTHON_TYPES.get(self.type):
+            return
+        if isinstance(value, str):
+            caster = DATA_TYPE_TO_PYTHON.get(self.type)
+            if caster is not None:
+                self.value = self._cast_string(caster, value)
+            return
+        self.value = _normalise_number(self.type, value)
+
+    def _cast_string(self, caster: Callable[[str], StateType], raw_value: str) -> Any:
+        """Cast a string value; keep it as-is if it does not parse."""
+        try:
+            return caster(raw_value)
+        except ValueError:
+            return raw_value
+
     @property
     def value_as_int(self) -> int | None:
         """Return the integer value or None if not set; raise on type mismatch."""
-        if self.type == DataType.NONE:
-            return None
-        if self.type == DataType.INTEGER:
+        data_type = self.type
+        if data_type is DataType.INTEGER:
             return cast(int, self.value)
+        if data_type is DataType.NONE:
+            return None
         raise TypeError(f"{self.name} is not an integer")
 
     @property
     def value_as_float(self) -> float | None:
         """Return the float value, allow int->float conversion; raise on type mismatch."""
-        if self.type == DataType.NONE:
-            return None
-        if self.type == DataType.FLOAT:
+        data_type = self.type
+        if data_type is DataType.FLOAT:
             return cast(float, self.value)
-        if self.type == DataType.INTEGER:
-            return float(cast(int, self.value))
+        if data_type is DataType.INTEGER:
+            return None if self.value is None else float(cast(int, self.value))
+        if data_type is DataType.NONE:
+            return None
         raise TypeError(f"{self.name} is not a float")
 
     @property
     def value_as_bool(self) -> bool | None:
         """Return the boolean value or raise on type mismatch."""
-        if self.type == DataType.NONE:
-            return None
-        if self.type == DataType.BOOLEAN:
+        data_type = self.type
+        if data_type is DataType.BOOLEAN:
             return cast(bool, self.value)
+        if data_type is DataType.NONE:
+            return None
         raise TypeError(f"{self.name} is not a boolean")
 
     @property
     def value_as_str(self) -> str | None:
         """Return the string value or raise on type mismatch."""
-        if self.type == DataType.NONE:
-            return None
-        if self.type == DataType.STRING:
+        data_type = self.type
+        if data_type is DataType.STRING:
             return cast(str, self.value)
+        if data_type is DataType.NONE:
+            return None
         raise TypeError(f"{self.name} is not a string")
 
     @property
     def value_as_dict(self) -> dict[str, Any] | None:
         """Return the dict value or raise if state is not a JSON object."""
-        if self.type == DataType.NONE:
-            return None
-        if self.type == DataType.JSON_OBJECT:
+        data_type = self.type
+        if data_type is DataType.JSON_OBJECT:
             return cast(dict, self.value)
+        if data_type is DataType.NONE:
+            return None
         raise TypeError(f"{self.name} is not a JSON object")
 
     @property
     def value_as_list(self) -> list[Any] | None:
         """Return the list value or raise if state is not a JSON array."""
-        if self.type == DataType.NONE:
-            return None
-        if self.type == DataType.JSON_ARRAY:
+        data_type = self.type
+        if data_type is DataType.JSON_ARRAY:
             return cast(list, self.value)
+        if data_type is DataType.NONE:
+            return None
         raise TypeError(f"{self.name} is not an array")
 
 
+# Python type of a normalised value, per data type (used as a fast path).
+_PYTHON_TYPES: dict[DataType, type] = {
+    DataType.INTEGER: int,
+    DataType.DATE: int,
+    DataType.FLOAT: float,
+    DataType.STRING: str,
+    DataType.BOOLEAN: bool,
+    DataType.JSON_ARRAY: list,
+    DataType.JSON_OBJECT: dict,
+}
+
+
+def _normalise_number(data_type: DataType, value: StateType) -> StateType:
+    """Convert a number to the Python type of *data_type* when it is lossless."""
+    if isinstance(value, bool) or not isinstance(value, int | float):
+        return value
+    if data_type is DataType.FLOAT:
+        return float(value)
+    if data_type is DataType.INTEGER or data_type is DataType.DATE:
+        # Some devices report fractional values for INTEGER states; keep those.
+        return int(value) if isinstance(value, int) or value.is_integer() else value
+    if data_type is DataType.BOOLEAN and value in (0, 1):
+        return bool(value)
+    return value
+
+
 @define(kw_only=True)
 class EventState(State):
-    """State variant used when parsing event payloads (casts string values)."""
+    """State variant used when parsing event payloads (raises on invalid values)."""
 
-    def __attrs_post_init__(self) -> None:
-        """Cast string values based on declared data type."""
+    def _cast_string(self, caster: Callable[[str], StateType], raw_value: str) -> Any:
+        """Cast event state string values; raise on decode errors."""
         # Overkiz (cloud) returns all state values as a string
         # Overkiz (local) returns all state values in the right format
-        if not isinstance(self.value, str) or self.type not in DATA_TYPE_TO_PYTHON:
-            return
-
-        if self.type in (DataType.JSON_ARRAY, DataType.JSON_OBJECT):
-            self.value = self._cast_json_value(self.value)
-            return
-
-        caster = DATA_TYPE_TO_PYTHON[self.type]
-        self.value = caster(self.value)
-
-    def _cast_json_value(self, raw_value: str) -> StateType:
-        """Cast JSON event state values; raise on decode errors."""
+        if self.type not in (DataType.JSON_ARRAY, DataType.JSON_OBJECT):
+            return caster(raw_value)
         try:
             return json.loads(raw_value)
         except json.JSONDecodeError as err:
@@ -153,6 +202,10 @@ class States(Mapping[str, State]):
         self._index = {state.name: state for state in self._states}
         self._pos = {state.name: i for i, state in enumerate(self._states)}
 
+    def __reduce__(self) -> tuple[type[States], tuple[list[State]]]:
+        """Pickle as the list of items; the index is rebuilt on load."""
+        return (type(self), (self._states,))
+
     def __iter__(self) -> Iterator[str]:
         """Return an iterator over state names."""
         return iter(self._index)
@@ -190,6 +243,14 @@ class States(Mapping[str, State]):
             return state.value
         return None
 
+    def get_many(self, names: Iterable[StateName]) -> list[StateType]:
+        """Return the values of several states, in order; None for missing ones."""
+        index = self._index
+        return [
+            state.value if (state := index.get(name)) is not None else None
+            for name in names
+        ]
+
     def first(self, names: list[StateName]) -> State | None:
         """Return the first State that exists and has a non-None value, or None."""
         for name in names:
@@ -237,6 +298,12 @@ class CommandDefinitions(Mapping[str, CommandDefinition]):
         self._commands = list(commands) if commands else []
         self._index = {cd.command_name: cd for cd in self._commands}
 
+    def __reduce__(
+        self,
+    ) -> tuple[type[CommandDefinitions], tuple[list[CommandDefinition]]]:
+        """Pickle as the list of items; the index is rebuilt on load."""
+        return (type(self), (self._commands,))
+
     def __iter__(self) -> Iterator[str]:
         """Iterate over command names."""
         return iter(self._index)
@@ -308,6 +375,10 @@ class StateDefinitions(Mapping[str, StateDefinition]):
             if sd.qualified_name is not None
         }
 
+    def __reduce__(self) -> tuple[type[StateDefinitions], tuple[list[StateDefinition]]]:
+        """Pickle as the list of items; the index is rebuilt on load."""
+        return (type(self), (self._definitions,))
+
     def __iter__(self) -> Iterator[str]:
         """Iterate over qualified names."""
         return iter(self._index)
@@ -744,6 +815,8 @@ class GatewayModeChangedEvent(GatewayEvent):
 class GatewayPlaceUpdatedEvent(GatewayEvent):
     """A gateway's place was updated."""
 
+    place_oid: str | None = None
+
 
 @define(kw_only=True)
 class GatewayProtocolDownEvent(GatewayEvent):
@@ -848,6 +921,40 @@ class ZoneUpdatedEvent(_ZoneMutationEvent):
     """A zone was updated."""
 
 
+@define(kw_only=True)
+class ActionGroupEvent(Event):
+    """Any persisted action group event; ``action_group_oid`` identifies it (required)."""
+
+    action_group_oid: str = field(repr=obfuscate_id)
+
+
+@define(kw_only=True)
+class ActionGroupDeletedEvent(ActionGroupEvent):
+    """A persisted action group was deleted."""
+
+
+@define(kw_only=True)
+class _ActionGroupMutationEvent(ActionGroupEvent):
+    """Shared base for action group create/update events.
+
+    The payload also embeds the action group's actions, but with a different
+    parameter encoding than `/actionGroups`; refetch the action group to get it
+    as a `PersistedActionGroup`.
+    """
+
+    action_group_label: str | None = field(repr=obfuscate_string, default=None)
+
+
+@define(kw_only=True)
+class ActionGroupCreatedEvent(_ActionGroupMutationEvent):
+    """A persisted action group was created."""
+
+
+@define(kw_only=True)
+class ActionGroupUpdatedEvent(_ActionGroupMutationEvent):
+    """A persisted action group was updated."""
+
+
 # Event name -> subtype. Unlisted names structure into the base Event.
 EVENT_TYPE_BY_NAME: dict[EventName, type[Event]] = {
     EventName.DEVICE_STATE_CHANGED: DeviceStateChangedEvent,
@@ -862,6 +969,9 @@ EVENT_TYPE_BY_NAME: dict[EventName, type[Event]] = {
     EventName.ZONE_CREATED: ZoneCreatedEvent,
     EventName.ZONE_UPDATED: ZoneUpdatedEvent,
     EventName.ZONE_DELETED: ZoneDeletedEvent,
+    EventName.ACTION_GROUP_CREATED: ActionGroupCreatedEvent,
+    EventName.ACTION_GROUP_UPDATED: ActionGroupUpdatedEvent,
+    EventName.ACTION_GROUP_DELETED: ActionGroupDeletedEvent,
     EventName.GATEWAY_ACTIVATED: GatewayActivatedEvent,
     EventName.GATEWAY_ACTIVE_PROTOCOLS_CHANGED: GatewayActiveProtocolsChangedEvent,
     EventName.GATEWAY_ALIVE: GatewayAliveEvent,
@@ -0,0 +1,101 @@
+"""Request rate budgets shared between clients.
+
+The Overkiz servers rate-limit per session and per account; a process running
+many clients also wants to cap its total request rate. A `RateBudget` is a
+token bucket: it allows ``rate`` requests per second on average, with bursts
+of up to ``burst`` requests. Callers reserve a token when they ask for one and
+sleep off any deficit, so waiting callers are served in arrival order without
+a queue. A client applies a `RateLimiter` to every request when one is set in
+`OverkizClientSettings.rate_limiter`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable, Iterable
+from typing import Protocol
+
+
+class RateLimiter(Protocol):
+    """Protocol for objects pacing requests."""
+
+    async def acquire(self) -> None:
+        """Wait until the next request may be sent."""
+
+
+class RateBudget:
+    """Token bucket allowing ``rate`` requests per second, bursting to ``burst``."""
+
+    __slots__ = ("_burst", "_clock", "_rate", "_tokens", "_updated")
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a full bucket; *burst* defaults to one second worth of requests."""
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate!r}")
+        burst = max(rate, 1.0) if burst is None else burst
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst!r}")
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+
+    @property
+    def rate(self) -> float:
+        """Return the sustained rate, in requests per second."""
+        return self._rate
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it, in seconds.
+
+        The bucket goes into debt when empty, so later callers wait behind
+        earlier ones.
+        """
+        now = self._clock()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available now; never waits."""
+        if self.reserve() > 0:
+            self._tokens += 1
+            return False
+        return True
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CombinedRateBudget:
+    """Rate limiter drawing one token from each of several budgets per request.
+
+    Used to apply a budget shared by many clients together with a budget of
+    one account.
+    """
+
+    __slots__ = ("budgets",)
+
+    def __init__(self, budgets: Iterable[RateBudget]) -> None:
+        """Combine *budgets*; a request waits for the slowest of them."""
+        self.budgets = tuple(budgets)
+
+    async def acquire(self) -> None:
+        """Wait until every budget allows the request."""
+        delay = max((budget.reserve() for budget in self.budgets), default=0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
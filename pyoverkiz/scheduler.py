@@ -0,0 +1,383 @@
+"""Local timer-wheel scheduler for deferred and recurring actions.
+
+`schedule_persisted_action_group()` defers execution server-side, but only for
+persisted action groups and at the cost of one request per schedule. The
+`ActionScheduler` keeps ad-hoc deferred actions locally instead, in a hashed
+timer wheel: scheduling and cancelling a timer are O(1), and each tick only
+visits the timers hashed to its slot, so many thousands of pending timers stay
+cheap. Timers that fall due in the same tick are merged into a single
+`execute_action_group()` call (per execution mode and label), which goes
+through the action queue when it is enabled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+import uuid
+from collections import Counter
+from collections.abc import Callable, Coroutine, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from pyoverkiz.enums import ExecutionMode
+from pyoverkiz.instrumentation import Histogram
+from pyoverkiz.models import Action, Command
+
+_LOGGER = logging.getLogger(__name__)
+
+ActionGroupExecutor = Callable[
+    [list[Action], ExecutionMode | None, str | None], Coroutine[Any, Any, str]
+]
+
+
+@dataclass(frozen=True, slots=True)
+class ActionSchedulerSettings:
+    """Settings for the local action scheduler.
+
+    ``resolution`` is the length of a wheel tick in seconds: timers fire on the
+    first tick at or after their due time, and timers due within the same tick
+    are sent together. ``wheel_size`` is the number of slots in the wheel;
+    timers further out than ``resolution * wheel_size`` wrap around and are
+    skipped until their round comes up.
+    """
+
+    resolution: float = 0.1
+    wheel_size: int = 512
+
+    def validate(self) -> None:
+        """Validate configuration values for the scheduler."""
+        if self.resolution <= 0:
+            raise ValueError(f"resolution must be positive, got {self.resolution!r}")
+        if self.wheel_size < 1:
+            raise ValueError(f"wheel_size must be at least 1, got {self.wheel_size!r}")
+
+
+class ScheduledActions:
+    """Handle on actions scheduled with `ActionScheduler.schedule()`."""
+
+    __slots__ = (
+        "_scheduler",
+        "actions",
+        "deadline",
+        "due",
+        "fired",
+        "id",
+        "interval",
+        "label",
+        "last_exec_id",
+        "mode",
+        "tick",
+    )
+
+    def __init__(
+        self,
+        scheduler: ActionScheduler,
+        *,
+        timer_id: str,
+        actions: list[Action],
+        due: float,
+        deadline: float,
+        interval: float | None,
+        mode: ExecutionMode | None,
+        label: str | None,
+    ) -> None:
+        """Create a handle; use `ActionScheduler.schedule()` instead."""
+        self._scheduler = scheduler
+        self.id = timer_id
+        self.actions = actions
+        # Wall-clock (epoch) due time of the next run, used for persistence.
+        self.due = due
+        # Event loop time of the next run.
+        self.deadline = deadline
+        self.interval = interval
+        self.mode = mode
+        self.label = label
+        self.tick = 0
+        self.fired = 0
+        self.last_exec_id: str | None = None
+
+    @property
+    def pending(self) -> bool:
+        """Return True while the timer is scheduled to run again."""
+        return self._scheduler.get(self.id) is self
+
+    def cancel(self) -> bool:
+        """Cancel the timer; return False if it is no longer pending."""
+        return self._scheduler.cancel(self.id)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable description for `ActionScheduler.restore()`."""
+        return {
+            "id": self.id,
+            "due": self.due,
+            "interval": self.interval,
+            "mode": self.mode.value if self.mode is not None else None,
+            "label": self.label,
+            "actions": [action.to_payload() for action in self.actions],
+        }
+
+
+class ActionScheduler:
+    """Runs deferred and recurring actions from a hashed timer wheel.
+
+    The wheel only runs while timers are pending; each tick fires the due
+    timers of one slot. Drift (how late a timer fired compared to its due time)
+    is recorded in `get_stats()`. Recurring timers are rescheduled from their
+    previous due time, so drift does not accumulate.
+
+    Pending timers can be saved with `dump()` and scheduled again after a
+    restart with `restore()`; timers that fell due in the meantime run on the
+    next tick.
+    """
+
+    def __init__(
+        self,
+        executor: ActionGroupExecutor,
+        settings: ActionSchedulerSettings | None = None,
+    ) -> None:
+        """Create a scheduler sending due actions to *executor*."""
+        self._executor = executor
+        self._settings = settings or ActionSchedulerSettings()
+        self._wheel: list[dict[str, ScheduledActions]] = [
+            {} for _ in range(self._settings.wheel_size)
+        ]
+        self._timers: dict[str, ScheduledActions] = {}
+        self._current_tick = 0
+        self._handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._closed = False
+        self.drift = Histogram()
+        self.fired = 0
+        self.batches = 0
+        self.cancelled = 0
+        self.errors: Counter[str] = Counter()
+
+    @property
+    def pending(self) -> int:
+        """Return the number of scheduled timers."""
+        return len(self._timers)
+
+    def get(self, timer_id: str) -> ScheduledActions | None:
+        """Return the pending timer with this id, or None."""
+        return self._timers.get(timer_id)
+
+    def schedule(
+        self,
+        actions: list[Action],
+        *,
+        delay: float | None = None,
+        at: float | None = None,
+        interval: float | None = None,
+        mode: ExecutionMode | None = None,
+        label: str | None = None,
+        timer_id: str | None = None,
+    ) -> ScheduledActions:
+        """Schedule *actions* to run after *delay* seconds or at epoch time *at*.
+
+        With *interval*, the actions run again every *interval* seconds until
+        cancelled. When neither *delay* nor *at* is given, the first run is
+        after one *interval* (or on the next tick for one-shot timers).
+        """
+        if self._closed:
+            raise RuntimeError("ActionScheduler is closed")
+        if delay is not None and at is not None:
+            raise ValueError("Pass either delay or at, not both")
+        if interval is not None and interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval!r}")
+        if not actions:
+            raise ValueError("actions must not be empty")
+
+        if at is not None:
+            delay = at - time.time()
+        elif delay is None:
+            delay = interval or 0.0
+        delay = max(delay, 0.0)
+
+        timer = ScheduledActions(
+            self,
+            timer_id=timer_id or uuid.uuid4().hex,
+            actions=actions,
+            due=time.time() + delay,
+            deadline=asyncio.get_running_loop().time() + delay,
+            interval=interval,
+            mode=mode,
+            label=label,
+        )
+        # Restoring a timer replaces a pending one with the same id.
+        self._remove(timer.id)
+        self._insert(timer)
+        return timer
+
+    def cancel(self, timer_id: str) -> bool:
+        """Cancel a pending timer; return False if it is not pending."""
+        if self._remove(timer_id) is None:
+            return False
+        self.cancelled += 1
+        return True
+
+    def dump(self) -> list[dict[str, Any]]:
+        """Return the pending timers as JSON-serializable dicts."""
+        return [timer.to_dict() for timer in self._timers.values()]
+
+    def restore(self, entries: Iterable[dict[str, Any]]) -> list[ScheduledActions]:
+        """Schedule timers previously returned by `dump()`."""
+        timers = []
+        for entry in entries:
+            mode = entry.get("mode")
+            timers.append(
+                self.schedule(
+                    [
+                        Action(
+                            device_url=action["device_url"],
+                            commands=[
+                                Command(**command) for command in action["commands"]
+                            ],
+                        )
+                        for action in entry["actions"]
+                    ],
+                    at=entry["due"],
+                    interval=entry.get("interval"),
+                    mode=ExecutionMode(mode) if mode is not None else None,
+                    label=entry.get("label"),
+                    timer_id=entry["id"],
+                )
+            )
+        return timers
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return a JSON-serializable snapshot of the scheduler metrics."""
+        return {
+            "pending": self.pending,
+            "fired": self.fired,
+            "batches": self.batches,
+            "cancelled": self.cancelled,
+            "errors": dict(self.errors),
+            "drift": self.drift.snapshot(),
+        }
+
+    async def close(self) -> None:
+        """Stop the wheel, drop pending timers and wait for running executions.
+
+        Call `dump()` first to keep the pending timers.
+        """
+        self._closed = True
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._timers.clear()
+        for slot in self._wheel:
+            slot.clear()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _remove(self, timer_id: str) -> ScheduledActions | None:
+        timer = self._timers.pop(timer_id, None)
+        if timer is None:
+            return None
+        del self._wheel[timer.tick % self._settings.wheel_size][timer_id]
+        if not self._timers and self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        return timer
+
+    def _tick_of(self, deadline: float) -> int:
+        return math.ceil(deadline / self._settings.resolution)
+
+    def _insert(self, timer: ScheduledActions) -> None:
+        loop = asyncio.get_running_loop()
+        if self._handle is None:
+            # The wheel was idle; catch up with the ticks that passed meanwhile.
+            self._current_tick = max(self._current_tick, self._tick_of(loop.time()) - 1)
+        timer.tick = max(self._tick_of(timer.deadline), self._current_tick + 1)
+        self._wheel[timer.tick % self._settings.wheel_size][timer.id] = timer
+        self._timers[timer.id] = timer
+        if self._handle is None:
+            self._arm(loop)
+
+    def _arm(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._handle = loop.call_at(
+            (self._current_tick + 1) * self._settings.resolution,
+            self._advance,
+        )
+
+    def _advance(self) -> None:
+        """Fire the timers of every tick elapsed since the previous run."""
+        self._handle = None
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        tick = math.floor(now / self._settings.resolution)
+        size = self._settings.wheel_size
+
+        due: list[ScheduledActions] = []
+        # After a stall longer than a full turn, every slot is visited once.
+        for current in range(self._current_tick + 1, tick + 1)[-size:]:
+            slot = self._wheel[current % size]
+            for timer in [timer for timer in slot.values() if timer.tick <= tick]:
+                del slot[timer.id]
+                del self._timers[timer.id]
+                due.append(timer)
+        self._current_tick = max(tick, self._current_tick)
+
+        if due:
+            self._fire(due, now)
+        if self._timers and self._handle is None:
+            self._arm(loop)
+
+    def _fire(self, due: list[ScheduledActions], now: float) -> None:
+        """Send due timers as one action group per (mode, label)."""
+        groups: dict[tuple[ExecutionMode | None, str | None], list[ScheduledActions]]
+        groups = {}
+        for timer in due:
+            self.drift.observe(max(now - timer.deadline, 0.0))
+            self.fired += 1
+            timer.fired += 1
+            groups.setdefault((timer.mode, timer.label), []).append(timer)
+            if timer.interval is not None:
+                self._reschedule(timer, timer.interval, now)
+
+        for (mode, label), timers in groups.items():
+            merged: dict[str, Action] = {}
+            for timer in timers:
+                for action in timer.actions:
+                    existing = merged.get(action.device_url)
+                    if existing is None:
+                        merged[action.device_url] = Action(
+                            device_url=action.device_url,
+                            commands=list(action.commands),
+                        )
+                    else:
+                        existing.commands.extend(action.commands)
+            self.batches += 1
+            task = asyncio.create_task(
+                self._execute(timers, list(merged.values()), mode, label)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _reschedule(self, timer: ScheduledActions, interval: float, now: float) -> None:
+        """Move a recurring timer to its next due time after *now*."""
+        skipped = max(math.floor((now - timer.deadline) / interval), 0) + 1
+        timer.deadline += skipped * interval
+        timer.due += skipped * interval
+        self._insert(timer)
+
+    async def _execute(
+        self,
+        timers: list[ScheduledActions],
+        actions: list[Action],
+        mode: ExecutionMode | None,
+        label: str | None,
+    ) -> None:
+        try:
+            exec_id = await self._executor(actions, mode, label)
+        except Exception as err:  # noqa: BLE001
+            self.errors[type(err).__name__] += 1
+            _LOGGER.warning(
+                "Scheduled execution of %d action(s) failed: %r", len(actions), err
+            )
+            return
+        for timer in timers:
+            timer.last_exec_id = exec_id
@@ -0,0 +1,323 @@
+"""Structural diff between two `Setup` snapshots.
+
+Without a diff, caches built from a setup have to be rebuilt wholesale after
+`get_setup(refresh=True)`. `diff_setups()` compares two setups entity by
+entity: devices by URL, gateways by id, places and zones by OID. Each side is
+indexed once and matching entities are compared field by field (unchanged
+objects shared by both setups are skipped by identity), so the cost grows
+linearly with the setup size.
+
+`SetupIndex`, `StateColumns` and `SetupVersions` take a `SetupDiff` through
+their ``apply_diff()`` methods and only update what changed. The client does
+this on every refresh and keeps the diff in `OverkizClient.last_setup_diff`.
+`SetupDiff.to_events()` turns the device and zone changes into events shaped
+like those of `fetch_events()`, for consumers that want a summary of the
+refresh in event form. The events do not carry enough to rebuild the new
+setup: created devices have no definition or states, and removed states are
+reported as `None` values.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+import attrs
+
+from pyoverkiz.enums import DataType, EventName
+from pyoverkiz.models import (
+    Device,
+    DeviceAvailableEvent,
+    DeviceCreatedEvent,
+    DeviceRemovedEvent,
+    DeviceStateChangedEvent,
+    DeviceUnavailableEvent,
+    DeviceUpdatedEvent,
+    Event,
+    EventState,
+    Gateway,
+    Place,
+    Setup,
+    State,
+    Zone,
+    ZoneCreatedEvent,
+    ZoneDeletedEvent,
+    ZoneUpdatedEvent,
+)
+
+# Device fields compared attribute by attribute; states and the definition are
+# diffed separately and identifier is derived from device_url.
+_DEVICE_FIELDS = tuple(
+    f.name
+    for f in attrs.fields(Device)
+    if f.name not in {"states", "definition", "identifier"}
+)
+
+# Device fields reported by DeviceUpdatedEvent.
+_UPDATED_EVENT_FIELDS = frozenset({"label", "place_oid", "metadata"})
+
+_PLACE_FIELDS = tuple(f.name for f in attrs.fields(Place) if f.name != "sub_places")
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceChange:
+    """A device present in both setups that changed.
+
+    ``fields`` names the changed `Device` attributes. ``states`` maps each
+    changed state name to its new `State`, or None when the state was removed.
+    """
+
+    old: Device
+    new: Device
+    fields: frozenset[str] = frozenset()
+    states: dict[str, State | None] = field(default_factory=dict)
+    definition_changed: bool = False
+
+    @property
+    def device_url(self) -> str:
+        """Return the URL of the changed device."""
+        return self.new.device_url
+
+
+@dataclass(frozen=True, slots=True)
+class SetupDiff:
+    """Differences between an old and a new `Setup`.
+
+    Added and removed entities are listed in the order of the setup they come
+    from; changed gateways, places and zones are given in their new version.
+    """
+
+    added_devices: list[Device] = field(default_factory=list)
+    removed_devices: list[Device] = field(default_factory=list)
+    changed_devices: list[DeviceChange] = field(default_factory=list)
+    added_gateways: list[Gateway] = field(default_factory=list)
+    removed_gateways: list[Gateway] = field(default_factory=list)
+    changed_gateways: list[Gateway] = field(default_factory=list)
+    added_places: list[Place] = field(default_factory=list)
+    removed_places: list[Place] = field(default_factory=list)
+    changed_places: list[Place] = field(default_factory=list)
+    added_zones: list[Zone] = field(default_factory=list)
+    removed_zones: list[Zone] = field(default_factory=list)
+    changed_zones: list[Zone] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        """Return True if anything changed."""
+        return any(getattr(self, f.name) for f in dataclasses.fields(self))
+
+    def to_events(self, setup_oid: str | None = None) -> list[Event]:
+        """Return synthetic events describing the device and zone changes.
+
+        The events convey exactly:
+
+        - added devices: a `DeviceCreatedEvent` with the URL, controllable
+          name, label, place and metadata, but no definition or states;
+        - removed devices: a `DeviceRemovedEvent`;
+        - a changed label, place or metadata, or a changed definition: a
+          `DeviceUpdatedEvent` with the new label, place and metadata (a
+          definition change is only flagged, not described);
+        - availability flips: a `DeviceAvailableEvent` or
+          `DeviceUnavailableEvent`;
+        - changed and added states: a `DeviceStateChangedEvent` with their new
+          values; removed states are included as an `EventState` of type
+          ``NONE`` with a `None` value, which consumers store as a `None`
+          value rather than deleting the state;
+        - zones: their created, updated and deleted events, with the label,
+          type and member device URLs.
+
+        Gateways and places have no event equivalent and are not included.
+        Consumers such as `SetupIndex` handle these events like fetched ones:
+        a created device only marks the index stale and state changes are
+        ignored. To update such caches, pass the diff to their
+        ``apply_diff()`` method instead.
+        """
+        events: list[Event] = [
+            DeviceCreatedEvent(
+                name=EventName.DEVICE_CREATED,
+                setup_oid=setup_oid,
+                device_url=device.device_url,
+                controllable_name=device.controllable_name,
+                label=device.label,
+                place_oid=device.place_oid,
+                metadata=device.metadata,
+            )
+            for device in self.added_devices
+        ]
+        for change in self.changed_devices:
+            events.extend(_device_change_events(change, setup_oid))
+        events.extend(
+            DeviceRemovedEvent(
+                name=EventName.DEVICE_REMOVED,
+                setup_oid=setup_oid,
+                device_url=device.device_url,
+                controllable_name=device.controllable_name,
+            )
+            for device in self.removed_devices
+        )
+        for name, zones, cls in (
+            (EventName.ZONE_CREATED, self.added_zones, ZoneCreatedEvent),
+            (EventName.ZONE_UPDATED, self.changed_zones, ZoneUpdatedEvent),
+        ):
+            events.extend(
+                cls(
+                    name=name,
+                    setup_oid=setup_oid,
+                    zone_oid=zone.oid,
+                    type=zone.type,
+                    label=zone.label,
+                    device_urls=[item.device_url for item in zone.items],
+                )
+                for zone in zones
+            )
+        events.extend(
+            ZoneDeletedEvent(
+                name=EventName.ZONE_DELETED, setup_oid=setup_oid, zone_oid=zone.oid
+            )
+            for zone in self.removed_zones
+        )
+        return events
+
+
+def diff_setups(old: Setup, new: Setup) -> SetupDiff:
+    """Return the structural differences between two setups."""
+    diff = SetupDiff()
+
+    old_devices = {device.device_url: device for device in old.devices}
+    new_urls = set()
+    for device in new.devices:
+        new_urls.add(device.device_url)
+        previous = old_devices.get(device.device_url)
+        if previous is None:
+            diff.added_devices.append(device)
+        elif previous is not device and (change := _diff_device(previous, device)):
+            diff.changed_devices.append(change)
+    diff.removed_devices.extend(
+        device for url, device in old_devices.items() if url not in new_urls
+    )
+
+    _diff_keyed(
+        {gateway.gateway_id: (gateway, gateway) for gateway in old.gateways},
+        {gateway.gateway_id: (gateway, gateway) for gateway in new.gateways},
+        diff.added_gateways,
+        diff.removed_gateways,
+        diff.changed_gateways,
+    )
+    _diff_keyed(
+        dict(_walk_places(old.root_place)),
+        dict(_walk_places(new.root_place)),
+        diff.added_places,
+        diff.removed_places,
+        diff.changed_places,
+    )
+    _diff_keyed(
+        {zone.oid: (zone, zone) for zone in old.zones or ()},
+        {zone.oid: (zone, zone) for zone in new.zones or ()},
+        diff.added_zones,
+        diff.removed_zones,
+        diff.changed_zones,
+    )
+    return diff
+
+
+def _diff_keyed[T](
+    old: dict[str, tuple[T, object]],
+    new: dict[str, tuple[T, object]],
+    added: list[T],
+    removed: list[T],
+    changed: list[T],
+) -> None:
+    """Compare two keyed collections of (item, comparison key) pairs."""
+    for key, (item, signature) in new.items():
+        previous = old.get(key)
+        if previous is None:
+            added.append(item)
+        elif previous[0] is not item and previous[1] != signature:
+            changed.append(item)
+    removed.extend(item for key, (item, _) in old.items() if key not in new)
+
+
+def _diff_device(old: Device, new: Device) -> DeviceChange | None:
+    fields = frozenset(
+        name for name in _DEVICE_FIELDS if getattr(old, name) != getattr(new, name)
+    )
+    states: dict[str, State | None] = {}
+    for name, state in new.states.items():
+        previous = old.states.get(name)
+        if previous != state:
+            states[name] = state
+    for name in old.states:
+        if name not in new.states:
+            states[name] = None
+    definition_changed = old.definition != new.definition
+    if not fields and not states and not definition_changed:
+        return None
+    return DeviceChange(
+        old=old,
+        new=new,
+        fields=fields,
+        states=states,
+        definition_changed=definition_changed,
+    )
+
+
+def _walk_places(root: Place | None) -> Iterator[tuple[str, tuple[Place, object]]]:
+    """Yield (oid, (place, comparison key)) for every place of a tree.
+
+    The comparison key holds the place's own fields and its parent OID, so a
+    change to a sub place does not mark its ancestors as changed.
+    """
+    stack: list[tuple[Place, str | None]] = [(root, None)] if root else []
+    while stack:
+        place, parent_oid = stack.pop()
+        signature = (parent_oid, *(getattr(place, name) for name in _PLACE_FIELDS))
+        yield place.oid, (place, signature)
+        stack.extend((child, place.oid) for child in reversed(place.sub_places))
+
+
+def _device_change_events(change: DeviceChange, setup_oid: str | None) -> list[Event]:
+    events: list[Event] = []
+    new = change.new
+    if change.definition_changed or change.fields & _UPDATED_EVENT_FIELDS:
+        events.append(
+            DeviceUpdatedEvent(
+                name=EventName.DEVICE_UPDATED,
+                setup_oid=setup_oid,
+                device_url=new.device_url,
+                controllable_name=new.controllable_name,
+                label=new.label,
+                place_oid=new.place_oid,
+                metadata=new.metadata,
+            )
+        )
+    if "available" in change.fields:
+        if new.available:
+            events.append(
+                DeviceAvailableEvent(
+                    name=EventName.DEVICE_AVAILABLE,
+                    setup_oid=setup_oid,
+                    device_url=new.device_url,
+                )
+            )
+        else:
+            events.append(
+                DeviceUnavailableEvent(
+                    name=EventName.DEVICE_UNAVAILABLE,
+                    setup_oid=setup_oid,
+                    device_url=new.device_url,
+                )
+            )
+    if change.states:
+        events.append(
+            DeviceStateChangedEvent(
+                name=EventName.DEVICE_STATE_CHANGED,
+                setup_oid=setup_oid,
+                device_url=new.device_url,
+                device_states=[
+                    EventState(name=name, type=state.type, value=state.value)
+                    if state is not None
+                    else EventState(name=name, type=DataType.NONE)
+                    for name, state in change.states.items()
+                ],
+            )
+        )
+    return events
@@ -0,0 +1,718 @@
+"""Hash indexes over a setup for constant-time device lookups.
+
+Finding the devices in a room, of a UI class or behind a gateway otherwise
+means scanning the whole device list on every query. `SetupIndex` builds one
+hash index per lookup key from a `Setup` and keeps it current from device and
+zone events, so queries only touch the devices they return.
+"""
+
+from __future__ import annotations
+
+import copy
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from typing import Any
+
+from attrs import evolve
+
+from pyoverkiz.enums import EventName, Protocol
+from pyoverkiz.models import (
+    Action,
+    Command,
+    Device,
+    DeviceAvailableEvent,
+    DeviceCreatedEvent,
+    DeviceRemovedEvent,
+    DeviceUnavailableEvent,
+    DeviceUpdatedEvent,
+    Event,
+    Gateway,
+    GatewayPlaceUpdatedEvent,
+    Place,
+    Setup,
+    State,
+    StateName,
+    Zone,
+    ZoneCreatedEvent,
+    ZoneDeletedEvent,
+    ZoneItem,
+    ZoneUpdatedEvent,
+)
+from pyoverkiz.setup_diff import SetupDiff
+from pyoverkiz.types import StateType
+
+# Query keyword -> function extracting the keys a device is indexed under.
+_DEVICE_KEYS: dict[str, Callable[[Device], Iterable[Hashable]]] = {
+    "place_oid": lambda device: (device.place_oid,),
+    "ui_class": lambda device: (device.ui_class,),
+    "widget": lambda device: (device.widget,),
+    "protocol": lambda device: (device.identifier.protocol,),
+    "gateway_id": lambda device: (device.identifier.gateway_id,),
+    "controllable_name": lambda device: (device.controllable_name,),
+    "base_device_url": lambda device: (device.identifier.base_device_url,),
+    # Capabilities: a device is listed under each of its definition entries.
+    "command": lambda device: device.definition.commands,
+    "state": lambda device: device.definition.states,
+    "ui_profile": lambda device: device.definition.ui_profiles,
+    "ui_classifier": lambda device: device.definition.ui_classifiers,
+}
+
+# Insertion-ordered set of device URLs.
+_Bucket = dict[str, None]
+
+# Events after which the place tree no longer matches the server.
+_PLACE_EVENT_NAMES = frozenset(
+    {EventName.PLACE_CREATED, EventName.PLACE_UPDATED, EventName.PLACE_DELETED}
+)
+
+
+class PlaceTree:
+    """A place tree flattened into pre-order arrays for O(1) navigation.
+
+    Each place gets the position of its pre-order visit; its subtree occupies
+    the contiguous range of positions up to ``end`` (exclusive). Parent
+    pointers, depths and subtree ranges are precomputed, so ancestry checks
+    are constant time and subtrees and root paths are slices and pointer
+    chases rather than recursive walks.
+    """
+
+    def __init__(self, root: Place | None = None) -> None:
+        """Flatten the tree below *root* (an empty tree if None)."""
+        self._places: list[Place] = []
+        self._parents: list[int] = []
+        self._depths: list[int] = []
+        self._ends: list[int] = []
+        self._positions: dict[str, int] = {}
+        if root is None:
+            return
+
+        # Iterative pre-order walk; the end of a subtree is set when its
+        # marker is popped, after all of its descendants were visited.
+        stack: list[tuple[Place, int, int] | int] = [(root, -1, 0)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, int):
+                self._ends[item] = len(self._places)
+                continue
+            place, parent, depth = item
+            position = len(self._places)
+            self._places.append(place)
+            self._parents.append(parent)
+            self._depths.append(depth)
+            self._ends.append(position + 1)
+            self._positions[place.oid] = position
+            stack.append(position)
+            stack.extend(
+                (child, position, depth + 1) for child in reversed(place.sub_places)
+            )
+
+    @property
+    def root(self) -> Place | None:
+        """Return the root place, or None for an empty tree."""
+        return self._places[0] if self._places else None
+
+    def __len__(self) -> int:
+        """Return the number of places."""
+        return len(self._places)
+
+    def __iter__(self) -> Iterator[Place]:
+        """Iterate over the places in pre-order."""
+        return iter(self._places)
+
+    def __contains__(self, oid: object) -> bool:
+        """Return True if a place with this OID is in the tree."""
+        return oid in self._positions
+
+    def get(self, oid: str) -> Place | None:
+        """Return the place with this OID, or None."""
+        position = self._positions.get(oid)
+        return None if position is None else self._places[position]
+
+    def parent(self, oid: str) -> Place | None:
+        """Return the parent of a place, or None for the root or an unknown OID."""
+        position = self._positions.get(oid)
+        if position is None or self._parents[position] < 0:
+            return None
+        return self._places[self._parents[position]]
+
+    def depth(self, oid: str) -> int | None:
+        """Return the depth of a place (0 for the root), or None if unknown."""
+        position = self._positions.get(oid)
+        return None if position is None else self._depths[position]
+
+    def path(self, oid: str) -> list[Place]:
+        """Return the places from the root down to (and including) this place."""
+        position = self._positions.get(oid, -1)
+        path = []
+        while position >= 0:
+            path.append(self._places[position])
+            position = self._parents[position]
+        path.reverse()
+        return path
+
+    def subtree(self, oid: str) -> list[Place]:
+        """Return a place and all of its descendants, in pre-order."""
+        position = self._positions.get(oid)
+        if position is None:
+            return []
+        return self._places[position : self._ends[position]]
+
+    def subtree_oids(self, oid: str) -> list[str]:
+        """Return the OIDs of a place and all of its descendants."""
+        return [place.oid for place in self.subtree(oid)]
+
+    def is_ancestor(self, ancestor_oid: str, oid: str) -> bool:
+        """Return True if *oid* is *ancestor_oid* or one of its descendants."""
+        ancestor = self._positions.get(ancestor_oid)
+        position = self._positions.get(oid)
+        if ancestor is None or position is None:
+            return False
+        return ancestor <= position < self._ends[ancestor]
+
+
+class PhysicalDevice:
+    """The devices (subsystems) sharing one ``base_device_url``.
+
+    Multi-function products such as heaters or heat pumps expose each function
+    as a separate device ``<base>#1``, ``<base>#2``, … . The devices are
+    ordered by subsystem id, so the main device (``#1``, or the device without
+    a subsystem id) comes first. The view reads the device states directly, so
+    it reflects state changes; devices updated by `SetupIndex.observe_events()`
+    (e.g. availability) are replaced by copies, so take a new view from the
+    index to see them.
+    """
+
+    __slots__ = ("base_device_url", "devices")
+
+    def __init__(self, base_device_url: str, devices: list[Device]) -> None:
+        """Group *devices*, which must all share *base_device_url*."""
+        self.base_device_url = base_device_url
+        self.devices = sorted(
+            devices, key=lambda device: device.identifier.subsystem_id or 0
+        )
+
+    def __repr__(self) -> str:
+        """Return a short representation listing the subsystem URLs."""
+        return f"PhysicalDevice({[device.device_url for device in self.devices]!r})"
+
+    @property
+    def main(self) -> Device:
+        """Return the main device of the group."""
+        return self.devices[0]
+
+    @property
+    def sub_devices(self) -> list[Device]:
+        """Return the devices other than the main device."""
+        return self.devices[1:]
+
+    @property
+    def available(self) -> bool:
+        """Return True if every device of the group is available."""
+        return all(device.available for device in self.devices)
+
+    @property
+    def any_available(self) -> bool:
+        """Return True if at least one device of the group is available."""
+        return any(device.available for device in self.devices)
+
+    def get_state(self, name: StateName) -> State | None:
+        """Return a state from the first device (main first) that has a value."""
+        for device in self.devices:
+            state = device.states.first([name])
+            if state is not None:
+                return state
+        return None
+
+    def get_state_value(self, name: StateName) -> StateType:
+        """Return the value of `get_state()`, or None."""
+        state = self.get_state(name)
+        return None if state is None else state.value
+
+    def get_state_values(self, name: StateName) -> dict[str, StateType]:
+        """Return the value of a state for every device that has it, by URL."""
+        return {
+            device.device_url: device.states[name].value
+            for device in self.devices
+            if name in device.states
+        }
+
+    def actions(self, *commands: Command) -> list[Action]:
+        """Return one action per device of the group supporting all *commands*.
+
+        Pass the result to `execute_action_group()` to address the whole
+        physical device in a single action group.
+        """
+        return [
+            Action(device_url=device.device_url, commands=list(commands))
+            for device in self.devices
+            if all(device.supports_command(command.name) for command in commands)
+        ]
+
+
+class SetupIndex:
+    """Devices, gateways, places and zones of a setup, indexed for lookups.
+
+    Devices can be looked up by URL or queried by ``place_oid``, ``ui_class``,
+    ``widget``, ``protocol``, ``gateway_id``, ``controllable_name``,
+    ``base_device_url`` and ``zone_oid``, and by capability: ``command``,
+    ``state``, ``ui_profile`` and ``ui_classifier`` (from the device
+    definition). `query()` combines several keys and always starts from the
+    smallest matching bucket. Results keep the order of
+    the setup's device list. The place tree is kept as a `PlaceTree`, so the
+    devices of a place and all places below it are found without a tree walk.
+
+    After `OverkizClient.get_setup(refresh=True)`, `apply_diff()` updates the
+    index from the `SetupDiff` of the refresh instead of rebuilding it.
+
+    `observe_events()` applies device removals, updates and availability
+    changes, zone changes and gateway moves. The devices, gateways and zones
+    of the loaded setup are never modified: an updated one is replaced in the
+    index by a copy, so `get()` and queries return the updated copy while
+    `client.devices` keeps the objects as loaded. A `GatewayPlaceUpdatedEvent`
+    moves the gateway and those of its internal modules (pod, alarm, …) that
+    were in the gateway's place. A `DeviceCreatedEvent` does not carry the
+    device definition, so it only sets `stale`, as does a gateway move without
+    a place; reload the index from a refreshed setup to catch up. Place events,
+    and gateway moves to a place missing from the tree, set `places_stale`
+    until the tree is reloaded with `load_places()`; the index cannot fetch
+    places itself, so `OverkizClient.get_places()` does that reload.
+    """
+
+    def __init__(self, setup: Setup | None = None) -> None:
+        """Create an index, optionally loading *setup* right away."""
+        self._devices: dict[str, Device] = {}
+        # Device URL -> insertion sequence number, to return results in order.
+        self._positions: dict[str, int] = {}
+        self._next_position = 0
+        self._indexes: dict[str, dict[Hashable, _Bucket]] = {
+            key: {} for key in (*_DEVICE_KEYS, "zone_oid")
+        }
+        self._gateways: dict[str, Gateway] = {}
+        self._place_tree = PlaceTree()
+        self._zones: dict[str, Zone] = {}
+        # URLs of devices replaced by copies carrying event updates.
+        self._event_copies: set[str] = set()
+        self.stale = False
+        self.places_stale = False
+        if setup is not None:
+            self.load(setup)
+
+    def load(self, setup: Setup) -> None:
+        """Rebuild every index from *setup*."""
+        self.load_devices(setup.devices)
+        self._load_setup_entities(setup)
+
+    def load_devices(self, devices: Iterable[Device]) -> None:
+        """Rebuild the device indexes from *devices*, keeping zones and places."""
+        self._devices = {}
+        self._positions = {}
+        self._event_copies = set()
+        for key in _DEVICE_KEYS:
+            self._indexes[key] = {}
+        for device in devices:
+            self.add_device(device)
+        self.stale = False
+
+    def apply_diff(self, diff: SetupDiff, setup: Setup) -> None:
+        """Bring an index loaded from the old side of *diff* up to *setup*.
+
+        *setup* is the new side of *diff*. Only the added, removed and changed
+        devices are (re-)indexed; the others are swapped for the objects of
+        *setup* under their existing keys, except devices already replaced by
+        event updates, which keep those updates. Gateways, zones and the place
+        tree are reloaded from *setup*. Results then follow the order of
+        *setup*, as after `load()`.
+        """
+        for device in diff.removed_devices:
+            self.remove_device(device.device_url)
+        for change in diff.changed_devices:
+            self._event_copies.discard(change.device_url)
+            if change.device_url in self._devices:
+                self._replace_device(change.new)
+            else:
+                self.add_device(change.new)
+        for device in diff.added_devices:
+            self.add_device(device)
+
+        devices: dict[str, Device] = {}
+        for position, device in enumerate(setup.devices):
+            current = self._devices.get(device.device_url)
+            if current is None:
+                self.add_device(device)
+                current = device
+            elif device.device_url not in self._event_copies:
+                current = device
+            devices[device.device_url] = current
+            self._positions[device.device_url] = position
+        for device_url in self._devices.keys() - devices.keys():
+            self.remove_device(device_url)
+        self._devices = devices
+        self._next_position = len(devices)
+        self.stale = False
+        self._load_setup_entities(setup)
+
+    def _load_setup_entities(self, setup: Setup) -> None:
+        """Load the gateways, place tree and zones of *setup*."""
+        self._gateways = {gateway.gateway_id: gateway for gateway in setup.gateways}
+        self.load_places(setup.root_place)
+        self._zones = {}
+        self._indexes["zone_oid"] = {}
+        for zone in setup.zones or ():
+            self._zones[zone.oid] = zone
+            self._set_zone_members(zone.oid, (item.device_url for item in zone.items))
+
+    def load_places(self, root: Place | None) -> None:
+        """Replace the place tree, e.g. with the result of `get_places()`."""
+        self._place_tree = PlaceTree(root)
+        self.places_stale = False
+
+    @property
+    def devices(self) -> list[Device]:
+        """Return the indexed devices in setup order."""
+        return list(self._devices.values())
+
+    @property
+    def gateways(self) -> dict[str, Gateway]:
+        """Return the gateways by gateway id."""
+        return self._gateways
+
+    @property
+    def places(self) -> PlaceTree:
+        """Return the flattened place tree."""
+        return self._place_tree
+
+    @property
+    def zones(self) -> dict[str, Zone]:
+        """Return the zones by OID."""
+        return self._zones
+
+    def __len__(self) -> int:
+        """Return the number of indexed devices."""
+        return len(self._devices)
+
+    def __iter__(self) -> Iterator[Device]:
+        """Iterate over the indexed devices in setup order."""
+        return iter(self._devices.values())
+
+    def __contains__(self, device_url: object) -> bool:
+        """Return True if a device with this URL is indexed."""
+        return device_url in self._devices
+
+    def get(self, device_url: str) -> Device | None:
+        """Return the device with this URL, or None."""
+        return self._devices.get(device_url)
+
+    def add_device(self, device: Device) -> None:
+        """Index *device*, replacing a device with the same URL."""
+        self.remove_device(device.device_url)
+        self._devices[device.device_url] = device
+        self._positions[device.device_url] = self._next_position
+        self._next_position += 1
+        for key, extract in _DEVICE_KEYS.items():
+            for value in extract(device):
+                if value is not None:
+                    self._indexes[key].setdefault(value, {})[device.device_url] = None
+
+    def _replace_device(self, device: Device) -> None:
+        """Re-index an updated copy of an indexed device, keeping its position."""
+        previous = self._devices[device.device_url]
+        for key, extract in _DEVICE_KEYS.items():
+            for value in extract(previous):
+                _discard(self._indexes[key], value, device.device_url)
+        self._devices[device.device_url] = device
+        for key, extract in _DEVICE_KEYS.items():
+            for value in extract(device):
+                if value is not None:
+                    self._indexes[key].setdefault(value, {})[device.device_url] = None
+
+    def _replace_updated_device(self, device: Device) -> None:
+        """Re-index a copy of an indexed device carrying event updates."""
+        self._event_copies.add(device.device_url)
+        self._replace_device(device)
+
+    def remove_device(self, device_url: str) -> Device | None:
+        """Drop a device from the device indexes and return it, if indexed."""
+        device = self._devices.pop(device_url, None)
+        if device is None:
+            return None
+        del self._positions[device_url]
+        self._event_copies.discard(device_url)
+        for key, extract in _DEVICE_KEYS.items():
+            for value in extract(device):
+                _discard(self._indexes[key], value, device_url)
+        return device
+
+    def by_place(self, place_oid: str, *, recursive: bool = False) -> list[Device]:
+        """Return the devices assigned to a place.
+
+        With *recursive*, devices assigned to any place below it (e.g. the
+        rooms of a floor) are included too.
+        """
+        if recursive:
+            return self.query(within_place=place_oid)
+        return self.query(place_oid=place_oid)
+
+    def by_ui_class(self, ui_class: str) -> list[Device]:
+        """Return the devices of a UI class."""
+        return self.query(ui_class=ui_class)
+
+    def by_widget(self, widget: str) -> list[Device]:
+        """Return the devices using a widget."""
+        return self.query(widget=widget)
+
+    def by_protocol(self, protocol: str) -> list[Device]:
+        """Return the devices of a protocol."""
+        return self.query(protocol=protocol)
+
+    def by_gateway(self, gateway_id: str) -> list[Device]:
+        """Return the devices attached to a gateway."""
+        return self.query(gateway_id=gateway_id)
+
+    def by_controllable_name(self, controllable_name: str) -> list[Device]:
+        """Return the devices with a controllable name."""
+        return self.query(controllable_name=controllable_name)
+
+    def by_base_device_url(self, base_device_url: str) -> list[Device]:
+        """Return every device (and sub-device) of one physical device."""
+        return self.query(base_device_url=base_device_url)
+
+    def by_zone(self, zone_oid: str) -> list[Device]:
+        """Return the devices that are members of a zone."""
+        return self.query(zone_oid=zone_oid)
+
+    def by_command(self, command: str) -> list[Device]:
+        """Return the devices whose definition supports a command."""
+        return self.query(command=command)
+
+    def by_state(self, state: str) -> list[Device]:
+        """Return the devices whose definition declares a state."""
+        return self.query(state=state)
+
+    def by_ui_profile(self, ui_profile: str) -> list[Device]:
+        """Return the devices declaring a UI profile."""
+        return self.query(ui_profile=ui_profile)
+
+    def by_ui_classifier(self, ui_classifier: str) -> list[Device]:
+        """Return the devices declaring a UI classifier."""
+        return self.query(ui_classifier=ui_classifier)
+
+    def physical_device(self, device_url: str) -> PhysicalDevice | None:
+        """Return the physical device that a device (or base URL) belongs to."""
+        device = self._devices.get(device_url)
+        base_device_url = (
+            device.identifier.base_device_url if device is not None else device_url
+        )
+        devices = self.by_base_device_url(base_device_url)
+        return PhysicalDevice(base_device_url, devices) if devices else None
+
+    def physical_devices(self, *, grouped_only: bool = False) -> list[PhysicalDevice]:
+        """Return every physical device, in setup order.
+
+        With *grouped_only*, only physical devices exposing more than one
+        device are returned.
+        """
+        groups = []
+        for base_device_url, bucket in self._indexes["base_device_url"].items():
+            if grouped_only and len(bucket) <= 1:
+                continue
+            groups.append(
+                PhysicalDevice(
+                    str(base_device_url), [self._devices[url] for url in bucket]
+                )
+            )
+        groups.sort(
+            key=lambda group: min(
+                self._positions[device.device_url] for device in group.devices
+            )
+        )
+        return groups
+
+    def keys(self, key: str) -> list[Hashable]:
+        """Return the values indexed under *key*, e.g. every known command.
+
+        Raises:
+            TypeError: *key* is not an indexed key.
+        """
+        index = self._indexes.get(key)
+        if index is None:
+            raise TypeError(f"Unknown setup index key {key!r}")
+        return list(index)
+
+    def query(
+        self,
+        *,
+        predicate: Callable[[Device], bool] | None = None,
+        **filters: Any,
+    ) -> list[Device]:
+        """Return the devices matching every given filter.
+
+        Each keyword filters on one index key (see the class docstring). A
+        filter value can be a single key or a list, set or tuple of keys to
+        match any of them. ``within_place`` matches the devices of a place and
+        of every place below it. With no filter, every device matches.
+        *predicate* is applied last, to the already narrowed devices.
+
+        Raises:
+            TypeError: A filter keyword is not an indexed key.
+        """
+        candidates = [
+            self._bucket("place_oid", self._place_tree.subtree_oids(value))
+            if key == "within_place"
+            else self._bucket(key, value)
+            for key, value in filters.items()
+        ]
+
+        urls: Iterable[str]
+        if not candidates:
+            urls = self._devices
+        else:
+            candidates.sort(key=len)
+            smallest, *others = candidates
+            urls = sorted(
+                (
+                    url
+                    for url in smallest
+                    if url in self._positions
+                    and all(url in bucket for bucket in others)
+                ),
+                key=self._positions.__getitem__,
+            )
+
+        devices = [self._devices[url] for url in urls]
+        if predicate is not None:
+            return [device for device in devices if predicate(device)]
+        return devices
+
+    def _bucket(self, key: str, value: Any) -> _Bucket:
+        """Return the device URLs matching one filter."""
+        index = self._indexes.get(key)
+        if index is None:
+            raise TypeError(f"Unknown setup index key {key!r}")
+        if not isinstance(value, list | set | frozenset | tuple):
+            return index.get(value, {})
+        bucket: _Bucket = {}
+        for item in value:
+            bucket.update(index.get(item, {}))
+        return bucket
+
+    def observe_events(self, events: Iterable[Event]) -> None:
+        """Apply fetched device and zone events to the index."""
+        for event in events:
+            if isinstance(event, DeviceRemovedEvent):
+                self.remove_device(event.device_url)
+                self._remove_zone_member(event.device_url)
+            elif isinstance(event, DeviceAvailableEvent | DeviceUnavailableEvent):
+                available = isinstance(event, DeviceAvailableEvent)
+                device = self._devices.get(event.device_url)
+                if device is not None and device.available != available:
+                    device = copy.copy(device)
+                    device.available = available
+                    self._replace_updated_device(device)
+            elif isinstance(event, DeviceUpdatedEvent):
+                self._update_device(event)
+            elif isinstance(event, DeviceCreatedEvent):
+                if event.device_url not in self._devices:
+                    self.stale = True
+            elif isinstance(event, ZoneCreatedEvent | ZoneUpdatedEvent):
+                self._update_zone(event)
+            elif isinstance(event, GatewayPlaceUpdatedEvent):
+                self._move_gateway(event)
+            elif event.name in _PLACE_EVENT_NAMES:
+                self.places_stale = True
+            elif isinstance(event, ZoneDeletedEvent):
+                self._zones.pop(event.zone_oid, None)
+                self._indexes["zone_oid"].pop(event.zone_oid, None)
+
+    def _update_device(self, event: DeviceUpdatedEvent) -> None:
+        device = self._devices.get(event.device_url)
+        if device is None:
+            self.stale = True
+            return
+        device = copy.copy(device)
+        if event.label is not None:
+            device.label = event.label
+        if event.metadata is not None:
+            device.metadata = event.metadata
+        if event.place_oid is not None:
+            device.place_oid = event.place_oid
+        if event.controllable_name is not None:
+            device.controllable_name = event.controllable_name
+        self._replace_updated_device(device)
+
+    def _move_gateway(self, event: GatewayPlaceUpdatedEvent) -> None:
+        """Move a gateway, and its internal modules that shared its place."""
+        if event.place_oid is None:
+            self.stale = True
+            return
+        gateway = self._gateways.get(event.gateway_id)
+        if gateway is not None:
+            self._gateways[event.gateway_id] = evolve(
+                gateway, place_oid=event.place_oid
+            )
+        # Modules such as the pod or alarm follow the gateway unless they were
+        # assigned to a place of their own.
+        previous = gateway.place_oid if gateway is not None else None
+        for device in self.query(
+            gateway_id=event.gateway_id, protocol=Protocol.INTERNAL
+        ):
+            if device.place_oid in (previous, None):
+                moved = copy.copy(device)
+                moved.place_oid = event.place_oid
+                self._replace_updated_device(moved)
+        if event.place_oid not in self._place_tree:
+            self.places_stale = True
+
+    def _update_zone(self, event: ZoneCreatedEvent | ZoneUpdatedEvent) -> None:
+        """Replace a zone by a copy with the label, type and members of *event*."""
+        zone = self._zones.get(event.zone_oid)
+        known = {item.device_url: item for item in zone.items} if zone else {}
+        items = [
+            known.get(device_url)
+            or ZoneItem(
+                item_type="device",
+                device_oid=getattr(self._devices.get(device_url), "oid", None) or "",
+                device_url=device_url,
+            )
+            for device_url in event.device_urls
+        ]
+        timestamp = event.timestamp or 0
+        if zone is None:
+            zone = Zone(
+                creation_time=timestamp,
+                last_update_time=timestamp,
+                label=event.label or "",
+                type=event.type or 0,
+                items=items,
+                oid=event.zone_oid,
+            )
+        else:
+            zone = evolve(
+                zone,
+                last_update_time=event.timestamp or zone.last_update_time,
+                label=zone.label if event.label is None else event.label,
+                type=zone.type if event.type is None else event.type,
+                items=items,
+            )
+        self._zones[event.zone_oid] = zone
+        self._set_zone_members(event.zone_oid, event.device_urls)
+
+    def _remove_zone_member(self, device_url: str) -> None:
+        """Replace every zone listing *device_url* by a copy without it."""
+        for members in self._indexes["zone_oid"].values():
+            members.pop(device_url, None)
+        for zone_oid, zone in self._zones.items():
+            items = [item for item in zone.items if item.device_url != device_url]
+            if len(items) != len(zone.items):
+                self._zones[zone_oid] = evolve(zone, items=items)
+
+    def _set_zone_members(self, zone_oid: str, device_urls: Iterable[str]) -> None:
+        self._indexes["zone_oid"][zone_oid] = dict.fromkeys(device_urls)
+
+
+def _discard(index: dict[Hashable, _Bucket], value: Hashable, device_url: str) -> None:
+    """Remove *device_url* from the bucket *value*, dropping the bucket once empty."""
+    bucket = index.get(value)
+    if bucket is None:
+        return
+    bucket.pop(device_url, None)
+    if not bucket:
+        del index[value]
@@ -0,0 +1,237 @@
+"""Copy-on-write versions of the setup, for consistent reads under event updates.
+
+Applying a batch of events to `Device.states` in place lets a reader that is
+iterating a `States` container observe half of the batch. Deep-copying the
+setup for every reader is too expensive on a large setup. `SetupVersions`
+instead publishes immutable `SetupView`s: taking the current view is a single
+attribute read, and applying a batch builds the next version by copying only
+the devices (and their `States` containers) the batch touches. Untouched
+devices are shared between versions. The new view is published with one
+attribute assignment, so readers never need a lock, and a version is
+reclaimed by the garbage collector once no reader references it.
+
+Views must be treated as read-only: their devices and states are shared with
+later versions.
+"""
+
+from __future__ import annotations
+
+import copy
+from collections.abc import Iterable, Iterator, Mapping
+from types import MappingProxyType
+
+from pyoverkiz.models import (
+    Device,
+    DeviceAvailableEvent,
+    DeviceCreatedEvent,
+    DeviceEvent,
+    DeviceRemovedEvent,
+    DeviceStateChangedEvent,
+    DeviceUnavailableEvent,
+    DeviceUpdatedEvent,
+    Event,
+    Setup,
+    States,
+)
+from pyoverkiz.setup_diff import SetupDiff
+
+
+class SetupView(Mapping[str, Device]):
+    """Immutable view of the devices at one version, keyed by device URL."""
+
+    __slots__ = ("_base", "_devices", "_setup", "version")
+
+    def __init__(
+        self, version: int, devices: dict[str, Device], setup: Setup | None = None
+    ) -> None:
+        """Create a view; *devices* must not be modified afterwards."""
+        self.version = version
+        self._devices = devices
+        self._base = setup
+        self._setup: Setup | None = None
+
+    def __getitem__(self, device_url: str) -> Device:
+        """Return the device with the given URL or raise KeyError."""
+        return self._devices[device_url]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over device URLs, in setup order."""
+        return iter(self._devices)
+
+    def __len__(self) -> int:
+        """Return the number of devices."""
+        return len(self._devices)
+
+    def __repr__(self) -> str:
+        """Return a short representation with the version and device count."""
+        return f"<SetupView version={self.version} devices={len(self._devices)}>"
+
+    @property
+    def devices(self) -> Mapping[str, Device]:
+        """Return a read-only mapping of device URL to device."""
+        return MappingProxyType(self._devices)
+
+    @property
+    def setup(self) -> Setup | None:
+        """Return the setup at this version, or None if only devices were loaded.
+
+        Built on first access: a shallow copy of the loaded setup (sharing its
+        gateways, places and zones) with the devices of this version.
+        """
+        if self._setup is None and self._base is not None:
+            setup = copy.copy(self._base)
+            setup.devices = list(self._devices.values())
+            self._setup = setup
+        return self._setup
+
+    def states(self, device_url: str) -> States | None:
+        """Return the states of a device at this version, or None."""
+        device = self._devices.get(device_url)
+        return device.states if device is not None else None
+
+
+class SetupVersions:
+    """Single writer publishing copy-on-write `SetupView`s.
+
+    Feed it with `load()`, `apply_diff()` and `observe_events()`; readers
+    call `view()`. Writers must not run concurrently with each other.
+
+    A `DeviceCreatedEvent` does not carry the device definition or states, so
+    it does not add the device; like an update of an unknown device, it sets
+    `stale` instead. The versions are not reloaded automatically: refresh the
+    setup (`OverkizClient.get_setup(refresh=True)` applies the changes), which
+    clears the flag.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty store at version 0."""
+        self._devices: dict[str, Device] = {}
+        self._setup: Setup | None = None
+        self._view = SetupView(0, self._devices)
+        self.stale = False
+
+    @property
+    def version(self) -> int:
+        """Return the current version number."""
+        return self._view.version
+
+    def view(self) -> SetupView:
+        """Return the current version; it never changes once returned."""
+        return self._view
+
+    def load(self, setup: Setup) -> SetupView:
+        """Publish a new version holding the devices of *setup*."""
+        return self.load_devices(setup.devices, setup=setup)
+
+    def load_devices(
+        self, devices: Iterable[Device], *, setup: Setup | None = None
+    ) -> SetupView:
+        """Publish a new version holding *devices*.
+
+        The devices are copied, so later changes to them do not leak into the
+        published versions.
+        """
+        copies = {device.device_url: _copy_device(device) for device in devices}
+        self.stale = False
+        return self._publish(copies, setup)
+
+    def apply_diff(self, diff: SetupDiff, setup: Setup) -> SetupView:
+        """Publish a version of *setup*, the new side of *diff*.
+
+        Only the added and changed devices are copied; the devices the diff
+        reports unchanged are shared with the current version, keeping the
+        updates applied by events.
+        """
+        current = self._devices
+        replaced = {change.device_url for change in diff.changed_devices}
+        devices = {}
+        for device in setup.devices:
+            previous = current.get(device.device_url)
+            if previous is None or device.device_url in replaced:
+                previous = _copy_device(device)
+            devices[device.device_url] = previous
+        self.stale = False
+        return self._publish(devices, setup)
+
+    def observe_events(self, events: Iterable[Event]) -> SetupView:
+        """Apply a batch of events as one new version and return it.
+
+        State changes, availability, label, metadata and place updates are
+        applied; removed devices are dropped. The version is unchanged when no
+        event touches a known device. Created devices, and updates of unknown
+        ones, set `stale`.
+        """
+        current = self._devices
+        # Devices copied for the new version; None marks a removed device.
+        touched: dict[str, Device | None] = {}
+        for event in events:
+            if not isinstance(event, DeviceEvent):
+                continue
+            device_url = event.device_url
+            device = (
+                touched[device_url]
+                if device_url in touched
+                else current.get(device_url)
+            )
+            if isinstance(event, DeviceRemovedEvent):
+                if device is not None:
+                    touched[device_url] = None
+                continue
+            if device is None:
+                # Unknown devices cannot be built from their events.
+                if isinstance(event, DeviceCreatedEvent | DeviceUpdatedEvent):
+                    self.stale = True
+                continue
+            if not isinstance(event, _DEVICE_EVENTS):
+                continue
+            if device_url not in touched:
+                device = touched[device_url] = _copy_device(device)
+            _apply(device, event)
+
+        if not touched:
+            return self._view
+        devices = dict(current)
+        for device_url, device in touched.items():
+            if device is None:
+                devices.pop(device_url, None)
+            else:
+                devices[device_url] = device
+        return self._publish(devices, self._setup)
+
+    def _publish(self, devices: dict[str, Device], setup: Setup | None) -> SetupView:
+        view = SetupView(self._view.version + 1, devices, setup)
+        self._devices = devices
+        self._setup = setup
+        self._view = view
+        return view
+
+
+_DEVICE_EVENTS = (
+    DeviceStateChangedEvent,
+    DeviceAvailableEvent,
+    DeviceUnavailableEvent,
+    DeviceUpdatedEvent,
+)
+
+
+def _copy_device(device: Device) -> Device:
+    """Return a shallow copy of *device* with its own `States` container."""
+    clone = copy.copy(device)
+    clone.states = States(list(device.states.values()))
+    return clone
+
+
+def _apply(device: Device, event: Event) -> None:
+    """Apply one event to a device owned by the version being built."""
+    if isinstance(event, DeviceStateChangedEvent):
+        for state in event.device_states:
+            device.states[state.name] = state
+    elif isinstance(event, DeviceAvailableEvent | DeviceUnavailableEvent):
+        device.available = isinstance(event, DeviceAvailableEvent)
+    elif isinstance(event, DeviceUpdatedEvent):
+        if event.label is not None:
+            device.label = event.label
+        if event.metadata is not None:
+            device.metadata = event.metadata
+        if event.place_oid is not None:
+            device.place_oid = event.place_oid
@@ -0,0 +1,308 @@
+"""Columnar mirror of numeric device states.
+
+Fleet-wide questions ("average temperature per room", "shutters closed more
+than 50 %") otherwise walk every `Device.states` mapping. `StateColumns`
+keeps one contiguous ``array("d")`` per numeric state name (`INTEGER`,
+`FLOAT`, `DATE` and `BOOLEAN` states), with one row per device and a
+``bytearray`` marking which rows hold a value. Filters and aggregates then
+scan a single array; with every row present, aggregates run as one builtin
+call over the array. The arrays support the buffer protocol, so they can be
+wrapped by NumPy (``numpy.frombuffer``) without copying.
+
+Rows follow the order of the device list the columns are loaded from (the
+setup index, on the client). `observe_events()` applies state changes in
+place and frees the row of a removed device; `apply_diff()` applies a setup
+refresh the same way. Rows freed by removed devices are reused, so after
+removals the row order no longer matches the device list.
+"""
+
+from __future__ import annotations
+
+import operator
+import statistics
+from array import array
+from collections.abc import Callable, Hashable, Iterable, Mapping, Sequence
+from typing import Literal
+
+from pyoverkiz.enums import DataType
+from pyoverkiz.models import (
+    Device,
+    DeviceRemovedEvent,
+    DeviceStateChangedEvent,
+    Event,
+    State,
+    StateName,
+)
+from pyoverkiz.setup_diff import SetupDiff
+
+Comparison = Literal["<", "<=", "==", "!=", ">=", ">"]
+Aggregate = Literal["count", "sum", "mean", "min", "max"]
+
+_NUMERIC_TYPES = frozenset(
+    {DataType.INTEGER, DataType.FLOAT, DataType.DATE, DataType.BOOLEAN}
+)
+
+_COMPARISONS: dict[str, Callable[[float, float], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    ">": operator.gt,
+}
+
+_AGGREGATES: dict[str, Callable[[Sequence[float]], float]] = {
+    "sum": sum,
+    "mean": statistics.fmean,
+    "min": min,
+    "max": max,
+}
+
+
+def _numeric(state: State) -> float | None:
+    """Return the state value as a float, or None if it is not numeric."""
+    if state.type not in _NUMERIC_TYPES or not isinstance(
+        state.value, int | float | bool
+    ):
+        return None
+    return float(state.value)
+
+
+class StateColumns:
+    """Numeric states of a device list, stored one typed column per state name.
+
+    Row ``i`` of every column belongs to the same device. Rows freed by
+    removed devices are reused when devices are added.
+    """
+
+    def __init__(self, devices: Iterable[Device] = ()) -> None:
+        """Create columns for *devices*."""
+        self._urls: list[str | None] = []
+        self._rows: dict[str, int] = {}
+        self._free: list[int] = []
+        self._columns: dict[str, array[float]] = {}
+        self._present: dict[str, bytearray] = {}
+        self.load(devices)
+
+    def load(self, devices: Iterable[Device]) -> None:
+        """Rebuild every column from *devices*."""
+        self._urls = []
+        self._rows = {}
+        self._free = []
+        self._columns = {}
+        self._present = {}
+        for device in devices:
+            self.add_device(device)
+
+    @property
+    def names(self) -> list[str]:
+        """Return the state names that have a column."""
+        return list(self._columns)
+
+    @property
+    def device_urls(self) -> list[str]:
+        """Return the device URLs in row order."""
+        return [url for url in self._urls if url is not None]
+
+    def __len__(self) -> int:
+        """Return the number of devices with a row."""
+        return len(self._rows)
+
+    def __contains__(self, device_url: object) -> bool:
+        """Return True if the device has a row."""
+        return device_url in self._rows
+
+    def row(self, device_url: str) -> int | None:
+        """Return the row of a device, or None."""
+        return self._rows.get(device_url)
+
+    def column(self, name: StateName) -> array[float]:
+        """Return the column of a state; rows without a value hold 0.0.
+
+        Use `mask()` to tell which rows hold a value.
+        """
+        return self._columns.get(name, array("d"))
+
+    def mask(self, name: StateName) -> bytearray:
+        """Return one byte per row: 1 if the row holds a value for *name*."""
+        return self._present.get(name, bytearray())
+
+    def get(self, device_url: str, name: StateName) -> float | None:
+        """Return the value of one device state, or None."""
+        row = self._rows.get(device_url)
+        present = self._present.get(name)
+        if row is None or present is None or not present[row]:
+            return None
+        return self._columns[name][row]
+
+    def add_device(self, device: Device) -> None:
+        """Add a row for *device* (replacing an existing one) and load its states."""
+        self.remove_device(device.device_url)
+        self.set_states(device.device_url, device.states.values())
+
+    def remove_device(self, device_url: str) -> None:
+        """Free the row of a device."""
+        row = self._rows.pop(device_url, None)
+        if row is None:
+            return
+        self._urls[row] = None
+        for present in self._present.values():
+            present[row] = 0
+        self._free.append(row)
+
+    def set_states(self, device_url: str, states: Iterable[State]) -> None:
+        """Store the numeric values of *states*; other values clear the cell."""
+        row = self._rows.get(device_url)
+        if row is None:
+            row = self._allocate(device_url)
+        for state in states:
+            value = _numeric(state)
+            present = self._present.get(state.name)
+            if value is None:
+                if present is not None:
+                    present[row] = 0
+                continue
+            if present is None:
+                present = self._add_column(state.name)
+            self._columns[state.name][row] = value
+            present[row] = 1
+
+    def apply_diff(self, diff: SetupDiff) -> None:
+        """Apply a setup refresh instead of reloading every column.
+
+        Removed devices free their rows, added devices get a row, and the
+        changed states of changed devices are stored; a removed state clears
+        its cell. Other rows keep their values, including those set by events.
+        """
+        for device in diff.removed_devices:
+            self.remove_device(device.device_url)
+        for device in diff.added_devices:
+            self.add_device(device)
+        for change in diff.changed_devices:
+            if change.states:
+                self.set_states(
+                    change.device_url,
+                    [
+                        State(name=name, type=DataType.NONE) if state is None else state
+                        for name, state in change.states.items()
+                    ],
+                )
+
+    def observe_events(self, events: Iterable[Event]) -> None:
+        """Apply state change events and drop removed devices."""
+        for event in events:
+            if isinstance(event, DeviceStateChangedEvent):
+                self.set_states(event.device_url, event.device_states)
+            elif isinstance(event, DeviceRemovedEvent):
+                self.remove_device(event.device_url)
+
+    def filter(
+        self,
+        name: StateName,
+        comparison: Comparison,
+        value: float,
+        *,
+        devices: Iterable[str] | None = None,
+    ) -> list[str]:
+        """Return the URLs of devices whose state compares true against *value*.
+
+        Devices without a value for *name* never match. Results are in row
+        order, or in the order of *devices* when given.
+        """
+        compare = _COMPARISONS.get(comparison)
+        if compare is None:
+            raise ValueError(f"Unknown comparison {comparison!r}")
+        column = self._columns.get(name)
+        if column is None:
+            return []
+        present = self._present[name]
+        if devices is None:
+            urls = self._urls
+            return [
+                url
+                for url, cell, is_set in zip(urls, column, present, strict=True)
+                if is_set and compare(cell, value) and url is not None
+            ]
+        rows = self._rows
+        return [
+            url
+            for url in devices
+            if (row := rows.get(url)) is not None
+            and present[row]
+            and compare(column[row], value)
+        ]
+
+    def aggregate(
+        self,
+        name: StateName,
+        function: Aggregate,
+        *,
+        devices: Iterable[str] | None = None,
+    ) -> float | None:
+        """Aggregate a state over all rows, or over *devices*.
+
+        Rows without a value are skipped. Returns None when no row has a value,
+        except for ``count`` which returns 0.
+        """
+        return _aggregate(function, self._values(name, devices))
+
+    def aggregate_by(
+        self,
+        name: StateName,
+        function: Aggregate,
+        groups: Mapping[Hashable, Iterable[str]],
+    ) -> dict[Hashable, float | None]:
+        """Aggregate a state per group of device URLs (e.g. per place)."""
+        return {
+            key: _aggregate(function, self._values(name, urls))
+            for key, urls in groups.items()
+        }
+
+    def _values(
+        self, name: StateName, devices: Iterable[str] | None
+    ) -> array[float] | list[float]:
+        column = self._columns.get(name)
+        if column is None:
+            return []
+        present = self._present[name]
+        if devices is None:
+            if present.count(1) == len(present):
+                return column
+            return [
+                cell for cell, is_set in zip(column, present, strict=True) if is_set
+            ]
+        rows = self._rows
+        return [
+            column[row]
+            for url in devices
+            if (row := rows.get(url)) is not None and present[row]
+        ]
+
+    def _allocate(self, device_url: str) -> int:
+        if self._free:
+            row = self._free.pop()
+            self._urls[row] = device_url
+        else:
+            row = len(self._urls)
+            self._urls.append(device_url)
+            for column in self._columns.values():
+                column.append(0.0)
+            for present in self._present.values():
+                present.append(0)
+        self._rows[device_url] = row
+        return row
+
+    def _add_column(self, name: str) -> bytearray:
+        size = len(self._urls)
+        self._columns[name] = array("d", bytes(8 * size))
+        present = self._present[name] = bytearray(size)
+        return present
+
+
+def _aggregate(function: Aggregate, values: array[float] | list[float]) -> float | None:
+    if function == "count":
+        return len(values)
+    reduce = _AGGREGATES.get(function)
+    if reduce is None:
+        raise ValueError(f"Unknown aggregate {function!r}")
+    return reduce(values) if values else None
@@ -0,0 +1,285 @@
+"""Bounded history of device state values.
+
+`States` only holds the latest value of each state, so tracking how a value
+evolved (energy counters, temperatures, …) is left to the caller. The history
+store keeps the last N ``(timestamp, value)`` samples of every state it sees,
+per device, in ring buffers. Timestamps and numeric values (`INTEGER`, `DATE`,
+`FLOAT` and `BOOLEAN` states) are stored in typed arrays, eight bytes (one for
+booleans) per sample, rather than as boxed Python objects; other types fall
+back to a list. Samples are fed from `DeviceStateChangedEvent`s and from
+`get_state()` when the store is enabled on the client.
+"""
+
+from __future__ import annotations
+
+import time
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from pyoverkiz.enums import DataType
+from pyoverkiz.models import (
+    DeviceRemovedEvent,
+    DeviceStateChangedEvent,
+    Event,
+    State,
+)
+from pyoverkiz.types import StateType
+
+# Array type codes for the numeric data types; other types use a list.
+_TYPECODES: dict[DataType, str] = {
+    DataType.INTEGER: "q",
+    DataType.DATE: "q",
+    DataType.FLOAT: "d",
+    DataType.BOOLEAN: "b",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class StateHistorySettings:
+    """Settings for the state history store.
+
+    ``size`` is the number of samples kept per state; older samples are
+    overwritten. ``states`` restricts recording to the given state names
+    (all states are recorded when None).
+    """
+
+    size: int = 256
+    states: frozenset[str] | None = None
+
+    def validate(self) -> None:
+        """Validate configuration values for the store."""
+        if self.size <= 0:
+            raise ValueError(f"size must be positive, got {self.size!r}")
+
+
+class StateHistory:
+    """Ring buffer of ``(timestamp, value)`` samples for one state.
+
+    Timestamps are epoch milliseconds, like `Event.timestamp`. A sample older
+    than the latest one is recorded with the latest timestamp, so samples are
+    always in timestamp order and windowed reads can use a binary search.
+    """
+
+    __slots__ = ("_size", "_start", "_timestamps", "_type", "_values")
+
+    def __init__(self, size: int, data_type: DataType) -> None:
+        """Create an empty history holding at most *size* samples."""
+        self._size = size
+        self._type = data_type
+        self._start = 0
+        self._timestamps = array("q")
+        typecode = _TYPECODES.get(data_type)
+        self._values: array[Any] | list[StateType] = array(typecode) if typecode else []
+
+    @property
+    def type(self) -> DataType:
+        """Return the data type of the recorded state."""
+        return self._type
+
+    @property
+    def typed(self) -> bool:
+        """Return True if values are stored in a typed array."""
+        return isinstance(self._values, array)
+
+    def __len__(self) -> int:
+        """Return the number of samples held."""
+        return len(self._timestamps)
+
+    def __iter__(self) -> Iterator[tuple[int, StateType]]:
+        """Iterate over samples from oldest to newest."""
+        return iter(self.samples())
+
+    def append(self, timestamp: int, value: StateType) -> None:
+        """Record a sample, overwriting the oldest one when full."""
+        count = len(self._timestamps)
+        if count:
+            timestamp = max(timestamp, self._timestamps[(self._start - 1) % count])
+        if isinstance(self._values, array):
+            try:
+                self._store(timestamp, value)
+            except (TypeError, OverflowError):
+                # None, or a value that does not fit the declared type.
+                self._values = self._unbox()
+            else:
+                return
+        self._store(timestamp, value)
+
+    def _store(self, timestamp: int, value: Any) -> None:
+        if len(self._timestamps) < self._size:
+            # Append the value first: a typed array may reject it.
+            self._values.append(value)
+            self._timestamps.append(timestamp)
+            return
+        self._values[self._start] = value
+        self._timestamps[self._start] = timestamp
+        self._start = (self._start + 1) % self._size
+
+    def _unbox(self) -> list[StateType]:
+        """Return the values as a list, oldest first, and reorder the timestamps."""
+        count = len(self._timestamps)
+        values = self._slice(self._values, 0, count)
+        self._timestamps = self._slice(self._timestamps, 0, count)
+        self._start = 0
+        if self._type == DataType.BOOLEAN:
+            return [bool(value) for value in values]
+        return list(values)
+
+    def latest(self) -> tuple[int, StateType] | None:
+        """Return the newest sample, or None if the history is empty."""
+        count = len(self._timestamps)
+        if not count:
+            return None
+        index = (self._start - 1) % count
+        return self._timestamps[index], self._box(self._values[index])
+
+    def timestamps(
+        self, since: int | None = None, until: int | None = None
+    ) -> array[int]:
+        """Return the timestamps of the samples in ``[since, until)``."""
+        first, last = self._bounds(since, until)
+        return self._slice(self._timestamps, first, last)
+
+    def values(
+        self, since: int | None = None, until: int | None = None
+    ) -> Sequence[StateType]:
+        """Return the values of the samples in ``[since, until)``.
+
+        Numeric states return a typed array (booleans as 0 and 1), which can be
+        handed to `statistics`, `sum()` or NumPy without boxing each value.
+        """
+        first, last = self._bounds(since, until)
+        return self._slice(self._values, first, last)
+
+    def samples(
+        self, since: int | None = None, until: int | None = None
+    ) -> list[tuple[int, StateType]]:
+        """Return ``(timestamp, value)`` pairs in ``[since, until)``, oldest first."""
+        first, last = self._bounds(since, until)
+        timestamps = self._slice(self._timestamps, first, last)
+        values = self._slice(self._values, first, last)
+        if self._type == DataType.BOOLEAN and self.typed:
+            return [
+                (timestamp, bool(value))
+                for timestamp, value in zip(timestamps, values, strict=True)
+            ]
+        return list(zip(timestamps, values, strict=True))
+
+    def clear(self) -> None:
+        """Drop every sample."""
+        del self._timestamps[:]
+        del self._values[:]
+        self._start = 0
+
+    def _box(self, value: StateType) -> StateType:
+        if self._type == DataType.BOOLEAN and self.typed:
+            return bool(value)
+        return value
+
+    def _slice(self, buffer: Any, first: int, last: int) -> Any:
+        """Return logical items ``first:last`` of a ring buffer as one sequence."""
+        count = len(buffer)
+        start = (self._start + first) % count if count else 0
+        end = start + (last - first)
+        if end <= count:
+            return buffer[start:end]
+        return buffer[start:] + buffer[: end - count]
+
+    def _bounds(self, since: int | None, until: int | None) -> tuple[int, int]:
+        """Return the logical index range of samples in ``[since, until)``."""
+        count = len(self._timestamps)
+        first = 0 if since is None else self._bisect(since, count)
+        last = count if until is None else self._bisect(until, count)
+        return first, max(first, last)
+
+    def _bisect(self, timestamp: int, count: int) -> int:
+        """Return the logical index of the first sample at or after *timestamp*."""
+        timestamps, start = self._timestamps, self._start
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if timestamps[(start + middle) % count] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class StateHistoryStore:
+    """State histories indexed by device URL and state name.
+
+    Feed it with `observe_events()` and `record_states()`; each state gets its
+    own `StateHistory` the first time a value is recorded for it.
+    """
+
+    def __init__(
+        self,
+        settings: StateHistorySettings | None = None,
+        *,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Create an empty store with the given settings (uses defaults if None)."""
+        self._settings = settings or StateHistorySettings()
+        self._clock = clock
+        self._histories: dict[str, dict[str, StateHistory]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of recorded states across all devices."""
+        return sum(len(histories) for histories in self._histories.values())
+
+    def get(self, device_url: str, name: str) -> StateHistory | None:
+        """Return the history of a device state, or None if nothing was recorded."""
+        histories = self._histories.get(device_url)
+        return histories.get(name) if histories else None
+
+    def get_device(self, device_url: str) -> dict[str, StateHistory]:
+        """Return the histories of a device, keyed by state name."""
+        return dict(self._histories.get(device_url, {}))
+
+    def record(
+        self, device_url: str, state: State, timestamp: int | None = None
+    ) -> None:
+        """Record one state value; *timestamp* defaults to now (epoch ms)."""
+        self.record_states(device_url, (state,), timestamp)
+
+    def record_states(
+        self,
+        device_url: str,
+        states: Iterable[State],
+        timestamp: int | None = None,
+    ) -> None:
+        """Record the values of several states of a device at the same time."""
+        if timestamp is None:
+            timestamp = int(self._clock() * 1000)
+        allowed = self._settings.states
+        histories = self._histories.get(device_url)
+        for state in states:
+            if allowed is not None and state.name not in allowed:
+                continue
+            if histories is None:
+                histories = self._histories.setdefault(device_url, {})
+            history = histories.get(state.name)
+            if history is None:
+                history = histories[state.name] = StateHistory(
+                    self._settings.size, state.type
+                )
+            history.append(timestamp, state.value)
+
+    def remove_device(self, device_url: str) -> None:
+        """Drop the histories of a device."""
+        self._histories.pop(device_url, None)
+
+    def clear(self) -> None:
+        """Drop every history."""
+        self._histories.clear()
+
+    def observe_events(self, events: Iterable[Event]) -> None:
+        """Record state changes and drop removed devices."""
+        for event in events:
+            if isinstance(event, DeviceStateChangedEvent):
+                self.record_states(
+                    event.device_url, event.device_states, event.timestamp
+                )
+            elif isinstance(event, DeviceRemovedEvent):
+                self.remove_device(event.device_url)
@@ -12,8 +12,10 @@ from pyoverkiz.const import (
     REXEL_OAUTH_POLICY,
     REXEL_OAUTH_REDIRECT_URI,
     REXEL_OAUTH_SCOPE,
+    SUPPORTED_SERVERS,
 )
 from pyoverkiz.enums.server import APIType, Server
+from pyoverkiz.exceptions import OverkizError
 from pyoverkiz.models import ServerConfig
 
 
@@ -59,6 +61,25 @@ def create_server_config(
     )
 
 
+def normalize_server(server: ServerConfig | Server | str) -> ServerConfig:
+    """Resolve a server key, `Server` or `ServerConfig` into a `ServerConfig`.
+
+    Raises:
+        OverkizError: *server* is not a supported server key.
+    """
+    if isinstance(server, ServerConfig):
+        return server
+
+    server_key = server.value if isinstance(server, Server) else str(server)
+
+    try:
+        return SUPPORTED_SERVERS[server_key]
+    except KeyError as error:
+        raise OverkizError(
+            f"Unknown server '{server_key}'. Provide a supported server key or ServerConfig instance."
+        ) from error
+
+
 def is_overkiz_gateway(gateway_id: str) -> bool:
     """Return if gateway is Overkiz gateway. Can be used to distinguish between the main gateway and an additional gateway."""
     return bool(re.match(r"\d{4}-\d{4}-\d{4}", gateway_id))
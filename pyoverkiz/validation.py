@@ -0,0 +1,155 @@
+"""Client-side validation of commands against cached device definitions.
+
+The server only rejects a malformed command (an unknown command name, too many
+parameters or an out-of-range value) after a full round trip. With the action
+queue enabled, that rejection fails every caller whose actions were merged into
+the same action group. Validating commands before they are sent or queued
+rejects such calls early and keeps them out of shared batches.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from pyoverkiz.exceptions import InvalidCommandError
+from pyoverkiz.models import (
+    Action,
+    Command,
+    CommandParameter,
+    Device,
+    UIProfileDefinition,
+    ValuePrototype,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class _CommandSpec:
+    """Precomputed constraints of one command on one device."""
+
+    nparams: int
+    # Parameter prototypes from each UI profile declaring the command.
+    prototypes: tuple[tuple[CommandParameter, ...], ...] = ()
+
+
+def _accepts(prototype: ValuePrototype, value: object) -> bool:
+    """Return True if *value* satisfies a single value prototype."""
+    if prototype.enum_values is not None:
+        return value in prototype.enum_values
+    if prototype.min_value is None and prototype.max_value is None:
+        return True
+    if isinstance(value, bool) or not isinstance(value, int | float):
+        return False
+    if prototype.min_value is not None and value < prototype.min_value:
+        return False
+    return prototype.max_value is None or value <= prototype.max_value
+
+
+def _parameters_match(
+    parameters: tuple[CommandParameter, ...], values: list[object]
+) -> bool:
+    """Return True if *values* satisfy a command prototype's parameters."""
+    required = sum(1 for parameter in parameters if not parameter.optional)
+    if len(values) < required:
+        return False
+    for parameter, value in zip(parameters, values, strict=False):
+        if parameter.value_prototypes and not any(
+            _accepts(prototype, value) for prototype in parameter.value_prototypes
+        ):
+            return False
+    return True
+
+
+class CommandValidator:
+    """Validates commands against device definitions and UI profile prototypes.
+
+    Each device's supported commands are indexed on first use, combining the
+    parameter count from `Device.definition.commands` with the value ranges of
+    every known `UIProfileDefinition` the device declares. Devices that are not
+    known to the validator are not checked.
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[Device] = (),
+        ui_profiles: Iterable[UIProfileDefinition] = (),
+    ) -> None:
+        """Create a validator for the given devices and UI profile definitions."""
+        self._devices: dict[str, Device] = {}
+        self._profiles: dict[str, UIProfileDefinition] = {}
+        self._index: dict[str, dict[str, _CommandSpec]] = {}
+        self.set_devices(devices)
+        for profile in ui_profiles:
+            self.add_ui_profile(profile)
+
+    def set_devices(self, devices: Iterable[Device]) -> None:
+        """Replace the known devices, e.g. after the setup was refreshed."""
+        self._devices = {device.device_url: device for device in devices}
+        self._index.clear()
+
+    def add_ui_profile(self, profile: UIProfileDefinition) -> None:
+        """Add or replace a UI profile definition used for value ranges."""
+        self._profiles[profile.name] = profile
+        self._index.clear()
+
+    def _device_index(self, device_url: str) -> dict[str, _CommandSpec] | None:
+        index = self._index.get(device_url)
+        if index is not None:
+            return index
+
+        device = self._devices.get(device_url)
+        if device is None:
+            return None
+
+        prototypes: dict[str, list[tuple[CommandParameter, ...]]] = {}
+        for profile_name in device.definition.ui_profiles:
+            profile = self._profiles.get(str(profile_name))
+            if profile is None:
+                continue
+            for command in profile.commands:
+                if command.prototype is not None:
+                    prototypes.setdefault(command.name, []).append(
+                        tuple(command.prototype.parameters)
+                    )
+
+        index = self._index[device_url] = {
+            name: _CommandSpec(
+                nparams=definition.nparams,
+                prototypes=tuple(prototypes.get(name, ())),
+            )
+            for name, definition in device.definition.commands.items()
+        }
+        return index
+
+    def validate_command(self, device_url: str, command: Command) -> None:
+        """Raise `InvalidCommandError` if *command* is invalid for the device."""
+        index = self._device_index(device_url)
+        if index is None:
+            return
+
+        name = str(command.name)
+        spec = index.get(name)
+        if spec is None:
+            raise InvalidCommandError(
+                f"Command {name!r} is not supported by device {device_url}"
+            )
+
+        values: list[object] = list(command.parameters or [])
+        if len(values) > spec.nparams:
+            raise InvalidCommandError(
+                f"Command {name!r} takes at most {spec.nparams} parameter(s), "
+                f"got {len(values)}"
+            )
+        if spec.prototypes and not any(
+            _parameters_match(parameters, values) for parameters in spec.prototypes
+        ):
+            raise InvalidCommandError(
+                f"Invalid parameters {values!r} for command {name!r} on device "
+                f"{device_url}"
+            )
+
+    def validate(self, actions: Iterable[Action]) -> None:
+        """Raise `InvalidCommandError` for the first invalid command in *actions*."""
+        for action in actions:
+            for command in action.commands:
+                self.validate_command(action.device_url, command)
@@ -15,6 +15,15 @@ class MockResponse:
         self.status = status
         self.url = url
 
+    @property
+    def content_length(self) -> int:
+        """Return the payload size in bytes, like aiohttp's Content-Length."""
+        return len(self._text.encode())
+
+    async def read(self) -> bytes:
+        """Return the raw payload asynchronously."""
+        return self._text.encode()
+
     async def text(self) -> str:
         """Return text payload asynchronously."""
         return self._text
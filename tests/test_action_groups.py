@@ -0,0 +1,249 @@
+"""Tests for the persisted action group registry."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
+import pytest
+
+from pyoverkiz.action_groups import ActionGroupCacheSettings, ActionGroupRegistry
+from pyoverkiz.auth.credentials import UsernamePasswordCredentials
+from pyoverkiz.client import OverkizClient, OverkizClientSettings
+from pyoverkiz.converter import converter
+from pyoverkiz.enums import EventName, Server
+from pyoverkiz.models import (
+    Action,
+    ActionGroupCreatedEvent,
+    ActionGroupDeletedEvent,
+    ActionGroupUpdatedEvent,
+    Command,
+    Event,
+    PersistedActionGroup,
+)
+from tests.helpers import MockResponse
+
+FIXTURE = (
+    Path(__file__).parent / "fixtures" / "action_groups" / "action-group-cozytouch.json"
+)
+
+
+def _action_group(oid: str, label: str, *device_urls: str) -> PersistedActionGroup:
+    return PersistedActionGroup(
+        oid=oid,
+        label=label,
+        actions=[
+            Action(device_url=device_url, commands=[Command(name="close")])
+            for device_url in device_urls
+        ],
+    )
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_settings_validate():
+    """A non-positive TTL is rejected."""
+    with pytest.raises(ValueError, match="ttl"):
+        ActionGroupCacheSettings(ttl=0).validate()
+    ActionGroupCacheSettings().validate()
+
+
+def test_lookups_by_oid_label_and_device():
+    """Loaded action groups are indexed by OID, label and device URL."""
+    registry = ActionGroupRegistry()
+    registry.load(
+        [
+            _action_group("ag-1", "Night", "io://1/1", "io://1/2", "io://1/1"),
+            _action_group("ag-2", "Night", "io://1/2"),
+            _action_group("ag-3", "Morning", "io://1/3"),
+        ]
+    )
+
+    assert len(registry) == 3
+    assert "ag-1" in registry
+    assert registry.get("ag-3").label == "Morning"
+    assert registry.get("missing") is None
+    assert [ag.oid for ag in registry.get_by_label("Night")] == ["ag-1", "ag-2"]
+    assert [ag.oid for ag in registry.get_by_device("io://1/1")] == ["ag-1"]
+    assert [ag.oid for ag in registry.get_by_device("io://1/2")] == ["ag-1", "ag-2"]
+    assert registry.get_by_device("io://1/9") == []
+
+
+def test_ttl_marks_registry_stale():
+    """The registry is stale before loading and once the TTL expires."""
+    clock = _Clock()
+    registry = ActionGroupRegistry(ActionGroupCacheSettings(ttl=60), clock=clock)
+    assert registry.stale
+
+    registry.load([])
+    assert not registry.stale
+    clock.now = 60
+    assert registry.stale
+
+
+def test_events_update_registry():
+    """Deletes are applied in place; creates and updates invalidate."""
+    registry = ActionGroupRegistry()
+    registry.load(
+        [
+            _action_group("ag-1", "Night", "io://1/1"),
+            _action_group("ag-2", "Night", "io://1/1"),
+        ]
+    )
+
+    registry.observe_events(
+        [
+            ActionGroupDeletedEvent(
+                name=EventName.ACTION_GROUP_DELETED, action_group_oid="ag-1"
+            )
+        ]
+    )
+    assert "ag-1" not in registry
+    assert [ag.oid for ag in registry.get_by_label("Night")] == ["ag-2"]
+    assert [ag.oid for ag in registry.get_by_device("io://1/1")] == ["ag-2"]
+    assert not registry.stale
+
+    registry.observe_events(
+        [
+            ActionGroupUpdatedEvent(
+                name=EventName.ACTION_GROUP_UPDATED, action_group_oid="ag-2"
+            )
+        ]
+    )
+    assert registry.stale
+
+
+def test_converter_dispatches_action_group_events():
+    """Action group payloads structure into their typed subtypes."""
+    created = converter.structure(
+        {
+            "name": "ActionGroupCreatedEvent",
+            "actionGroupOID": "ag-1",
+            "actionGroupLabel": "Night",
+            "actions": [{"deviceURL": "io://1/1", "commands": []}],
+        },
+        Event,
+    )
+    assert isinstance(created, ActionGroupCreatedEvent)
+    assert created.action_group_oid == "ag-1"
+    assert created.action_group_label == "Night"
+
+    deleted = converter.structure(
+        {"name": "ActionGroupDeletedEvent", "actionGroupOID": "ag-1"}, Event
+    )
+    assert isinstance(deleted, ActionGroupDeletedEvent)
+
+
+class TestClientActionGroupCache:
+    """Tests for the client's cached action group lookups."""
+
+    @pytest.mark.asyncio
+    async def test_listing_is_cached_until_invalidated(self):
+        """Lookups reuse one listing until an action group event arrives."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+            settings=OverkizClientSettings(action_groups=ActionGroupCacheSettings()),
+        )
+        client._event_listener_id = "listener"
+        payload = FIXTURE.read_text(encoding="utf-8")
+        first = json.loads(payload)[0]
+
+        with patch.object(
+            aiohttp.ClientSession,
+            "get",
+            side_effect=lambda *args, **kwargs: MockResponse(payload),
+        ) as get:
+            action_groups = await client.get_action_groups()
+            assert await client.get_action_group(first["oid"]) is action_groups[0]
+            assert await client.get_action_groups_by_label(first["label"])
+            assert await client.get_action_groups_for_device(
+                first["actions"][0]["deviceURL"]
+            )
+            assert get.call_count == 1
+
+            with patch.object(
+                client,
+                "_post",
+                new=AsyncMock(
+                    return_value=[
+                        {
+                            "name": "ActionGroupCreatedEvent",
+                            "actionGroupOID": "new",
+                        }
+                    ]
+                ),
+            ):
+                await client.fetch_events()
+
+            await client.get_action_groups()
+            assert get.call_count == 2
+
+            await client.get_action_groups(refresh=True)
+            assert get.call_count == 3
+
+        client._event_listener_id = None
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_lookups_without_cache_fetch_each_time(self):
+        """Without the cache, lookups still work against a fresh listing."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+        )
+        payload = FIXTURE.read_text(encoding="utf-8")
+        first = json.loads(payload)[0]
+
+        with patch.object(
+            aiohttp.ClientSession,
+            "get",
+            side_effect=lambda *args, **kwargs: MockResponse(payload),
+        ) as get:
+            action_group = await client.get_action_group(first["oid"])
+            assert action_group is not None
+            assert action_group.oid == first["oid"]
+            await client.get_action_groups()
+            assert get.call_count == 2
+
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_empty_cache_is_invalidated_by_events(self):
+        """An account without action groups still picks up a created one."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+            settings=OverkizClientSettings(action_groups=ActionGroupCacheSettings()),
+        )
+        client._event_listener_id = "listener"
+
+        with patch.object(
+            aiohttp.ClientSession,
+            "get",
+            side_effect=lambda *args, **kwargs: MockResponse("[]"),
+        ) as get:
+            assert await client.get_action_groups() == []
+            with patch.object(
+                client,
+                "_post",
+                new=AsyncMock(
+                    return_value=[
+                        {"name": "ActionGroupCreatedEvent", "actionGroupOID": "new"}
+                    ]
+                ),
+            ):
+                await client.fetch_events()
+            await client.get_action_groups()
+            assert get.call_count == 2
+
+        client._event_listener_id = None
+        await client.close()
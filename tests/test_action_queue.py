@@ -5,7 +5,15 @@ from unittest.mock import AsyncMock
 
 import pytest
 
-from pyoverkiz.action_queue import ActionQueue, ActionQueueSettings, QueuedExecution
+from pyoverkiz.action_queue import (
+    ActionQueue,
+    ActionQueueSettings,
+    FlushReason,
+    QueuedExecution,
+    QueuePriority,
+    _AdaptiveWindow,
+    _PendingBatch,
+)
 from pyoverkiz.enums import ExecutionMode, OverkizCommand
 from pyoverkiz.models import Action, Command
 
@@ -113,57 +121,91 @@ async def test_action_queue_max_actions_flush(mock_executor):
 
 
 @pytest.mark.asyncio
-async def test_action_queue_mode_change_flush(mock_executor):
-    """Test that queue flushes when command mode changes."""
-    queue = ActionQueue(executor=mock_executor, settings=ActionQueueSettings(delay=0.5))
+async def test_action_queue_mode_change_opens_separate_bucket(mock_executor):
+    """Test that a different mode on another device batches separately."""
+    queue = ActionQueue(executor=mock_executor, settings=ActionQueueSettings(delay=0.1))
+
+    queued1 = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="close")])]
+    )
+    queued2 = await queue.add(
+        [Action(device_url="io://1234-5678-9012/2", commands=[Command(name="close")])],
+        mode=ExecutionMode.INTERNAL,
+    )
+
+    # Neither batch is forced out by the other.
+    assert not queued1.is_done()
+    assert not queued2.is_done()
+    assert queue.get_pending_count() == 2
+
+    assert await queued1 == "exec-1-None-None"
+    assert await queued2 == "exec-1-internal-None"
+    assert queue.stats.flush_reasons[FlushReason.TIMER] == 2
+    assert queue.stats.flush_reasons[FlushReason.DEVICE_CONFLICT] == 0
+
+
+@pytest.mark.asyncio
+async def test_action_queue_mode_change_on_same_device_flushes(mock_executor):
+    """Test that a different mode on a pending device dispatches that bucket first."""
+    queue = ActionQueue(executor=mock_executor, settings=ActionQueueSettings(delay=0.1))
 
     action = Action(
         device_url="io://1234-5678-9012/1",
         commands=[Command(name=OverkizCommand.CLOSE)],
     )
 
-    # Add action with normal mode
     queued1 = await queue.add([action], mode=None)
+    queued2 = await queue.add([action], mode=ExecutionMode.INTERNAL)
 
-    # Add action with high priority - should flush previous batch
-    queued2 = await queue.add([action], mode=ExecutionMode.HIGH_PRIORITY)
+    assert queued1.is_done()
+    assert not queued2.is_done()
+    assert await queued1 != await queued2
+    assert mock_executor.call_count == 2
+    assert queue.stats.flush_reasons[FlushReason.DEVICE_CONFLICT] == 1
 
-    # Wait for both batches
-    exec_id1 = await queued1
-    exec_id2 = await queued2
 
-    # Should be different exec_ids (different batches)
-    assert exec_id1 != exec_id2
+@pytest.mark.asyncio
+async def test_action_queue_label_change_opens_separate_bucket(mock_executor):
+    """Test that a different label on another device batches separately."""
+    queue = ActionQueue(executor=mock_executor, settings=ActionQueueSettings(delay=0.1))
 
-    # Should have been called twice
-    assert mock_executor.call_count == 2
+    queued1 = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="close")])],
+        label="label1",
+    )
+    queued2 = await queue.add(
+        [Action(device_url="io://1234-5678-9012/2", commands=[Command(name="close")])],
+        label="label2",
+    )
+
+    assert not queued1.is_done()
+    assert not queued2.is_done()
+    assert queue.get_pending_count() == 2
+
+    assert await queued1 == "exec-1-None-label1"
+    assert await queued2 == "exec-1-None-label2"
+    assert queue.stats.flush_reasons[FlushReason.TIMER] == 2
+    assert queue.stats.flush_reasons[FlushReason.DEVICE_CONFLICT] == 0
 
 
 @pytest.mark.asyncio
-async def test_action_queue_label_change_flush(mock_executor):
-    """Test that queue flushes when label changes."""
-    queue = ActionQueue(executor=mock_executor, settings=ActionQueueSettings(delay=0.5))
+async def test_action_queue_label_change_on_same_device_flushes(mock_executor):
+    """Test that a different label on a pending device dispatches that bucket first."""
+    queue = ActionQueue(executor=mock_executor, settings=ActionQueueSettings(delay=0.1))
 
     action = Action(
         device_url="io://1234-5678-9012/1",
         commands=[Command(name=OverkizCommand.CLOSE)],
     )
 
-    # Add action with label1
     queued1 = await queue.add([action], label="label1")
-
-    # Add action with label2 - should flush previous batch
     queued2 = await queue.add([action], label="label2")
 
-    # Wait for both batches
-    exec_id1 = await queued1
-    exec_id2 = await queued2
-
-    # Should be different exec_ids (different batches)
-    assert exec_id1 != exec_id2
-
-    # Should have been called twice
+    assert queued1.is_done()
+    assert not queued2.is_done()
+    assert await queued1 != await queued2
     assert mock_executor.call_count == 2
+    assert queue.stats.flush_reasons[FlushReason.DEVICE_CONFLICT] == 1
 
 
 @pytest.mark.asyncio
@@ -368,6 +410,18 @@ async def test_action_queue_settings_validate():
     with pytest.raises(ValueError, match="at least 1"):
         ActionQueueSettings(max_actions=0).validate()
 
+    with pytest.raises(ValueError, match="interactive_delay"):
+        ActionQueueSettings(interactive_delay=-0.1).validate()
+
+    with pytest.raises(ValueError, match="interactive_max_actions"):
+        ActionQueueSettings(interactive_max_actions=0).validate()
+
+    with pytest.raises(ValueError, match="min_delay"):
+        ActionQueueSettings(min_delay=-0.1).validate()
+
+    with pytest.raises(ValueError, match="max_delay"):
+        ActionQueueSettings(min_delay=0.5, max_delay=0.1).validate()
+
     # Valid settings should not raise
     ActionQueueSettings(delay=0.5, max_actions=10).validate()
 
@@ -456,3 +510,637 @@ async def test_action_queue_no_self_cancel_during_delayed_flush():
 
     assert exec_id == "exec-ok"
     assert not cancel_detected, "_delayed_flush cancelled itself via _prepare_flush"
+
+
+@pytest.mark.asyncio
+async def test_action_queue_single_partition_by_default(mock_executor):
+    """Test that devices on different gateways share one batch by default."""
+    queue = ActionQueue(executor=mock_executor, settings=ActionQueueSettings(delay=0.1))
+
+    queued1 = await queue.add(
+        [Action(device_url="io://1111-1111-1111/1", commands=[Command(name="close")])]
+    )
+    queued2 = await queue.add(
+        [Action(device_url="io://2222-2222-2222/1", commands=[Command(name="close")])]
+    )
+
+    assert await queued1 == await queued2
+    mock_executor.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_action_queue_partition_by_gateway(mock_executor):
+    """Test that each gateway gets its own batch when partitioning is enabled."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(delay=0.1, partition_by_gateway=True),
+    )
+
+    queued_a1 = await queue.add(
+        [Action(device_url="io://1111-1111-1111/1", commands=[Command(name="close")])]
+    )
+    queued_b = await queue.add(
+        [Action(device_url="rts://2222-2222-2222/1", commands=[Command(name="open")])]
+    )
+    queued_a2 = await queue.add(
+        [Action(device_url="io://1111-1111-1111/2", commands=[Command(name="close")])]
+    )
+    assert queue.get_pending_count() == 3
+
+    assert await queued_a1 == await queued_a2
+    await queued_b
+    assert mock_executor.call_count == 2
+
+    batches = sorted(
+        [action.device_url for action in call.args[0]]
+        for call in mock_executor.call_args_list
+    )
+    assert batches == [
+        ["io://1111-1111-1111/1", "io://1111-1111-1111/2"],
+        ["rts://2222-2222-2222/1"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_action_queue_partition_max_actions_is_per_gateway(mock_executor):
+    """Test that max_actions only flushes the partition that reached it."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(
+            delay=10.0, max_actions=2, partition_by_gateway=True
+        ),
+    )
+
+    other = await queue.add(
+        [Action(device_url="io://2222-2222-2222/1", commands=[Command(name="open")])]
+    )
+    await queue.add(
+        [Action(device_url="io://1111-1111-1111/1", commands=[Command(name="close")])]
+    )
+    full = await queue.add(
+        [Action(device_url="io://1111-1111-1111/2", commands=[Command(name="close")])]
+    )
+
+    assert full.is_done()
+    assert not other.is_done()
+    assert queue.get_pending_count() == 1
+
+    await queue.shutdown()
+    assert other.is_done()
+
+
+@pytest.mark.asyncio
+async def test_action_queue_partition_failure_isolation():
+    """Test that a failing gateway does not fail waiters of other gateways."""
+
+    async def executor(actions, mode, label):
+        if actions[0].device_url.startswith("io://1111"):
+            raise ValueError("gateway queue full")
+        return "exec-ok"
+
+    queue = ActionQueue(
+        executor=AsyncMock(side_effect=executor),
+        settings=ActionQueueSettings(delay=0.05, partition_by_gateway=True),
+    )
+
+    failing = await queue.add(
+        [Action(device_url="io://1111-1111-1111/1", commands=[Command(name="close")])]
+    )
+    healthy = await queue.add(
+        [Action(device_url="io://2222-2222-2222/1", commands=[Command(name="close")])]
+    )
+
+    with pytest.raises(ValueError, match="gateway queue full"):
+        await failing
+    assert await healthy == "exec-ok"
+
+
+@pytest.mark.asyncio
+async def test_action_queue_partition_keeps_multi_gateway_call_together(
+    mock_executor,
+):
+    """Test that one call spanning gateways still produces a single action group."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(delay=0.05, partition_by_gateway=True),
+    )
+
+    queued = await queue.add(
+        [
+            Action(
+                device_url="io://1111-1111-1111/1", commands=[Command(name="close")]
+            ),
+            Action(
+                device_url="io://2222-2222-2222/1", commands=[Command(name="close")]
+            ),
+        ]
+    )
+
+    assert (await queued).startswith("exec-2-")
+    mock_executor.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_action_queue_interactive_lane_dispatches_immediately(mock_executor):
+    """Test that interactive submissions bypass the bulk batching window."""
+    queue = ActionQueue(
+        executor=mock_executor, settings=ActionQueueSettings(delay=10.0)
+    )
+
+    bulk = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="open")])]
+    )
+    interactive = await queue.add(
+        [Action(device_url="io://1234-5678-9012/2", commands=[Command(name="stop")])],
+        priority=QueuePriority.INTERACTIVE,
+    )
+
+    assert interactive.is_done()
+    assert not bulk.is_done()
+    assert queue.get_pending_count() == 1
+
+    await queue.shutdown()
+    assert bulk.is_done()
+
+
+@pytest.mark.asyncio
+async def test_action_queue_high_priority_mode_uses_interactive_lane(mock_executor):
+    """Test that HIGH_PRIORITY mode defaults to the interactive lane."""
+    queue = ActionQueue(
+        executor=mock_executor, settings=ActionQueueSettings(delay=10.0)
+    )
+
+    bulk = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="open")])]
+    )
+    interactive = await queue.add(
+        [Action(device_url="io://1234-5678-9012/2", commands=[Command(name="stop")])],
+        mode=ExecutionMode.HIGH_PRIORITY,
+    )
+
+    # The mode change no longer forces the pending bulk batch out.
+    assert await interactive == "exec-1-highPriority-None"
+    assert not bulk.is_done()
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_action_queue_interactive_lane_window(mock_executor):
+    """Test that a non-zero interactive delay batches interactive submissions."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(delay=10.0, interactive_delay=0.05),
+    )
+
+    first = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="stop")])],
+        priority=QueuePriority.INTERACTIVE,
+    )
+    second = await queue.add(
+        [Action(device_url="io://1234-5678-9012/2", commands=[Command(name="stop")])],
+        priority=QueuePriority.INTERACTIVE,
+    )
+
+    assert await first == await second
+    mock_executor.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_action_queue_interactive_keeps_device_order(mock_executor):
+    """Test that pending bulk commands for the same device are dispatched first."""
+    queue = ActionQueue(
+        executor=mock_executor, settings=ActionQueueSettings(delay=10.0)
+    )
+
+    bulk = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="close")])]
+    )
+    interactive = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="stop")])],
+        priority=QueuePriority.INTERACTIVE,
+    )
+
+    assert bulk.is_done()
+    assert interactive.is_done()
+    dispatched = [
+        [str(command.name) for command in call.args[0][0].commands]
+        for call in mock_executor.call_args_list
+    ]
+    assert dispatched == [["close"], ["stop"]]
+
+
+@pytest.mark.asyncio
+async def test_action_queue_interactive_stream_does_not_starve_bulk(mock_executor):
+    """Test that continuous interactive traffic lets bulk batches dispatch on time."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(delay=0.1, interactive_delay=0.02),
+    )
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    bulk = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="open")])]
+    )
+    bulk_done_at: float | None = None
+    index = 0
+    while loop.time() - started < 0.5:
+        index += 1
+        await queue.add(
+            [
+                Action(
+                    device_url=f"io://1234-5678-9012/{index % 5 + 2}",
+                    commands=[Command(name="stop")],
+                )
+            ],
+            priority=QueuePriority.INTERACTIVE,
+        )
+        if bulk_done_at is None and bulk.is_done():
+            bulk_done_at = loop.time()
+        await asyncio.sleep(0.005)
+
+    assert bulk_done_at is not None
+    assert bulk_done_at - started < 0.3
+    assert queue.stats.flush_reasons[FlushReason.TIMER] >= 1
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_action_queue_interactive_max_actions(mock_executor):
+    """Test that the interactive lane has its own max_actions limit."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(
+            delay=10.0, interactive_delay=10.0, interactive_max_actions=2
+        ),
+    )
+
+    for i in range(2):
+        await queue.add(
+            [
+                Action(
+                    device_url=f"io://1234-5678-9012/{i}",
+                    commands=[Command(name="stop")],
+                )
+            ],
+            priority=QueuePriority.INTERACTIVE,
+        )
+
+    mock_executor.assert_called_once()
+    assert queue.get_pending_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_action_queue_adaptive_sparse_call_uses_min_delay(mock_executor):
+    """Test that an isolated call is dispatched after the minimum window."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(
+            delay=10.0, adaptive_delay=True, min_delay=0.001, max_delay=0.5
+        ),
+    )
+
+    queued = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="close")])]
+    )
+
+    assert queue.get_current_delay() == 0.001
+    await asyncio.wait_for(queued, timeout=0.1)
+
+
+@pytest.mark.asyncio
+async def test_action_queue_adaptive_burst_widens_window(mock_executor):
+    """Test that a burst of spaced calls is gathered into few action groups."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(
+            max_actions=50, adaptive_delay=True, min_delay=0.001, max_delay=0.2
+        ),
+    )
+
+    waiters = []
+    for i in range(10):
+        waiters.append(
+            await queue.add(
+                [
+                    Action(
+                        device_url=f"io://1234-5678-9012/{i}",
+                        commands=[Command(name="close")],
+                    )
+                ]
+            )
+        )
+        await asyncio.sleep(0.01)
+
+    await asyncio.gather(*waiters)
+
+    # The first call opens a minimal window; the rest of the burst shares one.
+    assert mock_executor.call_count == 2
+    assert queue.get_current_delay() > 0.001
+
+
+def test_adaptive_window_shrinks_when_bursts_end_early():
+    """Test that windows shrink when batches gather fewer calls than expected."""
+    window = _AdaptiveWindow(min_delay=0.0, max_delay=1.0)
+    window.observe_arrival(0.0)
+    window.observe_arrival(0.01)
+
+    batch = _PendingBatch(None, None)
+    batch.actions.append(Action(device_url="io://1234-5678-9012/1", commands=[]))
+    batch.waiters.append(QueuedExecution())
+    first = window.open_window(batch, max_actions=20)
+    assert first == pytest.approx(0.19)
+
+    # Only the opening call arrived before the window closed.
+    window.observe_flush(batch)
+    window.observe_arrival(0.02)
+    assert window.open_window(batch, max_actions=20) < first
+
+
+def test_action_queue_fixed_delay_is_reported(mock_executor):
+    """Test that the fixed delay is reported when adaptive mode is disabled."""
+    queue = ActionQueue(executor=mock_executor, settings=ActionQueueSettings(delay=0.3))
+    assert queue.get_current_delay() == 0.3
+
+
+def _commands(mock_executor) -> list[list[tuple[str, list]]]:
+    """Return the (name, parameters) pairs of each dispatched action."""
+    return [
+        [(str(command.name), command.parameters) for command in action.commands]
+        for call in mock_executor.call_args_list
+        for action in call.args[0]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_action_queue_supersede_same_command(mock_executor):
+    """Test that a later command replaces a pending command with the same name."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(delay=10.0, supersede_commands=True),
+    )
+    device_url = "io://1234-5678-9012/1"
+
+    first = await queue.add(
+        [
+            Action(
+                device_url=device_url,
+                commands=[Command(name="setClosure", parameters=[30])],
+            )
+        ]
+    )
+    second = await queue.add(
+        [
+            Action(
+                device_url=device_url,
+                commands=[Command(name="setClosure", parameters=[80])],
+            )
+        ]
+    )
+    await queue.flush()
+
+    assert _commands(mock_executor) == [[("setClosure", [80])]]
+    # The superseded caller still resolves to the final exec_id.
+    assert await first == await second
+
+
+@pytest.mark.asyncio
+async def test_action_queue_supersede_command_family(mock_executor):
+    """Test that commands of the same family supersede each other per device."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(delay=10.0, supersede_commands=True),
+    )
+
+    await queue.add(
+        [
+            Action(
+                device_url="io://1234-5678-9012/1",
+                commands=[
+                    Command(name=OverkizCommand.OPEN),
+                    Command(name=OverkizCommand.SET_ORIENTATION, parameters=[10]),
+                ],
+            ),
+            Action(
+                device_url="io://1234-5678-9012/2",
+                commands=[Command(name=OverkizCommand.OPEN)],
+            ),
+        ]
+    )
+    await queue.add(
+        [
+            Action(
+                device_url="io://1234-5678-9012/1",
+                commands=[Command(name=OverkizCommand.CLOSE)],
+            )
+        ]
+    )
+    await queue.flush()
+
+    assert _commands(mock_executor) == [
+        [("setOrientation", [10]), ("close", None)],
+        [("open", None)],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_action_queue_supersede_keeps_commands_of_one_call(mock_executor):
+    """Test that commands submitted in the same call are never superseded."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(delay=10.0, supersede_commands=True),
+    )
+
+    await queue.add(
+        [
+            Action(
+                device_url="io://1234-5678-9012/1",
+                commands=[Command(name="close")],
+            ),
+            Action(
+                device_url="io://1234-5678-9012/1",
+                commands=[Command(name="setClosure", parameters=[50])],
+            ),
+        ]
+    )
+    await queue.flush()
+
+    assert _commands(mock_executor) == [[("close", None), ("setClosure", [50])]]
+
+
+@pytest.mark.asyncio
+async def test_action_queue_supersede_disabled_by_default(mock_executor):
+    """Test that commands are appended unless superseding is enabled."""
+    queue = ActionQueue(
+        executor=mock_executor, settings=ActionQueueSettings(delay=10.0)
+    )
+    device_url = "io://1234-5678-9012/1"
+
+    await queue.add([Action(device_url=device_url, commands=[Command(name="open")])])
+    await queue.add([Action(device_url=device_url, commands=[Command(name="close")])])
+    await queue.flush()
+
+    assert _commands(mock_executor) == [[("open", None), ("close", None)]]
+
+
+@pytest.mark.asyncio
+async def test_action_queue_interleaved_labels_batch_independently(mock_executor):
+    """Test that interleaved labels are batched into one action group per label."""
+    queue = ActionQueue(
+        executor=mock_executor, settings=ActionQueueSettings(delay=0.05)
+    )
+
+    waiters = [
+        await queue.add(
+            [
+                Action(
+                    device_url=f"io://1234-5678-9012/{i}",
+                    commands=[Command(name="close")],
+                )
+            ],
+            label=f"rule-{i % 2}",
+        )
+        for i in range(6)
+    ]
+    exec_ids = await asyncio.gather(*waiters)
+
+    assert mock_executor.call_count == 2
+    assert (
+        exec_ids
+        == [
+            "exec-3-None-rule-0",
+            "exec-3-None-rule-1",
+        ]
+        * 3
+    )
+
+
+@pytest.mark.asyncio
+async def test_action_queue_buckets_have_independent_max_actions(mock_executor):
+    """Test that max_actions is counted per (mode, label) bucket."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(delay=10.0, max_actions=2),
+    )
+
+    await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="close")])],
+        label="a",
+    )
+    await queue.add(
+        [Action(device_url="io://1234-5678-9012/2", commands=[Command(name="close")])],
+        label="b",
+    )
+    mock_executor.assert_not_called()
+    assert queue.get_pending_count() == 2
+
+    await queue.add(
+        [Action(device_url="io://1234-5678-9012/3", commands=[Command(name="close")])],
+        label="a",
+    )
+    mock_executor.assert_called_once()
+    assert mock_executor.call_args.args[2] == "a"
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_action_queue_same_device_across_buckets_keeps_order(mock_executor):
+    """Test that a bucket with pending commands for a device is dispatched first."""
+    queue = ActionQueue(
+        executor=mock_executor, settings=ActionQueueSettings(delay=10.0)
+    )
+
+    first = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="close")])],
+        label="a",
+    )
+    other = await queue.add(
+        [Action(device_url="io://1234-5678-9012/2", commands=[Command(name="open")])],
+        label="c",
+    )
+    second = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="open")])],
+        label="b",
+    )
+
+    assert first.is_done()
+    assert not other.is_done()
+    assert not second.is_done()
+    await queue.flush()
+    assert [call.args[2] for call in mock_executor.call_args_list] == ["a", "c", "b"]
+
+
+@pytest.mark.asyncio
+async def test_action_queue_stats(mock_executor):
+    """Test that batch sizes, flush reasons, latencies and merges are recorded."""
+    queue = ActionQueue(
+        executor=mock_executor,
+        settings=ActionQueueSettings(delay=10.0, max_actions=2),
+    )
+
+    first = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="close")])]
+    )
+    second = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="stop")])]
+    )
+    await queue.add(
+        [Action(device_url="io://1234-5678-9012/2", commands=[Command(name="close")])]
+    )
+    await asyncio.gather(first, second)
+    await queue.add(
+        [Action(device_url="io://1234-5678-9012/3", commands=[Command(name="close")])]
+    )
+    await queue.flush()
+
+    stats = queue.get_stats()
+    assert stats["batches"] == 2
+    assert stats["batch_size"]["buckets"]["2"] == 1
+    assert stats["batch_size"]["buckets"]["1"] == 1
+    assert stats["flush_reasons"] == {"max_actions": 1, "flush": 1}
+    assert stats["queue_wait"]["count"] == 4
+    assert stats["end_to_end"]["count"] == 4
+    assert stats["execution"]["count"] == 2
+    assert stats["submitted_actions"] == 4
+    assert stats["dispatched_actions"] == 3
+    assert stats["merge_ratio"] == pytest.approx(4 / 3)
+    assert stats["pending_actions"] == 0
+    assert stats["current_delay"] == 10.0
+
+    queue.reset_stats()
+    assert queue.get_stats()["batches"] == 0
+
+
+@pytest.mark.asyncio
+async def test_action_queue_stats_flush_reasons():
+    """Test that timer, conflict, immediate and shutdown flushes are counted."""
+    executor = AsyncMock(side_effect=[TimeoutError(), "exec-2", "exec-3", "exec-4"])
+    queue = ActionQueue(executor=executor, settings=ActionQueueSettings(delay=0.01))
+
+    failed = await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="close")])]
+    )
+    with pytest.raises(TimeoutError):
+        await failed
+
+    await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="close")])],
+        label="a",
+    )
+    await queue.add(
+        [Action(device_url="io://1234-5678-9012/1", commands=[Command(name="stop")])],
+        priority=QueuePriority.INTERACTIVE,
+    )
+    await queue.add(
+        [Action(device_url="io://1234-5678-9012/2", commands=[Command(name="close")])]
+    )
+    await queue.shutdown()
+
+    stats = queue.stats
+    assert stats.flush_reasons == {
+        FlushReason.TIMER: 1,
+        FlushReason.DEVICE_CONFLICT: 1,
+        FlushReason.IMMEDIATE: 1,
+        FlushReason.SHUTDOWN: 1,
+    }
+    assert stats.executor_errors == {"TimeoutError": 1}
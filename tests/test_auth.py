@@ -732,6 +732,30 @@ class TestBearerTokenAuthStrategy:
 
         assert headers == {"Authorization": "Bearer my_bearer_token"}
 
+    def test_cached_headers_follow_the_token(self):
+        """Headers are built once per token and are read-only."""
+        server_config = ServerConfig(
+            server=None,
+            name="Test",
+            endpoint="https://api.test.com/",
+            manufacturer="Test",
+            api_type=APIType.CLOUD,
+        )
+        credentials = TokenCredentials("my_bearer_token")
+        session = AsyncMock(spec=ClientSession)
+
+        strategy = BearerTokenAuthStrategy(credentials, session, server_config, True)
+        headers = strategy.cached_auth_headers()
+
+        assert strategy.cached_auth_headers() is headers
+        with pytest.raises(TypeError):
+            headers["Authorization"] = "changed"  # type: ignore[index]
+
+        credentials.token = "rotated_token"
+        assert strategy.cached_auth_headers() == {
+            "Authorization": "Bearer rotated_token"
+        }
+
 
 class TestNexityAuthStrategy:
     """Tests for Nexity auth error mapping behavior."""
@@ -1188,6 +1212,21 @@ async def test_rexel_auth_headers_empty_without_token():
     assert await strategy.auth_headers() == {}
 
 
+def test_rexel_cached_headers_follow_token_and_gateway():
+    """Cached headers are rebuilt when the token or the gateway changes."""
+    strategy, _ = _build_rexel_strategy_with_token([])
+    strategy.select_gateway("1111-2222-3333")
+
+    headers = strategy.cached_auth_headers()
+    assert strategy.cached_auth_headers() is headers
+
+    strategy.select_gateway("4444-5555-6666")
+    assert strategy.cached_auth_headers()["gatewayId"] == "4444-5555-6666"
+
+    strategy.context.access_token = "rotated-jwt"
+    assert strategy.cached_auth_headers()["Authorization"] == "Bearer rotated-jwt"
+
+
 @pytest.mark.asyncio
 async def test_rexel_login_auto_selects_single_gateway():
     """Login auto-selects the only gateway when exactly one is found."""
@@ -1316,6 +1355,19 @@ async def test_rexel_token_auth_headers_invokes_callback():
     assert len(calls) == 2
 
 
+def test_rexel_token_cached_headers_need_a_static_token():
+    """A token callback must be awaited, so no cached headers are offered."""
+
+    async def _token() -> str:
+        return "token"
+
+    creds = RexelTokenCredentials(access_token_callback=_token)
+    strategy, _ = _build_rexel_token_strategy([], credentials=creds)
+    strategy.select_gateway("gw-1")
+
+    assert strategy.cached_auth_headers() is None
+
+
 @pytest.mark.asyncio
 async def test_rexel_token_auth_headers_raises_when_unselected():
     """auth_headers raises NoGatewaySelectedError before a gateway is chosen."""
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+import datetime as dt
 import json
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -1613,3 +1615,192 @@ class TestLocalTokenManagement:
             mock_delete.call_args[0][0]
             == f"{self.ENDPOINT}setup/gateways/gw-1234/developerMode"
         )
+
+
+class TestAuthHeaders:
+    """Tests for reading auth headers on the request path."""
+
+    @pytest.mark.asyncio
+    async def test_cached_headers_skip_the_coroutine(
+        self, local_client: OverkizClient
+    ) -> None:
+        """Strategies with precomputed headers are not awaited per request."""
+        with (
+            patch.object(
+                local_client._auth, "auth_headers", side_effect=AssertionError
+            ),
+            patch.object(
+                aiohttp.ClientSession, "get", return_value=MockResponse("[]")
+            ) as mock_get,
+        ):
+            await local_client._get("setup/devices")
+
+        assert mock_get.call_args.kwargs["headers"] == {"Authorization": "Bearer token"}
+        await local_client.session.close()
+
+
+class TestRateLimiter:
+    """Tests for pacing requests with a rate limiter."""
+
+    @pytest.mark.asyncio
+    async def test_every_request_acquires(self, local_client: OverkizClient) -> None:
+        """Each request waits for the configured limiter."""
+        limiter = AsyncMock()
+        local_client.settings = OverkizClientSettings(rate_limiter=limiter)
+        with patch.object(
+            aiohttp.ClientSession, "get", return_value=MockResponse("[]")
+        ):
+            await local_client._get("setup/devices")
+            await local_client._get("setup/gateways")
+
+        assert limiter.acquire.await_count == 2
+        await local_client.session.close()
+
+    @pytest.mark.asyncio
+    async def test_headers_are_read_after_waiting(self, client: OverkizClient):
+        """A token expiring while waiting for the limiter is refreshed first."""
+        context = client._auth.context  # type: ignore[attr-defined]
+        context.update_from_token(
+            {"access_token": "old", "refresh_token": "refresh", "expires_in": 3600}
+        )
+
+        async def acquire() -> None:
+            context.expires_at = dt.datetime.now(dt.UTC)
+
+        async def request_access_token(**_: object) -> None:
+            context.update_from_token({"access_token": "new", "expires_in": 3600})
+
+        client.settings = OverkizClientSettings(
+            rate_limiter=MagicMock(acquire=AsyncMock(side_effect=acquire))
+        )
+        with (
+            patch.object(
+                client._auth,
+                "_request_access_token",
+                new=AsyncMock(side_effect=request_access_token),
+            ),
+            patch.object(
+                aiohttp.ClientSession, "get", return_value=MockResponse("[]")
+            ) as mock_get,
+        ):
+            await client._get("setup/devices")
+
+        assert mock_get.call_args.kwargs["headers"] == {"Authorization": "Bearer new"}
+        await client.close()
+
+
+class TestTokenRefresh:
+    """Tests for single-flight and background OAuth token refresh."""
+
+    @staticmethod
+    def _expire(client: OverkizClient, seconds: float = 0) -> None:
+        context = client._auth.context  # type: ignore[attr-defined]
+        context.access_token = "old"  # noqa: S105
+        context.refresh_token = "refresh"  # noqa: S105
+        context.expires_at = dt.datetime.now(dt.UTC) + dt.timedelta(seconds=seconds)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_refresh(self, client: OverkizClient):
+        """Concurrent requests await one refresh and one listener re-registration."""
+        self._expire(client)
+        client._event_listener_id = "listener"
+
+        async def request_access_token(**_: object) -> None:
+            await asyncio.sleep(0)
+            client._auth.context.update_from_token(  # type: ignore[attr-defined]
+                {"access_token": "new", "expires_in": 3600}
+            )
+
+        with (
+            patch.object(
+                client._auth,
+                "_request_access_token",
+                new=AsyncMock(side_effect=request_access_token),
+            ) as mock_token,
+            patch.object(
+                client, "register_event_listener", new=AsyncMock()
+            ) as mock_register,
+            patch.object(
+                aiohttp.ClientSession,
+                "get",
+                side_effect=lambda *_, **__: MockResponse("[]"),
+            ),
+        ):
+            await asyncio.gather(*(client._get("exec/current") for _ in range(3)))
+
+        assert mock_token.await_count == 1
+        assert mock_register.await_count == 1
+        client._event_listener_id = None
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_requests_do_not_wait_for_early_refresh(self, client: OverkizClient):
+        """A refresh running ahead of expiry does not hold back requests."""
+        self._expire(client, 3600)
+        release = asyncio.Event()
+
+        async def refresh() -> bool:
+            await release.wait()
+            return True
+
+        mock_refresh = AsyncMock(side_effect=refresh)
+        flight = asyncio.create_task(
+            client._refresh_token(mock_refresh, kind="background")
+        )
+        await asyncio.sleep(0)
+        assert client._token_refresh is not None
+
+        with patch.object(
+            aiohttp.ClientSession, "get", return_value=MockResponse("[]")
+        ) as mock_get:
+            await asyncio.wait_for(client._get("exec/current"), timeout=1)
+
+        assert mock_get.call_args.kwargs["headers"] == {"Authorization": "Bearer old"}
+        assert not flight.done()
+
+        # close() lets the running refresh finish instead of leaving it behind.
+        asyncio.get_running_loop().call_later(0.01, release.set)
+        await client.close()
+        assert flight.done()
+        assert client._token_refresh is None
+        mock_refresh.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_background_refresh_ahead_of_expiry(self):
+        """With a margin set, the token is refreshed before it expires."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+            settings=OverkizClientSettings(token_refresh_margin=60),
+        )
+
+        async def refresh() -> bool:
+            self._expire(client, 3600)
+            return True
+
+        with (
+            patch.object(client._auth, "login", new=AsyncMock()),
+            patch.object(
+                client._auth, "refresh", new=AsyncMock(side_effect=refresh)
+            ) as mock_refresh,
+        ):
+            self._expire(client, 0.1)
+            await client.login(register_event_listener=False)
+            await asyncio.sleep(0.2)
+
+            assert mock_refresh.await_count == 1
+            assert client._token_refresh_timer is not None
+            assert not client._token_refresh_timer.done()
+
+        await client.close()
+        assert client._token_refresh_timer is None
+
+    @pytest.mark.asyncio
+    async def test_no_background_refresh_by_default(self, client: OverkizClient):
+        """Without a margin, tokens are only refreshed when a request needs it."""
+        with patch.object(client._auth, "login", new=AsyncMock()):
+            self._expire(client, 3600)
+            await client.login(register_event_listener=False)
+
+        assert client._token_refresh_timer is None
+        await client.close()
@@ -0,0 +1,269 @@
+"""Tests for the multi-account client pool and rate budgets."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from pyoverkiz.auth import MemorySessionStore
+from pyoverkiz.auth.credentials import (
+    RexelOAuthCodeCredentials,
+    UsernamePasswordCredentials,
+)
+from pyoverkiz.client import OverkizClient, OverkizClientSettings
+from pyoverkiz.client_pool import ClientPoolSettings, OverkizClientPool
+from pyoverkiz.enums import EventName, Server
+from pyoverkiz.models import Event
+from pyoverkiz.rate_budget import CombinedRateBudget, RateBudget
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+def _credentials(username: str) -> UsernamePasswordCredentials:
+    return UsernamePasswordCredentials(username, "password")
+
+
+def _pool(**settings: object) -> OverkizClientPool:
+    pool = OverkizClientPool(ClientPoolSettings(**settings))  # type: ignore[arg-type]
+    pool.add_account("a", server=Server.SOMFY_EUROPE, credentials=_credentials("a"))
+    pool.add_account("b", server=Server.SOMFY_EUROPE, credentials=_credentials("b"))
+    pool.add_account(
+        "c", server=Server.ATLANTIC_COZYTOUCH, credentials=_credentials("c")
+    )
+    return pool
+
+
+class TestRateBudget:
+    """Tests for token bucket budgets."""
+
+    def test_bursts_then_paces(self):
+        """A full bucket allows a burst, then callers queue behind each other."""
+        clock = FakeClock()
+        budget = RateBudget(2, burst=2, clock=clock)
+
+        assert budget.reserve() == 0
+        assert budget.reserve() == 0
+        assert budget.reserve() == pytest.approx(0.5)
+        assert budget.reserve() == pytest.approx(1.0)
+
+        clock.now = 2.0
+        assert budget.reserve() == 0
+
+    def test_try_acquire_does_not_borrow(self):
+        """A refused try_acquire leaves the bucket unchanged."""
+        clock = FakeClock()
+        budget = RateBudget(1, clock=clock)
+
+        assert budget.try_acquire()
+        assert not budget.try_acquire()
+        clock.now = 1.0
+        assert budget.try_acquire()
+
+    def test_invalid_rate(self):
+        """Rates and bursts are validated."""
+        with pytest.raises(ValueError, match="rate"):
+            RateBudget(0)
+        with pytest.raises(ValueError, match="burst"):
+            RateBudget(1, burst=0.5)
+
+    @pytest.mark.asyncio
+    async def test_combined_budget_waits_for_the_slowest(self):
+        """A combined budget draws from every budget."""
+        clock = FakeClock()
+        shared = RateBudget(100, clock=clock)
+        account = RateBudget(1, clock=clock)
+        combined = CombinedRateBudget([shared, account])
+
+        with patch("pyoverkiz.rate_budget.asyncio.sleep", new=AsyncMock()) as sleep:
+            await combined.acquire()
+            await combined.acquire()
+
+        sleep.assert_awaited_once_with(pytest.approx(1.0))
+        assert shared.reserve() == 0
+
+
+def test_settings_validation():
+    """Invalid pool settings are rejected."""
+    with pytest.raises(ValueError, match="poll_concurrency"):
+        OverkizClientPool(ClientPoolSettings(poll_concurrency=0))
+    with pytest.raises(ValueError, match="account_requests_per_second"):
+        ClientPoolSettings(account_requests_per_second=0).validate()
+
+
+@pytest.mark.asyncio
+async def test_accounts_share_a_connector_per_endpoint():
+    """Clients of one endpoint share a connector but not their sessions."""
+    pool = _pool()
+    with patch.object(OverkizClient, "login", new=AsyncMock()):
+        a, b, c = [await pool.client(key) for key in ("a", "b", "c")]
+
+    assert a.session is not b.session
+    assert a.session.connector is b.session.connector
+    assert a.session.connector is not c.session.connector
+    assert pool.active_clients == 3
+
+    connector = a.session.connector
+    await pool.close()
+    assert a.session.closed
+    assert connector is not None
+    assert connector.closed
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_login():
+    """The first use logs in once, however many callers wait for it."""
+    pool = _pool()
+
+    async def login(**_: object) -> None:
+        await asyncio.sleep(0)
+
+    with patch.object(
+        OverkizClient, "login", new=AsyncMock(side_effect=login)
+    ) as mock_login:
+        clients = await asyncio.gather(*(pool.client("a") for _ in range(5)))
+
+    mock_login.assert_awaited_once_with(register_event_listener=False)
+    assert all(client is clients[0] for client in clients)
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_rate_budgets_are_set_on_the_clients():
+    """Each account combines the shared budget with its own."""
+    pool = _pool(max_requests_per_second=50, account_requests_per_second=2)
+    with patch.object(OverkizClient, "login", new=AsyncMock()):
+        a = await pool.client("a")
+        b = await pool.client("b")
+
+    assert isinstance(a.settings.rate_limiter, CombinedRateBudget)
+    assert isinstance(b.settings.rate_limiter, CombinedRateBudget)
+    shared_a, own_a = a.settings.rate_limiter.budgets
+    shared_b, own_b = b.settings.rate_limiter.budgets
+    assert shared_a is shared_b
+    assert own_a is not own_b
+    assert own_a.rate == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_clients_are_evicted():
+    """Clients unused for idle_timeout are closed and log in again on use."""
+    pool = _pool(idle_timeout=60)
+    with patch.object(OverkizClient, "login", new=AsyncMock()) as mock_login:
+        a = await pool.client("a")
+        async with pool.acquire("b"):
+            for account in pool._accounts.values():
+                account.last_used -= 120
+            assert await pool.evict_idle() == 1
+
+        assert a.session.closed
+        assert pool.active_clients == 1
+        assert await pool.client("a") is not a
+        assert mock_login.await_count == 3
+
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_polls_listening_accounts():
+    """Listening accounts are polled and their events passed to the callback."""
+    pool = _pool(poll_interval=0.01)
+    received: dict[str, list[Event]] = {}
+    done = asyncio.Event()
+
+    async def callback(key: str, events: list[Event]) -> None:
+        received[key] = events
+        if len(received) == 2:
+            done.set()
+
+    events = [Event(name=EventName.REFRESH_ALL_DEVICES_STATES_COMPLETED)]
+    with (
+        patch.object(OverkizClient, "login", new=AsyncMock()) as mock_login,
+        patch.object(OverkizClient, "register_event_listener", new=AsyncMock()),
+        patch.object(OverkizClient, "fetch_events", new=AsyncMock(return_value=events)),
+    ):
+        pool.listen("a", callback)
+        pool.listen("b", callback)
+        await asyncio.wait_for(done.wait(), 1)
+        await pool.unlisten("a")
+
+    assert received == {"a": events, "b": events}
+    mock_login.assert_awaited_with(register_event_listener=True)
+    assert pool._accounts["a"].callback is None
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_polls_back_off():
+    """A failing account is retried later without stopping the others."""
+    pool = _pool(poll_interval=0.01, max_poll_backoff=10)
+    polled = asyncio.Event()
+
+    async def callback(key: str, events: list[Event]) -> None:
+        polled.set()
+
+    async def fetch_events(self: OverkizClient) -> list[Event]:
+        if self is await pool.client("a"):
+            raise TimeoutError
+        return [Event(name=EventName.REFRESH_ALL_DEVICES_STATES_COMPLETED)]
+
+    with (
+        patch.object(OverkizClient, "login", new=AsyncMock()),
+        patch.object(OverkizClient, "register_event_listener", new=AsyncMock()),
+        patch.object(OverkizClient, "fetch_events", new=fetch_events),
+    ):
+        pool.listen("a", callback)
+        pool.listen("b", callback)
+        await asyncio.wait_for(polled.wait(), 1)
+        await asyncio.sleep(0.05)
+
+    assert pool._accounts["a"].poll_failures >= 1
+    assert pool._accounts["b"].poll_failures == 0
+    await pool.close()
+
+
+def test_poll_backoff_is_bounded():
+    """Long failure streaks back off to max_poll_backoff without overflowing."""
+    pool = _pool(poll_interval=1, max_poll_backoff=60)
+    account = pool._accounts["a"]
+
+    assert pool._poll_delay(account) == 1
+    account.poll_failures = 3
+    assert pool._poll_delay(account) == 8
+    account.poll_failures = 5000
+    assert pool._poll_delay(account) == 60
+
+
+@pytest.mark.asyncio
+async def test_accounts_sharing_a_store_get_distinct_keys():
+    """Accounts without a username are keyed in the store by their pool key."""
+    store = MemorySessionStore()
+    pool = OverkizClientPool()
+    for key in ("a", "b"):
+        pool.add_account(
+            key,
+            server=Server.REXEL,
+            credentials=RexelOAuthCodeCredentials(key, "http://redirect.uri", "v"),
+            settings=OverkizClientSettings(session_store=store),
+        )
+
+    with patch.object(OverkizClient, "login", new=AsyncMock()):
+        a = await pool.client("a")
+        b = await pool.client("b")
+
+    assert a.settings.session_account == "a"
+    assert a._session_key is not None
+    assert a._session_key != b._session_key
+    await pool.close()
@@ -5,7 +5,7 @@ from unittest.mock import AsyncMock, patch
 
 import pytest
 
-from pyoverkiz.action_queue import ActionQueueSettings
+from pyoverkiz.action_queue import ActionQueueSettings, QueuePriority
 from pyoverkiz.auth import UsernamePasswordCredentials
 from pyoverkiz.client import OverkizClient, OverkizClientSettings
 from pyoverkiz.enums import OverkizCommand, Server
@@ -214,3 +214,84 @@ async def test_client_queue_respects_max_actions():
         assert mock_post.call_count == 2
 
     await client.close()
+
+
+@pytest.mark.asyncio
+async def test_client_interactive_priority_skips_batching_window():
+    """Test that an interactive command is sent without waiting for the bulk window."""
+    client = OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("test@example.com", "test"),
+        settings=OverkizClientSettings(action_queue=ActionQueueSettings(delay=10.0)),
+    )
+
+    action = Action(
+        device_url="io://1234-5678-9012/1",
+        commands=[Command(name=OverkizCommand.STOP)],
+    )
+
+    with patch.object(client, "_post", new_callable=AsyncMock) as mock_post:
+        mock_post.return_value = {"execId": "exec-now"}
+
+        exec_id = await asyncio.wait_for(
+            client.execute_action_group(
+                actions=[action], priority=QueuePriority.INTERACTIVE
+            ),
+            timeout=1,
+        )
+
+        assert exec_id == "exec-now"
+        mock_post.assert_called_once()
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_client_reports_action_queue_delay():
+    """Test that the client exposes the queue's current batching window."""
+    client = OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("test@example.com", "test"),
+    )
+    assert client.get_action_queue_delay() is None
+    await client.close()
+
+    client = OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("test@example.com", "test"),
+        settings=OverkizClientSettings(
+            action_queue=ActionQueueSettings(adaptive_delay=True, min_delay=0.02)
+        ),
+    )
+    assert client.get_action_queue_delay() == 0.02
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_client_reports_action_queue_stats():
+    """Test that the client exposes the queue metrics snapshot."""
+    client = OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("test@example.com", "test"),
+    )
+    assert client.get_action_queue_stats() is None
+    await client.close()
+
+    client = OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("test@example.com", "test"),
+        settings=OverkizClientSettings(action_queue=ActionQueueSettings()),
+    )
+    action = Action(
+        device_url="io://1234-5678-9012/1",
+        commands=[Command(name=OverkizCommand.CLOSE)],
+    )
+    with patch.object(client, "_post", new_callable=AsyncMock) as mock_post:
+        mock_post.return_value = {"execId": "exec-1"}
+        await client.execute_action_group(actions=[action])
+
+    stats = client.get_action_queue_stats()
+    assert stats is not None
+    assert stats["batches"] == 1
+    assert stats["flush_reasons"] == {"timer": 1}
+    await client.close()
@@ -0,0 +1,307 @@
+"""Tests for the local execution-slot scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from pyoverkiz.auth import UsernamePasswordCredentials
+from pyoverkiz.client import OverkizClient, OverkizClientSettings
+from pyoverkiz.enums import EventName, ExecutionState, Server
+from pyoverkiz.execution_slots import ExecutionSlots, ExecutionSlotSettings
+from pyoverkiz.models import (
+    Action,
+    Command,
+    Execution,
+    ExecutionRegisteredEvent,
+    ExecutionStateChangedEvent,
+)
+
+
+def _state_changed(
+    exec_id: str, new_state: ExecutionState
+) -> ExecutionStateChangedEvent:
+    return ExecutionStateChangedEvent(
+        name=EventName.EXECUTION_STATE_CHANGED,
+        exec_id=exec_id,
+        new_state=new_state,
+        old_state=ExecutionState.IN_PROGRESS,
+    )
+
+
+def _execution(exec_id: str, state: ExecutionState) -> Execution:
+    return Execution(id=exec_id, description="", owner="owner", state=state)
+
+
+def test_execution_slot_settings_validate():
+    """Invalid settings are rejected."""
+    with pytest.raises(ValueError, match="max_executions"):
+        ExecutionSlotSettings(max_executions=0).validate()
+    with pytest.raises(ValueError, match="slot_timeout"):
+        ExecutionSlotSettings(slot_timeout=0).validate()
+    ExecutionSlotSettings().validate()
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_fifo_order():
+    """Callers waiting for a slot get it in arrival order as executions finish."""
+    slots = ExecutionSlots(ExecutionSlotSettings(max_executions=1))
+    await slots.acquire()
+    slots.register("exec-1")
+
+    order: list[str] = []
+
+    async def start(name: str) -> None:
+        await slots.acquire()
+        order.append(name)
+        slots.register(name)
+
+    tasks = [asyncio.create_task(start(name)) for name in ("a", "b")]
+    await asyncio.sleep(0)
+    assert slots.waiting == 2
+    assert order == []
+
+    slots.observe_events([_state_changed("exec-1", ExecutionState.COMPLETED)])
+    await asyncio.sleep(0)
+    assert order == ["a"]
+
+    # Non-terminal states keep the slot.
+    slots.observe_events([_state_changed("a", ExecutionState.IN_PROGRESS)])
+    await asyncio.sleep(0)
+    assert order == ["a"]
+
+    slots.observe_events([_state_changed("a", ExecutionState.FAILED)])
+    await asyncio.gather(*tasks)
+    assert order == ["a", "b"]
+    assert slots.in_flight == {"b"}
+
+
+@pytest.mark.asyncio
+async def test_release_reservation_hands_slot_to_next_waiter():
+    """A failed start gives its reserved slot back."""
+    slots = ExecutionSlots(ExecutionSlotSettings(max_executions=1))
+    await slots.acquire()
+    waiter = asyncio.create_task(slots.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    slots.release_reservation()
+    await asyncio.wait_for(waiter, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_passes_slot_on():
+    """Cancelling a waiting caller does not leak its place or a handed-over slot."""
+    slots = ExecutionSlots(ExecutionSlotSettings(max_executions=1))
+    await slots.acquire()
+    slots.register("exec-1")
+
+    cancelled = asyncio.create_task(slots.acquire())
+    follower = asyncio.create_task(slots.acquire())
+    await asyncio.sleep(0)
+
+    slots.release("exec-1")
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    await asyncio.wait_for(follower, timeout=1)
+    assert slots.available == 0
+
+
+@pytest.mark.asyncio
+async def test_terminal_event_before_register_frees_the_slot():
+    """A fast execution finishing before its exec_id is registered frees its slot."""
+    slots = ExecutionSlots(ExecutionSlotSettings(max_executions=1))
+    await slots.acquire()
+
+    slots.observe_events([_state_changed("fast", ExecutionState.COMPLETED)])
+    slots.register("fast")
+
+    assert slots.in_flight == frozenset()
+    assert slots.available == 1
+    await asyncio.wait_for(slots.acquire(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_adopted_execution_finishing_before_register_frees_the_slot():
+    """An execution adopted from its event and finished is not tracked again."""
+    slots = ExecutionSlots(ExecutionSlotSettings(max_executions=1))
+    await slots.acquire()
+
+    slots.observe_events(
+        [
+            ExecutionRegisteredEvent(name=EventName.EXECUTION_REGISTERED, exec_id="e1"),
+            _state_changed("e1", ExecutionState.COMPLETED),
+        ]
+    )
+    slots.register("e1")
+
+    assert slots.in_flight == frozenset()
+    assert slots.available == 1
+
+
+@pytest.mark.asyncio
+async def test_registered_events_adopt_foreign_executions():
+    """Executions started elsewhere on the account occupy slots too."""
+    slots = ExecutionSlots(ExecutionSlotSettings(max_executions=2))
+    slots.observe_events(
+        [
+            ExecutionRegisteredEvent(
+                name=EventName.EXECUTION_REGISTERED, exec_id="foreign"
+            )
+        ]
+    )
+    assert slots.in_flight == {"foreign"}
+    assert slots.available == 1
+
+
+@pytest.mark.asyncio
+async def test_reconcile_with_current_executions():
+    """A listing releases finished executions and adopts running ones."""
+    slots = ExecutionSlots(ExecutionSlotSettings(max_executions=3))
+    await slots.acquire()
+    slots.register("finished")
+    since = asyncio.get_running_loop().time()
+    await slots.acquire()
+    slots.register("just-started")
+
+    slots.reconcile(
+        [
+            _execution("foreign", ExecutionState.IN_PROGRESS),
+            _execution("done", ExecutionState.COMPLETED),
+        ],
+        since=since,
+    )
+
+    assert slots.in_flight == {"foreign", "just-started"}
+
+
+@pytest.mark.asyncio
+async def test_slot_timeout_releases_stale_executions():
+    """A slot is freed when its execution is never seen finishing."""
+    slots = ExecutionSlots(ExecutionSlotSettings(max_executions=1, slot_timeout=0.01))
+    await slots.acquire()
+    slots.register("stale")
+
+    await asyncio.wait_for(slots.acquire(), timeout=1)
+    assert slots.in_flight == frozenset()
+
+
+@pytest.mark.asyncio
+async def test_close_releases_waiters():
+    """Closing the scheduler lets waiting callers proceed."""
+    slots = ExecutionSlots(ExecutionSlotSettings(max_executions=1))
+    await slots.acquire()
+    waiter = asyncio.create_task(slots.acquire())
+    await asyncio.sleep(0)
+
+    slots.close()
+    await asyncio.wait_for(waiter, timeout=1)
+    await slots.acquire()
+
+
+class TestClientExecutionSlots:
+    """Tests for the client holding executions back until a slot is free."""
+
+    @pytest.mark.asyncio
+    async def test_execute_waits_for_completed_execution(self):
+        """A second action group is sent once the first execution completes."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+            settings=OverkizClientSettings(
+                execution_slots=ExecutionSlotSettings(max_executions=1)
+            ),
+        )
+        client._event_listener_id = "listener"
+        action = Action(
+            device_url="io://1234-5678-9012/1", commands=[Command(name="close")]
+        )
+
+        with patch.object(
+            client,
+            "_post",
+            new=AsyncMock(
+                side_effect=[
+                    {"execId": "exec-1"},
+                    [
+                        {
+                            "name": "ExecutionStateChangedEvent",
+                            "execId": "exec-1",
+                            "newState": "COMPLETED",
+                            "oldState": "IN_PROGRESS",
+                        }
+                    ],
+                    {"execId": "exec-2"},
+                ]
+            ),
+        ) as post:
+            assert await client.execute_action_group(actions=[action]) == "exec-1"
+
+            second = asyncio.create_task(client.execute_action_group(actions=[action]))
+            await asyncio.sleep(0)
+            assert not second.done()
+            assert post.await_count == 1
+
+            await client.fetch_events()
+            assert await second == "exec-2"
+
+        assert client.execution_slots is not None
+        assert client.execution_slots.in_flight == {"exec-2"}
+        client._event_listener_id = None
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_start_releases_slot(self):
+        """A rejected action group does not keep its slot."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+            settings=OverkizClientSettings(
+                execution_slots=ExecutionSlotSettings(max_executions=1)
+            ),
+        )
+        action = Action(
+            device_url="io://1234-5678-9012/1", commands=[Command(name="close")]
+        )
+
+        with (
+            patch.object(client, "_post", new=AsyncMock(side_effect=KeyError("boom"))),
+            pytest.raises(KeyError),
+        ):
+            await client.execute_action_group(actions=[action])
+
+        assert client.execution_slots is not None
+        assert client.execution_slots.available == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_cancel_execution_releases_slot(self):
+        """Cancelling an execution frees its slot immediately."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+            settings=OverkizClientSettings(execution_slots=ExecutionSlotSettings()),
+        )
+        assert client.execution_slots is not None
+        await client.execution_slots.acquire()
+        client.execution_slots.register("exec-1")
+
+        with patch.object(client, "_delete", new=AsyncMock(return_value=None)):
+            await client.cancel_execution("exec-1")
+
+        assert client.execution_slots.in_flight == frozenset()
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self):
+        """Without settings, the client does not track executions."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+        )
+        assert client.execution_slots is None
+        await client.close()
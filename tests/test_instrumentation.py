@@ -0,0 +1,257 @@
+"""Tests for client instrumentation hooks and the in-memory metrics store."""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
+import pytest
+
+from pyoverkiz.auth import UsernamePasswordCredentials
+from pyoverkiz.client import OverkizClient, OverkizClientSettings
+from pyoverkiz.enums import Server
+from pyoverkiz.exceptions import NotAuthenticatedError
+from pyoverkiz.instrumentation import (
+    AuthRefreshSample,
+    Histogram,
+    InMemoryInstrumentation,
+    NoOpInstrumentation,
+    RequestSample,
+    endpoint_template,
+    type_label,
+)
+from pyoverkiz.models import Device
+from tests.helpers import MockResponse
+
+
+def _client(instrumentation: InMemoryInstrumentation) -> OverkizClient:
+    return OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("username", "password"),
+        settings=OverkizClientSettings(instrumentation=instrumentation),
+    )
+
+
+class TestEndpointTemplate:
+    """Tests for collapsing dynamic path segments."""
+
+    @pytest.mark.parametrize(
+        ("path", "expected"),
+        [
+            ("setup", "setup"),
+            (
+                "setup/devices/io%3A%2F%2F1234-5678-9012%2F12345678/states",
+                "setup/devices/{id}/states",
+            ),
+            ("exec/current/699dd967-0a19-0481-7a62-99b990a2feb8", "exec/current/{id}"),
+            ("events/abc-123/fetch", "events/{id}/fetch"),
+            (
+                "config/1234-5678-9012/local/tokens/devmode",
+                "config/{id}/local/tokens/devmode",
+            ),
+            ("overkizgateways?homeId=1", "overkizgateways"),
+        ],
+    )
+    def test_endpoint_template(self, path: str, expected: str) -> None:
+        """Identifiers are replaced while static words are kept."""
+        assert endpoint_template(path) == expected
+
+    def test_type_label(self) -> None:
+        """Generic aliases are rendered with short type names."""
+        assert type_label(Device) == "Device"
+        assert type_label(list[Device]) == "list[Device]"
+
+
+class TestHistogram:
+    """Tests for the fixed-bucket histogram."""
+
+    def test_empty(self) -> None:
+        """An empty histogram has no statistics."""
+        histogram = Histogram()
+        assert histogram.mean is None
+        assert histogram.percentile(99) is None
+
+    def test_observe_and_percentiles(self) -> None:
+        """Percentiles are estimated from bucket bounds and capped by max."""
+        histogram = Histogram((0.1, 1.0, 10.0))
+        for value in (0.05, 0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        assert histogram.count == 4
+        assert histogram.min == 0.05
+        assert histogram.max == 5.0
+        assert histogram.percentile(50) == 0.1
+        assert histogram.percentile(75) == 1.0
+        assert histogram.percentile(100) == 5.0
+        assert histogram.snapshot()["buckets"] == {
+            "0.1": 2,
+            "1.0": 1,
+            "10.0": 1,
+            "+Inf": 0,
+        }
+
+    def test_overflow_bucket(self) -> None:
+        """Values above the last bound land in the overflow bucket."""
+        histogram = Histogram((1.0,))
+        histogram.observe(42.0)
+        assert histogram.counts == [0, 1]
+        assert histogram.percentile(50) == 42.0
+
+    def test_invalid(self) -> None:
+        """Unsorted bounds and out-of-range percentiles are rejected."""
+        with pytest.raises(ValueError, match="sorted"):
+            Histogram((1.0, 0.5))
+        with pytest.raises(ValueError, match="between 0 and 100"):
+            Histogram().percentile(101)
+
+
+class TestInMemoryInstrumentation:
+    """Tests for aggregating samples."""
+
+    def test_snapshot_and_reset(self) -> None:
+        """Samples are aggregated per endpoint and cleared by reset()."""
+        instrumentation = InMemoryInstrumentation()
+        instrumentation.record_request(
+            RequestSample(
+                method="GET",
+                endpoint="setup",
+                duration=0.2,
+                status=200,
+                response_bytes=100,
+            )
+        )
+        instrumentation.record_request(
+            RequestSample(
+                method="GET",
+                endpoint="setup",
+                duration=0.4,
+                status=401,
+                error="NotAuthenticatedError",
+            )
+        )
+        instrumentation.record_auth_refresh(
+            AuthRefreshSample(kind="refresh", duration=0.3)
+        )
+
+        snapshot = instrumentation.snapshot()
+        setup = snapshot["requests"]["GET setup"]
+        assert setup["latency"]["count"] == 2
+        assert setup["statuses"] == {200: 1, 401: 1}
+        assert setup["errors"] == {"NotAuthenticatedError": 1}
+        assert setup["response_bytes"] == 100
+        assert snapshot["auth_refreshes"]["refresh"]["count"] == 1
+
+        instrumentation.reset()
+        assert instrumentation.snapshot()["requests"] == {}
+
+    def test_noop_accepts_samples(self) -> None:
+        """The no-op implementation silently discards samples."""
+        NoOpInstrumentation().record_request(
+            RequestSample(method="GET", endpoint="setup", duration=0.1)
+        )
+
+
+class TestClientInstrumentation:
+    """Tests for the client reporting to its configured instrumentation."""
+
+    @pytest.mark.asyncio
+    async def test_records_request_and_structuring(self) -> None:
+        """A successful request reports latency, status, size and structuring time."""
+        instrumentation = InMemoryInstrumentation()
+        client = _client(instrumentation)
+        body = json.dumps([])
+        resp = MockResponse(body)
+
+        with patch.object(aiohttp.ClientSession, "get", return_value=resp):
+            await client.get_current_executions()
+
+        stats = instrumentation.endpoints[("GET", "exec/current")]
+        assert stats.latency.count == 1
+        assert stats.statuses == {200: 1}
+        assert stats.response_bytes == len(body)
+        assert instrumentation.structuring["list[Execution]"].count == 1
+        await client.session.close()
+
+    @pytest.mark.asyncio
+    async def test_records_error_and_retry(self) -> None:
+        """An auth error is recorded on the endpoint and the retry is counted."""
+        instrumentation = InMemoryInstrumentation()
+        client = _client(instrumentation)
+        error = MockResponse(
+            json.dumps(
+                {"errorCode": "RESOURCE_ACCESS_DENIED", "error": "Not authenticated"}
+            ),
+            status=401,
+        )
+
+        with (
+            patch("backoff._async.asyncio.sleep", new=AsyncMock()),
+            patch.object(client, "login", new=AsyncMock()),
+            patch.object(
+                aiohttp.ClientSession,
+                "get",
+                side_effect=[error, MockResponse("[]")],
+            ),
+        ):
+            await client.get_current_executions()
+
+        stats = instrumentation.endpoints[("GET", "exec/current")]
+        assert stats.statuses == {401: 1, 200: 1}
+        assert stats.errors == {NotAuthenticatedError.__name__: 1}
+        assert instrumentation.retries == {
+            ("get_current_executions", "NotAuthenticatedError"): 1
+        }
+        assert instrumentation.auth_refreshes["relogin"].count == 1
+        await client.session.close()
+
+    @pytest.mark.asyncio
+    async def test_records_transport_failures(self) -> None:
+        """Timeouts and connection errors without a response are recorded too."""
+        instrumentation = InMemoryInstrumentation()
+        client = _client(instrumentation)
+
+        with (
+            patch("backoff._async.asyncio.sleep", new=AsyncMock()),
+            patch.object(
+                aiohttp.ClientSession,
+                "get",
+                side_effect=[TimeoutError(), MockResponse("[]")],
+            ),
+        ):
+            await client.get_current_executions()
+
+        with (
+            patch.object(
+                aiohttp.ClientSession,
+                "get",
+                side_effect=aiohttp.ClientPayloadError("connection reset"),
+            ),
+            pytest.raises(aiohttp.ClientPayloadError),
+        ):
+            await client.get_current_executions()
+
+        stats = instrumentation.endpoints[("GET", "exec/current")]
+        assert stats.latency.count == 3
+        assert stats.statuses == {200: 1}
+        assert stats.errors == {"TimeoutError": 1, "ClientPayloadError": 1}
+        await client.session.close()
+
+    @pytest.mark.asyncio
+    async def test_records_token_refresh(self) -> None:
+        """A token refresh performed before a request is reported."""
+        instrumentation = InMemoryInstrumentation()
+        client = _client(instrumentation)
+        client._auth.context.expires_at = dt.datetime.now(dt.UTC)  # type: ignore[attr-defined]
+
+        with (
+            patch.object(
+                client._auth, "refresh_if_needed", new=AsyncMock(return_value=True)
+            ),
+            patch.object(aiohttp.ClientSession, "get", return_value=MockResponse("[]")),
+        ):
+            await client.get_current_executions()
+
+        assert instrumentation.auth_refreshes["refresh"].count == 1
+        await client.session.close()
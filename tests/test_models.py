@@ -167,6 +167,90 @@ class TestSetup:
         assert len(setup.devices) == 13
         assert sum("incomplete data from hub" in r.message for r in caplog.records) == 3
 
+    def test_zones_and_features_are_structured(self):
+        """Optional lists of models are structured, not passed through as dicts."""
+        setup = converter.structure(
+            {
+                "devices": [],
+                "gateways": [],
+                "features": [{"name": "feature", "source": "GATEWAY_TYPE"}],
+                "zones": [
+                    {
+                        "creationTime": 1,
+                        "lastUpdateTime": 1,
+                        "label": "Ground floor",
+                        "type": 0,
+                        "oid": "zone-1",
+                        "externalOID": "external-1",
+                        "items": [
+                            {
+                                "itemType": "device",
+                                "deviceOID": "device-1",
+                                "deviceURL": "io://1234-5678-1234/1",
+                            }
+                        ],
+                    }
+                ],
+            },
+            Setup,
+        )
+
+        assert setup.features[0].name == "feature"
+        assert setup.zones[0].oid == "zone-1"
+        assert setup.zones[0].external_oid == "external-1"
+        assert setup.zones[0].items[0].device_url == "io://1234-5678-1234/1"
+
+    def test_incomplete_zones_and_features_are_skipped(self, caplog):
+        """Zones, zone items and features missing required fields are dropped."""
+        with caplog.at_level(logging.WARNING):
+            setup = converter.structure(
+                {
+                    "devices": [],
+                    "gateways": [],
+                    "features": [{"name": "feature"}],
+                    "zones": [
+                        {
+                            "creationTime": 1,
+                            "lastUpdateTime": 1,
+                            "label": "Ground floor",
+                            "type": 0,
+                            "oid": "zone-1",
+                            "items": [
+                                {
+                                    "itemType": "device",
+                                    "deviceOID": "device-1",
+                                    "deviceURL": "io://1234-5678-1234/1",
+                                },
+                                {"itemType": "device", "deviceOID": "device-2"},
+                            ],
+                        },
+                        {"creationTime": 1, "label": "Partial", "oid": "zone-2"},
+                    ],
+                },
+                Setup,
+            )
+
+        assert setup.features == []
+        assert [zone.oid for zone in setup.zones] == ["zone-1"]
+        assert [item.device_oid for item in setup.zones[0].items] == ["device-1"]
+        assert sum("incomplete data from hub" in r.message for r in caplog.records) == 3
+
+    @pytest.mark.parametrize(
+        "fixture_name",
+        sorted(path.name for path in FIXTURES_DIR.glob("setup_*.json")),
+    )
+    def test_unstructure_round_trips(self, fixture_name: str):
+        """Unstructuring emits API-shaped JSON that structures back equal."""
+        raw_setup = json.loads(
+            (FIXTURES_DIR / fixture_name).read_text(encoding="utf-8")
+        )
+        setup = converter.structure(raw_setup, Setup)
+
+        payload = json.loads(json.dumps(converter.unstructure(setup)))
+
+        assert all("deviceURL" in device for device in payload["devices"])
+        assert converter.structure(payload, Setup) == setup
+
 
 class TestGateway:
     """Tests for Gateway model parsing, focused on sub_type handling."""
@@ -531,6 +615,14 @@ class TestStates:
         states = self._make_states(RAW_STATES)
         assert states.get_value("nonexistent") is None
 
+    def test_get_many_returns_values_in_order(self):
+        """get_many() returns one value per name, None for missing states."""
+        states = self._make_states(RAW_STATES)
+        assert states.get_many(["nonexistent", "core:NameState"]) == [
+            None,
+            "alarm name",
+        ]
+
     def test_first_returns_first_match(self):
         """first() returns the first state with a non-None value."""
         states = self._make_states(RAW_STATES)
@@ -905,6 +997,38 @@ class TestState:
         with pytest.raises(TypeError):
             _ = state.value_as_list
 
+    @pytest.mark.parametrize(
+        ("data_type", "raw", "expected"),
+        [
+            (DataType.INTEGER, "42", 42),
+            (DataType.INTEGER, 42.0, 42),
+            (DataType.INTEGER, 24.2, 24.2),
+            (DataType.DATE, 1700000000.0, 1700000000),
+            (DataType.FLOAT, 21, 21.0),
+            (DataType.FLOAT, "21.5", 21.5),
+            (DataType.BOOLEAN, 1, True),
+            (DataType.BOOLEAN, "false", False),
+            (DataType.JSON_OBJECT, '{"foo": 1}', {"foo": 1}),
+            (DataType.STRING, "42", "42"),
+        ],
+    )
+    def test_value_is_normalised_at_construction(self, data_type, raw, expected):
+        """Local and cloud representations normalise to the same Python type."""
+        state = State(name="state", type=data_type, value=raw)
+        assert state.value == expected
+        assert type(state.value) is type(expected)
+
+    def test_unparseable_string_is_kept(self):
+        """Unlike event states, setup states keep values that do not parse."""
+        state = State(name="state", type=DataType.JSON_ARRAY, value="[oops")
+        assert state.value == "[oops"
+
+    def test_int_type_is_coerced_to_data_type(self):
+        """A plain int type is converted to DataType."""
+        state = State(name="state", type=2, value=1)  # type: ignore[arg-type]
+        assert state.type is DataType.FLOAT
+        assert state.value_as_float == 1.0
+
 
 class TestEventState:
     """Unit tests for EventState cloud payload casting behavior."""
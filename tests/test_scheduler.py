@@ -0,0 +1,227 @@
+"""Tests for the local timer-wheel action scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from pyoverkiz.auth import UsernamePasswordCredentials
+from pyoverkiz.client import OverkizClient, OverkizClientSettings
+from pyoverkiz.enums import ExecutionMode, Server
+from pyoverkiz.models import Action, Command
+from pyoverkiz.scheduler import ActionScheduler, ActionSchedulerSettings
+
+FAST = ActionSchedulerSettings(resolution=0.01)
+
+
+def _action(device: int, command: str = "close", *parameters: int) -> Action:
+    return Action(
+        device_url=f"io://1234-5678-9012/{device}",
+        commands=[Command(name=command, parameters=list(parameters) or None)],
+    )
+
+
+def test_settings_validate():
+    """Invalid settings are rejected."""
+    with pytest.raises(ValueError, match="resolution"):
+        ActionSchedulerSettings(resolution=0).validate()
+    with pytest.raises(ValueError, match="wheel_size"):
+        ActionSchedulerSettings(wheel_size=0).validate()
+    ActionSchedulerSettings().validate()
+
+
+@pytest.mark.asyncio
+async def test_timers_due_in_same_tick_share_one_call():
+    """Timers due together are merged into one action group per (mode, label)."""
+    executor = AsyncMock(return_value="exec-1")
+    scheduler = ActionScheduler(executor, ActionSchedulerSettings(resolution=0.05))
+
+    first = scheduler.schedule([_action(1)], delay=0.02)
+    scheduler.schedule([_action(1, "setClosure", 50), _action(2)], delay=0.02)
+    scheduler.schedule([_action(3)], delay=0.02, mode=ExecutionMode.HIGH_PRIORITY)
+    assert scheduler.pending == 3
+
+    await asyncio.sleep(0.15)
+
+    assert executor.await_count == 2
+    calls = {call.args[1]: call.args[0] for call in executor.await_args_list}
+    merged = calls[None]
+    assert [action.device_url for action in merged] == [
+        "io://1234-5678-9012/1",
+        "io://1234-5678-9012/2",
+    ]
+    assert [command.name for command in merged[0].commands] == ["close", "setClosure"]
+    assert len(calls[ExecutionMode.HIGH_PRIORITY]) == 1
+    assert first.last_exec_id == "exec-1"
+    assert not first.pending
+    assert scheduler.get_stats()["fired"] == 3
+    assert scheduler.get_stats()["batches"] == 2
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_timer_does_not_fire():
+    """A cancelled timer is removed from the wheel."""
+    executor = AsyncMock(return_value="exec-1")
+    scheduler = ActionScheduler(executor, FAST)
+
+    timer = scheduler.schedule([_action(1)], delay=0.02)
+    assert timer.cancel()
+    assert not timer.cancel()
+    assert scheduler.pending == 0
+
+    await asyncio.sleep(0.05)
+    executor.assert_not_awaited()
+    assert scheduler.get_stats()["cancelled"] == 1
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_timers_beyond_one_wheel_turn_wait_for_their_round():
+    """A timer hashed to a slot visited earlier does not fire a round early."""
+    done = asyncio.Event()
+    fired_at: list[float] = []
+
+    async def executor(
+        actions: list[Action], mode: ExecutionMode | None, label: str | None
+    ) -> str:
+        fired_at.append(time.monotonic())
+        if len(fired_at) == 2:
+            done.set()
+        return "exec-1"
+
+    scheduler = ActionScheduler(
+        AsyncMock(side_effect=executor),
+        ActionSchedulerSettings(resolution=0.01, wheel_size=4),
+    )
+
+    start = time.monotonic()
+    scheduler.schedule([_action(1)], delay=0.1)
+    scheduler.schedule([_action(2)], delay=0.01)
+    await asyncio.wait_for(done.wait(), timeout=1)
+
+    assert fired_at[1] - start >= 0.1
+    assert fired_at[0] - start < 0.1
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_recurring_timer_runs_until_cancelled():
+    """Recurring timers are rescheduled after each run."""
+    executor = AsyncMock(return_value="exec-1")
+    scheduler = ActionScheduler(executor, FAST)
+
+    timer = scheduler.schedule([_action(1)], interval=0.02)
+    await asyncio.sleep(0.09)
+    assert timer.pending
+    assert timer.fired >= 2
+
+    timer.cancel()
+    fired = executor.await_count
+    await asyncio.sleep(0.05)
+    assert executor.await_count == fired
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_dump_and_restore_pending_timers():
+    """Pending timers survive a restart through dump() and restore()."""
+    scheduler = ActionScheduler(AsyncMock(return_value="exec-1"), FAST)
+    later = scheduler.schedule(
+        [_action(1, "setClosure", 30)],
+        delay=60,
+        interval=3600,
+        mode=ExecutionMode.HIGH_PRIORITY,
+        label="Night",
+    )
+    overdue = scheduler.schedule([_action(2)], delay=60)
+    saved = json.loads(json.dumps(scheduler.dump()))
+    await scheduler.close()
+
+    saved[1]["due"] = time.time() - 5
+    executor = AsyncMock(return_value="exec-2")
+    restored = ActionScheduler(executor, FAST)
+    timers = restored.restore(saved)
+
+    assert [timer.id for timer in timers] == [later.id, overdue.id]
+    assert timers[0].due == pytest.approx(later.due, abs=0.5)
+    assert timers[0].interval == 3600
+    assert timers[0].mode is ExecutionMode.HIGH_PRIORITY
+    assert timers[0].label == "Night"
+    assert timers[0].actions[0].commands[0].parameters == [30]
+
+    await asyncio.sleep(0.05)
+    executor.assert_awaited_once()
+    assert restored.pending == 1
+    await restored.close()
+
+
+@pytest.mark.asyncio
+async def test_drift_and_errors_are_reported():
+    """Firing delays are recorded and executor failures are counted."""
+    executor = AsyncMock(side_effect=KeyError("boom"))
+    scheduler = ActionScheduler(executor, FAST)
+
+    timer = scheduler.schedule([_action(1)], delay=0.01)
+    await asyncio.sleep(0.05)
+
+    stats = scheduler.get_stats()
+    assert stats["drift"]["count"] == 1
+    assert stats["drift"]["max"] >= 0
+    assert stats["errors"] == {"KeyError": 1}
+    assert timer.last_exec_id is None
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_schedule_argument_validation():
+    """Ambiguous or empty schedules are rejected."""
+    scheduler = ActionScheduler(AsyncMock(), FAST)
+    with pytest.raises(ValueError, match="either delay or at"):
+        scheduler.schedule([_action(1)], delay=1, at=time.time())
+    with pytest.raises(ValueError, match="interval"):
+        scheduler.schedule([_action(1)], interval=0)
+    with pytest.raises(ValueError, match="empty"):
+        scheduler.schedule([])
+
+    await scheduler.close()
+    with pytest.raises(RuntimeError):
+        scheduler.schedule([_action(1)])
+
+
+class TestClientScheduler:
+    """Tests for the scheduler wired into the client."""
+
+    @pytest.mark.asyncio
+    async def test_scheduled_actions_are_executed(self):
+        """Due timers are sent through execute_action_group."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+            settings=OverkizClientSettings(scheduler=FAST),
+        )
+        assert client.scheduler is not None
+
+        with patch.object(
+            client, "_post", new=AsyncMock(return_value={"execId": "exec-1"})
+        ) as post:
+            timer = client.scheduler.schedule([_action(1)], delay=0.01)
+            await asyncio.sleep(0.05)
+
+        post.assert_awaited_once()
+        assert timer.last_exec_id == "exec-1"
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self):
+        """Without settings, the client has no scheduler."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+        )
+        assert client.scheduler is None
+        await client.close()
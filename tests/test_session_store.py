@@ -0,0 +1,297 @@
+"""Tests for persisted authentication sessions."""
+
+# ruff: noqa: S105, S106, S107
+# S105/S106/S107: Test credentials use dummy values.
+
+from __future__ import annotations
+
+import datetime as dt
+import stat
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiohttp import ClientSession
+
+from pyoverkiz.auth import (
+    FileSessionStore,
+    MemorySessionStore,
+    RexelOAuthCodeCredentials,
+    StoredSession,
+    TokenCredentials,
+    UsernamePasswordCredentials,
+    session_key,
+)
+from pyoverkiz.auth.strategies import SessionLoginStrategy, SomfyAuthStrategy
+from pyoverkiz.client import OverkizClient, OverkizClientSettings
+from pyoverkiz.const import SUPPORTED_SERVERS
+from pyoverkiz.enums import Server
+from pyoverkiz.exceptions import NotAuthenticatedError
+
+CREDENTIALS = UsernamePasswordCredentials("user@example.com", "password")
+
+
+def _in(seconds: int) -> dt.datetime:
+    return dt.datetime.now(dt.UTC) + dt.timedelta(seconds=seconds)
+
+
+def _key(client: OverkizClient) -> str:
+    key = session_key(client.server_config, CREDENTIALS)
+    assert key is not None
+    return key
+
+
+def _token_session(seconds: int = 3600, refresh_token: str | None = "refresh"):
+    return StoredSession(
+        access_token="access", refresh_token=refresh_token, expires_at=_in(seconds)
+    )
+
+
+def test_stored_session_round_trip():
+    """A stored session survives serialization."""
+    session = StoredSession(
+        access_token="access",
+        refresh_token="refresh",
+        expires_at=_in(60),
+        cookies={"JSESSIONID": "abc"},
+        gateway_id="1234-5678-9012",
+    )
+    assert StoredSession.from_dict(session.to_dict()) == session
+    assert "access" not in repr(session)
+
+
+def test_session_key_hashes_the_username():
+    """Keys differ per account and server, without the username in clear."""
+    key = session_key(SUPPORTED_SERVERS[Server.SOMFY_EUROPE], CREDENTIALS)
+
+    assert "user@example.com" not in key
+    assert key != session_key(
+        SUPPORTED_SERVERS[Server.SOMFY_EUROPE],
+        UsernamePasswordCredentials("other@example.com", "password"),
+    )
+    assert key != session_key(SUPPORTED_SERVERS[Server.ATLANTIC_COZYTOUCH], CREDENTIALS)
+
+
+def test_session_key_requires_a_stable_identity():
+    """Credentials without an account identity get no key unless one is given."""
+    server = SUPPORTED_SERVERS[Server.REXEL]
+    first = RexelOAuthCodeCredentials("code-1", "http://redirect.uri", "verifier")
+    second = RexelOAuthCodeCredentials("code-2", "http://redirect.uri", "verifier")
+
+    assert session_key(server, first) is None
+    assert session_key(server, first, account="a") != session_key(
+        server, second, account="b"
+    )
+    assert session_key(server, TokenCredentials("one")) != session_key(
+        server, TokenCredentials("two")
+    )
+
+
+@pytest.mark.asyncio
+async def test_file_store(tmp_path: Path):
+    """Sessions are written to a private file and can be deleted."""
+    path = tmp_path / "sessions.json"
+    store = FileSessionStore(path)
+    session = _token_session()
+
+    assert await store.load("key") is None
+    await store.save("key", session)
+    await store.save("other", StoredSession(cookies={"JSESSIONID": "abc"}))
+
+    assert await FileSessionStore(path).load("key") == session
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+    await store.delete("key")
+    assert await store.load("key") is None
+    assert await store.load("other") is not None
+
+
+@pytest.mark.asyncio
+async def test_file_store_ignores_unreadable_files(tmp_path: Path):
+    """A corrupt file is treated as empty and replaced on the next save."""
+    path = tmp_path / "sessions.json"
+    path.write_text("{not json", encoding="utf-8")
+    store = FileSessionStore(path)
+
+    assert await store.load("key") is None
+    await store.save("key", _token_session())
+    assert await store.load("key") is not None
+
+
+@pytest.mark.asyncio
+async def test_memory_store_returns_copies():
+    """Changing a loaded session does not change the stored one."""
+    store = MemorySessionStore()
+    await store.save("key", StoredSession(cookies={"JSESSIONID": "abc"}))
+
+    loaded = await store.load("key")
+    assert loaded is not None
+    loaded.cookies["JSESSIONID"] = "changed"
+    assert (await store.load("key")) == StoredSession(cookies={"JSESSIONID": "abc"})
+
+
+class TestStrategies:
+    """Tests for exporting and restoring strategy sessions."""
+
+    @pytest.mark.asyncio
+    async def test_oauth_tokens(self):
+        """Tokens are restored unless expired without a refresh token."""
+        async with ClientSession() as session:
+            server = SUPPORTED_SERVERS[Server.SOMFY_EUROPE]
+            strategy = SomfyAuthStrategy(CREDENTIALS, session, server, True)
+            assert strategy.export_session() is None
+
+            assert strategy.restore_session(_token_session(seconds=-60))
+            assert strategy.context.is_expired()
+
+            strategy = SomfyAuthStrategy(CREDENTIALS, session, server, True)
+            assert not strategy.restore_session(
+                _token_session(seconds=-60, refresh_token=None)
+            )
+            assert strategy.context.access_token is None
+
+            assert strategy.restore_session(_token_session())
+            assert await strategy.auth_headers() == {"Authorization": "Bearer access"}
+            assert strategy.export_session() == StoredSession(
+                access_token="access",
+                refresh_token="refresh",
+                expires_at=strategy.context.expires_at,
+            )
+
+    @pytest.mark.asyncio
+    async def test_session_cookies(self):
+        """Session-login strategies store the cookies of the API endpoint."""
+        server = SUPPORTED_SERVERS[Server.ATLANTIC_COZYTOUCH]
+        async with ClientSession() as session:
+            strategy = SessionLoginStrategy(CREDENTIALS, session, server, True)
+            assert strategy.export_session() is None
+            assert not strategy.restore_session(StoredSession())
+
+            assert strategy.restore_session(
+                StoredSession(cookies={"JSESSIONID": "abc"})
+            )
+            assert strategy.export_session() == StoredSession(
+                cookies={"JSESSIONID": "abc"}
+            )
+
+
+class TestClientSessionStore:
+    """Tests for the session store wired into the client."""
+
+    @staticmethod
+    def _client(store: MemorySessionStore) -> OverkizClient:
+        return OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=CREDENTIALS,
+            settings=OverkizClientSettings(session_store=store),
+        )
+
+    @staticmethod
+    def _fake_login(client: OverkizClient) -> None:
+        client._auth.context.update_from_token(  # type: ignore[attr-defined]
+            {"access_token": "fresh", "refresh_token": "refresh", "expires_in": 3600}
+        )
+
+    @pytest.mark.asyncio
+    async def test_login_saves_and_restart_skips_login(self):
+        """The first client logs in and saves; the next one restores."""
+        store = MemorySessionStore()
+        first = self._client(store)
+        with (
+            patch.object(
+                first._auth,
+                "login",
+                new=AsyncMock(side_effect=lambda: self._fake_login(first)),
+            ),
+            patch.object(first, "register_event_listener", new=AsyncMock()),
+        ):
+            await first.login()
+        await first.close()
+
+        second = self._client(store)
+        with (
+            patch.object(second._auth, "login", new=AsyncMock()) as mock_login,
+            patch.object(second, "register_event_listener", new=AsyncMock()),
+        ):
+            await second.login()
+
+        mock_login.assert_not_awaited()
+        assert await second._auth.auth_headers() == {"Authorization": "Bearer fresh"}
+        await second.close()
+
+    @pytest.mark.asyncio
+    async def test_rejected_session_falls_back_to_login(self):
+        """A stored session rejected by the server triggers a full login."""
+        store = MemorySessionStore()
+        client = self._client(store)
+        await store.save(_key(client), _token_session())
+
+        with (
+            patch.object(
+                client._auth,
+                "login",
+                new=AsyncMock(side_effect=lambda: self._fake_login(client)),
+            ) as mock_login,
+            patch.object(
+                client,
+                "register_event_listener",
+                new=AsyncMock(side_effect=[NotAuthenticatedError("expired"), "id"]),
+            ) as mock_register,
+        ):
+            await client.login()
+
+        mock_login.assert_awaited_once()
+        assert mock_register.await_count == 2
+        saved = await store.load(_key(client))
+        assert saved is not None
+        assert saved.access_token == "fresh"
+        await client.close()
+
+    @staticmethod
+    def _rexel_client(
+        store: MemorySessionStore, code: str, account: str | None = None
+    ) -> OverkizClient:
+        return OverkizClient(
+            server=Server.REXEL,
+            credentials=RexelOAuthCodeCredentials(code, "http://redirect.uri", "v"),
+            settings=OverkizClientSettings(
+                session_store=store, session_account=account
+            ),
+        )
+
+    async def _login(self, client: OverkizClient) -> AsyncMock:
+        with (
+            patch.object(
+                client._auth,
+                "login",
+                new=AsyncMock(side_effect=lambda: self._fake_login(client)),
+            ) as mock_login,
+            patch.object(client, "register_event_listener", new=AsyncMock()),
+        ):
+            await client.login()
+        await client.close()
+        return mock_login
+
+    @pytest.mark.asyncio
+    async def test_accounts_without_identity_are_not_stored(self):
+        """Two OAuth-code accounts never share a stored session by default."""
+        store = MemorySessionStore()
+
+        await self._login(self._rexel_client(store, "code-a"))
+        assert store._sessions == {}
+
+        mock_login = await self._login(self._rexel_client(store, "code-b"))
+        mock_login.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_session_account_keys_the_store(self):
+        """An explicit account identity keeps the sessions of accounts apart."""
+        store = MemorySessionStore()
+
+        await self._login(self._rexel_client(store, "code-a", account="a"))
+        mock_login = await self._login(self._rexel_client(store, "code-b", account="b"))
+        mock_login.assert_awaited_once()
+        assert len(store._sessions) == 2
+
+        mock_login = await self._login(self._rexel_client(store, "code-c", account="a"))
+        mock_login.assert_not_awaited()
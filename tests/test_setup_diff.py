@@ -0,0 +1,324 @@
+"""Tests for the structural diff between two setups."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from pyoverkiz.auth.credentials import UsernamePasswordCredentials
+from pyoverkiz.client import OverkizClient
+from pyoverkiz.converter import converter
+from pyoverkiz.enums import DataType, EventName, ProductType, Server
+from pyoverkiz.models import (
+    Definition,
+    Device,
+    DeviceAvailableEvent,
+    DeviceCreatedEvent,
+    DeviceRemovedEvent,
+    DeviceStateChangedEvent,
+    DeviceUnavailableEvent,
+    DeviceUpdatedEvent,
+    Place,
+    Setup,
+    State,
+    States,
+    Zone,
+    ZoneDeletedEvent,
+    ZoneItem,
+    ZoneUpdatedEvent,
+)
+from pyoverkiz.setup_diff import diff_setups
+from pyoverkiz.setup_index import SetupIndex
+from pyoverkiz.setup_versions import SetupVersions
+from pyoverkiz.state_columns import StateColumns
+
+SETUP_FIXTURES = Path(__file__).parent / "fixtures" / "setup"
+
+
+def _device(
+    device_url: str,
+    *,
+    label: str | None = None,
+    closure: int = 0,
+    available: bool = True,
+) -> Device:
+    return Device(
+        available=available,
+        enabled=True,
+        label=label or device_url,
+        device_url=device_url,
+        controllable_name="io:RollerShutterGenericIOComponent",
+        definition=Definition(
+            widget_name="PositionableRollerShutter", ui_class="RollerShutter"
+        ),
+        states=States(
+            [State(name="core:ClosureState", type=DataType.INTEGER, value=closure)]
+        ),
+        type=ProductType.ACTUATOR,
+        place_oid="living",
+    )
+
+
+def _zone(oid: str, *device_urls: str) -> Zone:
+    return Zone(
+        creation_time=1,
+        last_update_time=1,
+        label=oid,
+        type=0,
+        oid=oid,
+        items=[
+            ZoneItem(item_type="device", device_oid=url, device_url=url)
+            for url in device_urls
+        ],
+    )
+
+
+def _setup(
+    *devices: Device, living: str = "Living", zones: list[Zone] | None = None
+) -> Setup:
+    return Setup(
+        oid="setup",
+        devices=list(devices),
+        zones=zones,
+        root_place=Place(
+            creation_time=1,
+            label="House",
+            type=1,
+            oid="house",
+            sub_places=[
+                Place(creation_time=1, label=living, type=2, oid="living"),
+                Place(creation_time=1, label="Bedroom", type=2, oid="bedroom"),
+            ],
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "fixture_name",
+    sorted(path.name for path in SETUP_FIXTURES.glob("*.json")),
+)
+def test_identical_setups_have_no_diff(fixture_name: str):
+    """Two independently structured copies of a setup compare equal."""
+    payload = json.loads((SETUP_FIXTURES / fixture_name).read_text(encoding="utf-8"))
+    diff = diff_setups(
+        converter.structure(payload, Setup), converter.structure(payload, Setup)
+    )
+    assert not diff
+    assert diff.to_events() == []
+
+
+def test_devices_are_added_removed_and_changed():
+    """Devices are matched by URL and compared field by field."""
+    old = _setup(
+        _device("io://1/1"),
+        _device("io://1/2"),
+        _device("io://1/3"),
+    )
+    new = _setup(
+        _device("io://1/1", label="Kitchen", closure=40),
+        _device("io://1/3", available=False),
+        _device("io://1/4"),
+    )
+
+    diff = diff_setups(old, new)
+
+    assert [device.device_url for device in diff.added_devices] == ["io://1/4"]
+    assert [device.device_url for device in diff.removed_devices] == ["io://1/2"]
+    first, third = diff.changed_devices
+    assert first.device_url == "io://1/1"
+    assert first.fields == {"label"}
+    assert first.states["core:ClosureState"].value == 40
+    assert not first.definition_changed
+    assert third.fields == {"available"}
+    assert third.states == {}
+
+
+def test_unchanged_device_objects_are_skipped():
+    """Devices shared by both setups are not compared."""
+    shared = _device("io://1/1")
+    assert not diff_setups(_setup(shared), _setup(shared))
+
+
+def test_removed_state_is_reported():
+    """A state missing from the new device is reported as None."""
+    old = _device("io://1/1")
+    new = _device("io://1/1")
+    new.states = States()
+
+    (change,) = diff_setups(_setup(old), _setup(new)).changed_devices
+    assert change.states == {"core:ClosureState": None}
+
+
+def test_places_and_zones_are_diffed():
+    """Only the place that changed is reported, not its ancestors."""
+    old = _setup(zones=[_zone("z1", "io://1/1"), _zone("z2")])
+    new = _setup(living="Lounge", zones=[_zone("z1", "io://1/2"), _zone("z3")])
+    new.root_place.sub_places.pop()
+
+    diff = diff_setups(old, new)
+
+    assert [place.oid for place in diff.changed_places] == ["living"]
+    assert [place.oid for place in diff.removed_places] == ["bedroom"]
+    assert diff.added_places == []
+    assert [zone.oid for zone in diff.changed_zones] == ["z1"]
+    assert [zone.oid for zone in diff.added_zones] == ["z3"]
+    assert [zone.oid for zone in diff.removed_zones] == ["z2"]
+
+
+def test_to_events_mirrors_the_event_stream():
+    """The diff is reported as the events the server would have sent."""
+    old = _setup(
+        _device("io://1/1"),
+        _device("io://1/2"),
+        _device("io://1/3", available=False),
+        zones=[_zone("z1", "io://1/1"), _zone("z2")],
+    )
+    new = _setup(
+        _device("io://1/1", label="Kitchen", closure=40),
+        _device("io://1/3"),
+        _device("io://1/4"),
+        zones=[_zone("z1", "io://1/3")],
+    )
+
+    events = diff_setups(old, new).to_events(setup_oid=new.oid)
+
+    assert [type(event) for event in events] == [
+        DeviceCreatedEvent,
+        DeviceUpdatedEvent,
+        DeviceStateChangedEvent,
+        DeviceAvailableEvent,
+        DeviceRemovedEvent,
+        ZoneUpdatedEvent,
+        ZoneDeletedEvent,
+    ]
+    assert all(event.setup_oid == "setup" for event in events)
+    assert events[1].label == "Kitchen"
+    assert events[2].device_states[0].value == 40
+    assert events[5].device_urls == ["io://1/3"]
+
+
+def test_events_keep_an_index_in_sync():
+    """Applying the synthetic events to an index of the old setup updates it."""
+    old = _setup(_device("io://1/1"), _device("io://1/2"), zones=[_zone("z1")])
+    new = _setup(
+        _device("io://1/1", available=False),
+        zones=[_zone("z1", "io://1/1")],
+    )
+    index = SetupIndex(old)
+
+    index.observe_events(diff_setups(old, new).to_events())
+
+    assert index.get("io://1/2") is None
+    assert not index.get("io://1/1").available
+    assert [device.device_url for device in index.by_zone("z1")] == ["io://1/1"]
+
+
+def test_apply_diff_matches_a_rebuild():
+    """Caches updated from a diff match caches built from the new setup."""
+    old = _setup(
+        _device("io://1/1"),
+        _device("io://1/2"),
+        _device("io://1/3", closure=10),
+        zones=[_zone("z1", "io://1/2")],
+    )
+    new = _setup(
+        _device("io://1/4", closure=70),
+        _device("io://1/1", label="Kitchen", closure=40),
+        _device("io://1/3", closure=10),
+        living="Lounge",
+        zones=[_zone("z1", "io://1/1")],
+    )
+    diff = diff_setups(old, new)
+    index = SetupIndex(old)
+    columns = StateColumns(old.devices)
+    versions = SetupVersions()
+    versions.load(old)
+    unchanged = versions.view()["io://1/3"]
+
+    index.apply_diff(diff, new)
+    columns.apply_diff(diff)
+    versions.apply_diff(diff, new)
+
+    rebuilt = SetupIndex(new)
+    assert index.devices == rebuilt.devices
+    assert all(
+        device is new_device
+        for device, new_device in zip(index, new.devices, strict=True)
+    )
+    assert index.by_place("living") == rebuilt.by_place("living")
+    assert index.by_zone("z1") == rebuilt.by_zone("z1")
+    assert index.places.get("living").label == "Lounge"
+    assert index.get("io://1/2") is None
+
+    assert columns.get("io://1/1", "core:ClosureState") == 40
+    assert columns.get("io://1/4", "core:ClosureState") == 70
+    assert "io://1/2" not in columns
+    assert sorted(columns.device_urls) == sorted(
+        device.device_url for device in rebuilt
+    )
+
+    view = versions.view()
+    assert list(view) == ["io://1/4", "io://1/1", "io://1/3"]
+    assert view["io://1/3"] is unchanged
+    assert view["io://1/1"].label == "Kitchen"
+    assert view["io://1/1"] is not new.devices[1]
+    assert view.setup is not None
+    assert view.setup.root_place.sub_places[0].label == "Lounge"
+
+
+def test_apply_diff_keeps_event_updates():
+    """Devices the diff does not report keep the updates applied by events."""
+    old = _setup(_device("io://1/1"), _device("io://1/2"))
+    new = _setup(_device("io://1/1"), _device("io://1/2", label="Renamed"))
+    index = SetupIndex(old)
+    index.observe_events(
+        [
+            DeviceUnavailableEvent(
+                name=EventName.DEVICE_UNAVAILABLE, device_url="io://1/1"
+            )
+        ]
+    )
+
+    index.apply_diff(diff_setups(old, new), new)
+
+    assert not index.get("io://1/1").available
+    assert index.get("io://1/2") is new.devices[1]
+    assert index.by_base_device_url("io://1/1") == [index.get("io://1/1")]
+
+
+@pytest.mark.asyncio
+async def test_refresh_applies_the_diff_to_the_client_caches():
+    """get_setup(refresh=True) exposes the diff and updates the caches with it."""
+    client = OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("username", "password"),
+    )
+    old = _setup(_device("io://1/1"), _device("io://1/2"))
+    new = _setup(_device("io://1/1", closure=30), _device("io://1/3"))
+    with patch.object(
+        client,
+        "_get",
+        new=AsyncMock(
+            side_effect=[converter.unstructure(setup) for setup in (old, new)]
+        ),
+    ):
+        await client.get_setup()
+        assert client.last_setup_diff is None
+        index = client.get_setup_index()
+        columns = client.get_state_columns()
+
+        with patch.object(SetupIndex, "load", side_effect=AssertionError):
+            await client.get_setup(refresh=True)
+
+    diff = client.last_setup_diff
+    assert diff is not None
+    assert [device.device_url for device in diff.added_devices] == ["io://1/3"]
+    assert client.get_setup_index() is index
+    assert index.devices == client.devices
+    assert client.get_state_columns() is columns
+    assert columns.get("io://1/1", "core:ClosureState") == 30
+    assert "io://1/2" not in columns
+    await client.close()
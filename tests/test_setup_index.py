@@ -0,0 +1,647 @@
+"""Tests for the multi-key setup index."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from pyoverkiz.auth.credentials import UsernamePasswordCredentials
+from pyoverkiz.client import OverkizClient
+from pyoverkiz.converter import converter
+from pyoverkiz.enums import (
+    DataType,
+    EventName,
+    ProductType,
+    Protocol,
+    Server,
+    UIClass,
+    UIClassifier,
+    UIProfile,
+)
+from pyoverkiz.models import (
+    Command,
+    CommandDefinition,
+    CommandDefinitions,
+    Connectivity,
+    Definition,
+    Device,
+    DeviceCreatedEvent,
+    DeviceRemovedEvent,
+    DeviceUnavailableEvent,
+    DeviceUpdatedEvent,
+    Gateway,
+    GatewayPlaceUpdatedEvent,
+    Place,
+    Setup,
+    State,
+    StateDefinition,
+    StateDefinitions,
+    States,
+    Zone,
+    ZoneCreatedEvent,
+    ZoneItem,
+    ZoneUpdatedEvent,
+)
+from pyoverkiz.setup_index import PlaceTree, SetupIndex
+
+SETUP_FIXTURES = Path(__file__).parent / "fixtures" / "setup"
+
+
+def _device(
+    device_url: str,
+    *,
+    ui_class: str = "RollerShutter",
+    widget: str = "PositionableRollerShutter",
+    place_oid: str | None = "living",
+) -> Device:
+    return Device(
+        available=True,
+        enabled=True,
+        label=device_url,
+        device_url=device_url,
+        controllable_name="io:RollerShutterGenericIOComponent",
+        definition=Definition(widget_name=widget, ui_class=ui_class),
+        type=ProductType.ACTUATOR,
+        place_oid=place_oid,
+    )
+
+
+def _setup() -> Setup:
+    return Setup(
+        devices=[
+            _device("io://1111-1111-1111/1"),
+            _device("io://1111-1111-1111/2", place_oid="bedroom"),
+            _device("rts://2222-2222-2222/3"),
+            _device(
+                "io://1111-1111-1111/4#2",
+                ui_class="Light",
+                widget="DimmerLight",
+            ),
+            _device("io://1111-1111-1111/4#1", ui_class="Light", widget="DimmerLight"),
+        ],
+        root_place=Place(
+            creation_time=0,
+            label="House",
+            type=0,
+            oid="house",
+            sub_places=[
+                Place(creation_time=0, label="Living", type=1, oid="living"),
+                Place(creation_time=0, label="Bedroom", type=1, oid="bedroom"),
+            ],
+        ),
+        zones=[
+            Zone(
+                creation_time=0,
+                last_update_time=0,
+                label="Ground floor",
+                type=0,
+                oid="zone-1",
+                items=[
+                    ZoneItem(
+                        item_type="device",
+                        device_oid="d1",
+                        device_url="io://1111-1111-1111/1",
+                    )
+                ],
+            )
+        ],
+    )
+
+
+def _urls(devices: list[Device]) -> list[str]:
+    return [device.device_url for device in devices]
+
+
+def test_single_key_lookups():
+    """Each key has its own index."""
+    index = SetupIndex(_setup())
+
+    assert len(index) == 5
+    assert _urls(index.by_place("bedroom")) == ["io://1111-1111-1111/2"]
+    assert _urls(index.by_protocol(Protocol.RTS)) == ["rts://2222-2222-2222/3"]
+    assert len(index.by_gateway("1111-1111-1111")) == 4
+    assert _urls(index.by_ui_class(UIClass.LIGHT)) == [
+        "io://1111-1111-1111/4#2",
+        "io://1111-1111-1111/4#1",
+    ]
+    assert len(index.by_widget("DimmerLight")) == 2
+    assert len(index.by_controllable_name("io:RollerShutterGenericIOComponent")) == 5
+    assert len(index.by_base_device_url("io://1111-1111-1111/4")) == 2
+    assert _urls(index.by_zone("zone-1")) == ["io://1111-1111-1111/1"]
+    assert index.by_place("garage") == []
+    assert {place.oid for place in index.places} == {"house", "living", "bedroom"}
+    assert set(index.zones) == {"zone-1"}
+
+
+def test_composed_queries():
+    """Filters intersect across keys and union within a key."""
+    index = SetupIndex(_setup())
+
+    assert _urls(
+        index.query(place_oid="living", ui_class="RollerShutter", protocol="io")
+    ) == ["io://1111-1111-1111/1"]
+    assert _urls(index.query(place_oid=["living", "bedroom"], protocol="io")) == [
+        "io://1111-1111-1111/1",
+        "io://1111-1111-1111/2",
+        "io://1111-1111-1111/4#2",
+        "io://1111-1111-1111/4#1",
+    ]
+    assert _urls(
+        index.query(
+            ui_class="Light",
+            predicate=lambda device: device.device_url.endswith("#1"),
+        )
+    ) == ["io://1111-1111-1111/4#1"]
+    assert len(index.query()) == 5
+
+    with pytest.raises(TypeError, match="label"):
+        index.query(label="x")
+
+
+def test_events_keep_index_current():
+    """Removals, updates and zone changes are applied incrementally."""
+    index = SetupIndex(_setup())
+
+    index.observe_events(
+        [
+            DeviceRemovedEvent(
+                name=EventName.DEVICE_REMOVED, device_url="io://1111-1111-1111/1"
+            ),
+            DeviceUpdatedEvent(
+                name=EventName.DEVICE_UPDATED,
+                device_url="io://1111-1111-1111/2",
+                place_oid="living",
+                label="Renamed",
+            ),
+            ZoneUpdatedEvent(
+                name=EventName.ZONE_UPDATED,
+                zone_oid="zone-1",
+                device_urls=["rts://2222-2222-2222/3"],
+            ),
+        ]
+    )
+
+    assert "io://1111-1111-1111/1" not in index
+    assert index.by_place("bedroom") == []
+    assert "io://1111-1111-1111/2" in _urls(index.by_place("living"))
+    assert index.get("io://1111-1111-1111/2").label == "Renamed"
+    assert _urls(index.by_zone("zone-1")) == ["rts://2222-2222-2222/3"]
+    assert not index.stale
+
+    index.observe_events(
+        [
+            DeviceCreatedEvent(
+                name=EventName.DEVICE_CREATED, device_url="io://1111-1111-1111/9"
+            )
+        ]
+    )
+    assert index.stale
+
+
+def test_events_do_not_modify_the_loaded_setup():
+    """Updated devices and zones are copies, re-indexed under every key."""
+    setup = _setup()
+    original = setup.devices[1]
+    index = SetupIndex(setup)
+
+    index.observe_events(
+        [
+            DeviceUpdatedEvent(
+                name=EventName.DEVICE_UPDATED,
+                device_url=original.device_url,
+                place_oid="living",
+                label="Renamed",
+                controllable_name="io:VerticalExteriorAwningIOComponent",
+            ),
+            DeviceUnavailableEvent(
+                name=EventName.DEVICE_UNAVAILABLE, device_url=original.device_url
+            ),
+            ZoneUpdatedEvent(
+                name=EventName.ZONE_UPDATED,
+                zone_oid="zone-1",
+                label="Upstairs",
+                device_urls=["io://1111-1111-1111/1", original.device_url],
+            ),
+            ZoneCreatedEvent(
+                name=EventName.ZONE_CREATED,
+                zone_oid="zone-2",
+                label="Lights",
+                device_urls=["io://1111-1111-1111/4#1"],
+            ),
+        ]
+    )
+
+    updated = index.get(original.device_url)
+    assert updated is not original
+    assert (updated.label, updated.place_oid, updated.available) == (
+        "Renamed",
+        "living",
+        False,
+    )
+    assert (original.label, original.place_oid, original.available) == (
+        original.device_url,
+        "bedroom",
+        True,
+    )
+    assert index.by_controllable_name("io:VerticalExteriorAwningIOComponent") == [
+        updated
+    ]
+    assert updated not in index.by_controllable_name(original.controllable_name)
+    assert updated in index.by_ui_class(updated.ui_class)
+    # The device keeps its position in the setup order.
+    assert index.devices[1] is updated
+
+    zone = index.zones["zone-1"]
+    assert zone.label == "Upstairs"
+    assert [item.device_url for item in zone.items] == [
+        "io://1111-1111-1111/1",
+        original.device_url,
+    ]
+    assert zone.items[0] is setup.zones[0].items[0]
+    assert setup.zones[0].label == "Ground floor"
+    assert len(setup.zones[0].items) == 1
+    assert index.zones["zone-2"].label == "Lights"
+    assert _urls(index.by_zone("zone-2")) == ["io://1111-1111-1111/4#1"]
+
+
+def test_removed_device_leaves_its_zones():
+    """A removed device is dropped from copies of the zones listing it."""
+    setup = _setup()
+    index = SetupIndex(setup)
+
+    index.observe_events(
+        [
+            DeviceRemovedEvent(
+                name=EventName.DEVICE_REMOVED, device_url="io://1111-1111-1111/1"
+            )
+        ]
+    )
+
+    zone = index.zones["zone-1"]
+    assert zone is not setup.zones[0]
+    assert zone.items == []
+    assert index.by_zone("zone-1") == []
+    assert len(setup.zones[0].items) == 1
+
+
+@pytest.mark.parametrize(
+    "fixture_name", ["setup_3_gateways.json", "setup_tahoma_pro.json"]
+)
+def test_matches_linear_scan(fixture_name: str):
+    """Indexed lookups return the same devices as a scan of the setup."""
+    setup = converter.structure(
+        json.loads((SETUP_FIXTURES / fixture_name).read_text(encoding="utf-8")),
+        Setup,
+    )
+    index = SetupIndex(setup)
+
+    for device in setup.devices:
+        assert index.by_ui_class(device.ui_class) == [
+            d for d in setup.devices if d.ui_class == device.ui_class
+        ]
+        assert index.by_gateway(device.identifier.gateway_id) == [
+            d
+            for d in setup.devices
+            if d.identifier.gateway_id == device.identifier.gateway_id
+        ]
+
+
+@pytest.mark.asyncio
+async def test_client_index_follows_device_refresh():
+    """The client rebuilds its index when the device list is replaced."""
+    client = OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("username", "password"),
+    )
+    client.devices = [_device("io://1111-1111-1111/1")]
+    index = client.get_setup_index()
+    assert len(index) == 1
+    assert client.get_setup_index() is index
+
+    client.devices = [_device("io://1111-1111-1111/1"), _device("io://1/2")]
+    assert len(client.get_setup_index()) == 2
+
+    client._event_listener_id = "listener"
+    with patch.object(
+        client,
+        "_post",
+        new=AsyncMock(
+            return_value=[
+                {"name": "DeviceRemovedEvent", "deviceURL": "io://1/2"},
+            ]
+        ),
+    ):
+        await client.fetch_events()
+    assert "io://1/2" not in client.get_setup_index()
+    client._event_listener_id = None
+    await client.close()
+
+
+def _place(oid: str, *sub_places: Place) -> Place:
+    return Place(
+        creation_time=0, label=oid, type=0, oid=oid, sub_places=list(sub_places)
+    )
+
+
+def _house() -> Place:
+    return _place(
+        "house",
+        _place("floor-1", _place("living"), _place("kitchen")),
+        _place("floor-2", _place("bedroom")),
+    )
+
+
+def test_place_tree_navigation():
+    """The flattened tree answers parent, path, depth and subtree queries."""
+    tree = PlaceTree(_house())
+
+    assert len(tree) == 6
+    assert tree.root is not None
+    assert tree.root.oid == "house"
+    assert [place.oid for place in tree] == [
+        "house",
+        "floor-1",
+        "living",
+        "kitchen",
+        "floor-2",
+        "bedroom",
+    ]
+    assert tree.parent("kitchen").oid == "floor-1"
+    assert tree.parent("house") is None
+    assert tree.depth("bedroom") == 2
+    assert [place.oid for place in tree.path("kitchen")] == [
+        "house",
+        "floor-1",
+        "kitchen",
+    ]
+    assert tree.subtree_oids("floor-1") == ["floor-1", "living", "kitchen"]
+    assert tree.subtree_oids("bedroom") == ["bedroom"]
+    assert tree.is_ancestor("floor-1", "kitchen")
+    assert tree.is_ancestor("house", "house")
+    assert not tree.is_ancestor("floor-2", "kitchen")
+    assert tree.get("missing") is None
+    assert tree.path("missing") == []
+    assert tree.subtree("missing") == []
+    assert len(PlaceTree()) == 0
+
+
+def test_devices_in_place_subtree():
+    """Devices of a place and every place below it are found in one query."""
+    setup = Setup(
+        devices=[
+            _device("io://1/1", place_oid="living"),
+            _device(
+                "io://1/2", place_oid="kitchen", ui_class="Light", widget="DimmerLight"
+            ),
+            _device("io://1/3", place_oid="bedroom"),
+            _device("io://1/4", place_oid="floor-1"),
+        ],
+        root_place=_house(),
+    )
+    index = SetupIndex(setup)
+
+    assert _urls(index.by_place("floor-1")) == ["io://1/4"]
+    assert _urls(index.by_place("floor-1", recursive=True)) == [
+        "io://1/1",
+        "io://1/2",
+        "io://1/4",
+    ]
+    assert _urls(index.query(within_place="floor-1", ui_class="Light")) == ["io://1/2"]
+    assert len(index.by_place("house", recursive=True)) == 4
+    assert index.by_place("missing", recursive=True) == []
+
+
+@pytest.mark.asyncio
+async def test_place_events_mark_tree_stale():
+    """Place events flag the tree until get_places() reloads it."""
+    client = OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("username", "password"),
+    )
+    index = client.get_setup_index()
+    client._event_listener_id = "listener"
+    with patch.object(
+        client,
+        "_post",
+        new=AsyncMock(return_value=[{"name": "PlaceCreatedEvent", "placeOID": "room"}]),
+    ):
+        await client.fetch_events()
+    assert index.places_stale
+
+    with patch.object(
+        client,
+        "_get",
+        new=AsyncMock(
+            return_value={
+                "creationTime": 0,
+                "label": "House",
+                "type": 0,
+                "oid": "house",
+                "subPlaces": [
+                    {"creationTime": 0, "label": "Room", "type": 1, "oid": "room"}
+                ],
+            }
+        ),
+    ):
+        await client.get_places()
+    assert not index.places_stale
+    assert index.places.subtree_oids("house") == ["house", "room"]
+    client._event_listener_id = None
+    await client.close()
+
+
+def test_gateway_moves_apply_to_the_index():
+    """A gateway move re-places the gateway and the modules that followed it."""
+    setup = _setup()
+    setup.gateways = [
+        Gateway(
+            gateway_id="1111-1111-1111",
+            connectivity=Connectivity(status="OK", protocol_version="2024.1"),
+            place_oid="living",
+        )
+    ]
+    setup.devices += [
+        _device("internal://1111-1111-1111/pod/0"),
+        _device("internal://1111-1111-1111/alarm/0", place_oid="bedroom"),
+    ]
+    index = SetupIndex(setup)
+
+    index.observe_events(
+        [
+            GatewayPlaceUpdatedEvent(
+                name=EventName.GATEWAY_PLACE_UPDATED,
+                gateway_id="1111-1111-1111",
+                place_oid="bedroom",
+            )
+        ]
+    )
+
+    assert index.gateways["1111-1111-1111"].place_oid == "bedroom"
+    assert setup.gateways[0].place_oid == "living"
+    assert _urls(index.by_place("bedroom")) == [
+        "io://1111-1111-1111/2",
+        "internal://1111-1111-1111/pod/0",
+        "internal://1111-1111-1111/alarm/0",
+    ]
+    # Other devices of the gateway keep their place.
+    assert index.get("io://1111-1111-1111/1").place_oid == "living"
+    assert not index.places_stale
+    assert not index.stale
+
+    index.observe_events(
+        [
+            GatewayPlaceUpdatedEvent(
+                name=EventName.GATEWAY_PLACE_UPDATED,
+                gateway_id="1111-1111-1111",
+                place_oid="garage",
+            )
+        ]
+    )
+    assert index.places_stale
+
+
+def _capable_device(
+    device_url: str,
+    commands: list[str],
+    states: list[str],
+    *,
+    place_oid: str = "living",
+) -> Device:
+    return Device(
+        available=True,
+        enabled=True,
+        label=device_url,
+        device_url=device_url,
+        controllable_name="io:Generic",
+        definition=Definition(
+            commands=CommandDefinitions(
+                [CommandDefinition(command_name=name, nparams=0) for name in commands]
+            ),
+            states=StateDefinitions(
+                [StateDefinition(qualified_name=name) for name in states]
+            ),
+            widget_name="PositionableRollerShutter",
+            ui_class="RollerShutter",
+            ui_profiles=[UIProfile.STATEFUL_CLOSEABLE_SHUTTER]
+            if "setClosure" in commands
+            else [],
+            ui_classifiers=[UIClassifier.GENERATOR],
+        ),
+        type=ProductType.ACTUATOR,
+        place_oid=place_oid,
+    )
+
+
+def test_capability_index():
+    """Commands, states, UI profiles and classifiers map to device URLs."""
+    index = SetupIndex(
+        Setup(
+            devices=[
+                _capable_device(
+                    "io://1/1", ["close", "setClosure"], ["core:ClosureState"]
+                ),
+                _capable_device(
+                    "io://1/2",
+                    ["close", "setClosure"],
+                    ["core:ClosureState", "core:TemperatureState"],
+                    place_oid="bedroom",
+                ),
+                _capable_device("io://1/3", ["on"], ["core:TemperatureState"]),
+            ]
+        )
+    )
+
+    assert _urls(index.by_command("setClosure")) == ["io://1/1", "io://1/2"]
+    assert _urls(index.by_state("core:TemperatureState")) == ["io://1/2", "io://1/3"]
+    assert _urls(index.by_ui_profile(UIProfile.STATEFUL_CLOSEABLE_SHUTTER)) == [
+        "io://1/1",
+        "io://1/2",
+    ]
+    assert len(index.by_ui_classifier(UIClassifier.GENERATOR)) == 3
+    assert _urls(
+        index.query(
+            command="setClosure", state="core:TemperatureState", place_oid="bedroom"
+        )
+    ) == ["io://1/2"]
+    assert _urls(index.query(command=["setClosure", "on"], place_oid="living")) == [
+        "io://1/1",
+        "io://1/3",
+    ]
+    assert set(index.keys("command")) == {"close", "setClosure", "on"}
+
+    index.remove_device("io://1/2")
+    assert index.by_state("core:TemperatureState") == index.query(command="on")
+    with pytest.raises(TypeError):
+        index.keys("colour")
+
+
+def _subsystem(device_url: str, commands: list[str], **states: float) -> Device:
+    device = _capable_device(device_url, commands, [])
+    device.states = States(
+        [
+            State(name=f"core:{name}", type=DataType.FLOAT, value=value)
+            for name, value in states.items()
+        ]
+    )
+    return device
+
+
+def test_physical_device_groups_subsystems():
+    """Subsystems of one product are grouped, ordered and aggregated."""
+    index = SetupIndex(
+        Setup(
+            devices=[
+                _subsystem(
+                    "io://1/5#2", ["setTargetTemperature"], TemperatureState=19.5
+                ),
+                _subsystem("io://1/5#1", ["on", "off"]),
+                _subsystem("io://1/6", ["close"]),
+                _subsystem("io://1/5#3", ["on"], TemperatureState=21.0),
+            ]
+        )
+    )
+
+    group = index.physical_device("io://1/5#3")
+    assert group is not None
+    assert group.base_device_url == "io://1/5"
+    assert _urls(group.devices) == ["io://1/5#1", "io://1/5#2", "io://1/5#3"]
+    assert group.main.device_url == "io://1/5#1"
+    assert _urls(group.sub_devices) == ["io://1/5#2", "io://1/5#3"]
+    assert index.physical_device("io://1/5") is not None
+    assert index.physical_device("io://1/9") is None
+
+    assert group.get_state_value("core:TemperatureState") == 19.5
+    assert group.get_state_values("core:TemperatureState") == {
+        "io://1/5#2": 19.5,
+        "io://1/5#3": 21.0,
+    }
+    assert [action.device_url for action in group.actions(Command(name="on"))] == [
+        "io://1/5#1",
+        "io://1/5#3",
+    ]
+
+    assert group.available
+    index.observe_events(
+        [
+            DeviceUnavailableEvent(
+                name=EventName.DEVICE_UNAVAILABLE, device_url="io://1/5#2"
+            )
+        ]
+    )
+    # Groups are snapshots of the indexed devices; take a new one after events.
+    assert group.available
+    group = index.physical_device("io://1/5")
+    assert group is not None
+    assert not group.available
+    assert group.any_available
+
+    assert [g.base_device_url for g in index.physical_devices()] == [
+        "io://1/5",
+        "io://1/6",
+    ]
+    assert [g.base_device_url for g in index.physical_devices(grouped_only=True)] == [
+        "io://1/5"
+    ]
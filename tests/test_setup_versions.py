@@ -0,0 +1,177 @@
+"""Tests for copy-on-write setup versions."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from pyoverkiz.auth.credentials import UsernamePasswordCredentials
+from pyoverkiz.client import OverkizClient, OverkizClientSettings
+from pyoverkiz.converter import converter
+from pyoverkiz.enums import DataType, EventName, Server
+from pyoverkiz.models import (
+    DeviceCreatedEvent,
+    DeviceRemovedEvent,
+    DeviceStateChangedEvent,
+    DeviceUnavailableEvent,
+    EventState,
+    ExecutionRegisteredEvent,
+    Setup,
+)
+from pyoverkiz.setup_versions import SetupVersions
+
+SETUP_FIXTURES = Path(__file__).parent / "fixtures" / "setup"
+
+
+def _setup() -> Setup:
+    return converter.structure(
+        json.loads(
+            (SETUP_FIXTURES / "setup_tahoma_pro.json").read_text(encoding="utf-8")
+        ),
+        Setup,
+    )
+
+
+def _state_changed(device_url: str, name: str, value: str) -> DeviceStateChangedEvent:
+    return DeviceStateChangedEvent(
+        name=EventName.DEVICE_STATE_CHANGED,
+        device_url=device_url,
+        device_states=[EventState(name=name, type=DataType.STRING, value=value)],
+    )
+
+
+def test_load_copies_the_devices():
+    """Loaded devices are copied, so changes to the originals do not leak."""
+    setup = _setup()
+    versions = SetupVersions()
+
+    view = versions.load(setup)
+    device = setup.devices[0]
+
+    assert view.version == versions.version == 1
+    assert list(view) == [device.device_url for device in setup.devices]
+    assert view[device.device_url] == device
+    assert view[device.device_url] is not device
+    assert view.states(device.device_url) is not device.states
+    assert view.setup is not None
+    assert view.setup.devices == list(view.values())
+    assert view.setup.gateways is setup.gateways
+
+
+def test_events_publish_a_new_version():
+    """A batch is applied as one version; earlier views are left untouched."""
+    setup = _setup()
+    first, second, third = (device.device_url for device in setup.devices[:3])
+    versions = SetupVersions()
+    before = versions.load(setup)
+
+    after = versions.observe_events(
+        [
+            _state_changed(first, "core:NameState", "one"),
+            _state_changed(first, "core:StatusState", "two"),
+            DeviceUnavailableEvent(
+                name=EventName.DEVICE_UNAVAILABLE, device_url=second
+            ),
+            DeviceRemovedEvent(name=EventName.DEVICE_REMOVED, device_url=third),
+            _state_changed(third, "core:NameState", "ignored"),
+        ]
+    )
+
+    assert after.version == before.version + 1
+    assert versions.view() is after
+    assert after.states(first).get_value("core:NameState") == "one"
+    assert after.states(first).get_value("core:StatusState") == "two"
+    assert not after[second].available
+    assert third not in after
+    assert before.states(first).get_value("core:NameState") != "one"
+    assert before[second].available
+    assert third in before
+    # Untouched devices are shared between versions.
+    untouched = setup.devices[3].device_url
+    assert after[untouched] is before[untouched]
+    assert after.states(untouched) is before.states(untouched)
+
+
+def test_unrelated_events_keep_the_version():
+    """Events that touch no known device do not publish a version."""
+    versions = SetupVersions()
+    view = versions.load(_setup())
+
+    assert (
+        versions.observe_events(
+            [
+                _state_changed("io://0000-0000-0000/1", "core:NameState", "x"),
+                ExecutionRegisteredEvent(
+                    name=EventName.EXECUTION_REGISTERED, exec_id="exec"
+                ),
+            ]
+        )
+        is view
+    )
+
+
+def test_created_devices_mark_the_versions_stale():
+    """A created device cannot be added from its event, so it flags a reload."""
+    versions = SetupVersions()
+    setup = _setup()
+    view = versions.load(setup)
+    known = setup.devices[0].device_url
+
+    versions.observe_events(
+        [DeviceCreatedEvent(name=EventName.DEVICE_CREATED, device_url=known)]
+    )
+    assert not versions.stale
+
+    created = DeviceCreatedEvent(
+        name=EventName.DEVICE_CREATED, device_url="io://0000-0000-0000/1"
+    )
+    assert versions.observe_events([created]) is view
+    assert versions.stale
+
+    versions.load(setup)
+    assert not versions.stale
+
+
+@pytest.mark.asyncio
+async def test_client_feeds_versions():
+    """The client loads its setup into the versions and applies fetched events."""
+    client = OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("username", "password"),
+        settings=OverkizClientSettings(setup_versions=True),
+    )
+    client._event_listener_id = "listener"
+    setup = _setup()
+    device_url = setup.devices[0].device_url
+    assert client.setup_versions is not None
+
+    client.restore_setup(setup)
+    view = client.setup_versions.view()
+
+    with patch.object(
+        client,
+        "_post",
+        new=AsyncMock(
+            return_value=[
+                {
+                    "name": "DeviceStateChangedEvent",
+                    "deviceURL": device_url,
+                    "deviceStates": [
+                        {"name": "core:NameState", "type": 3, "value": "renamed"}
+                    ],
+                }
+            ]
+        ),
+    ):
+        await client.fetch_events()
+
+    latest = client.setup_versions.view()
+    assert latest.version == view.version + 1
+    assert latest.states(device_url).get_value("core:NameState") == "renamed"
+    assert setup.devices[0].states.get_value("core:NameState") != "renamed"
+
+    client._event_listener_id = None
+    await client.close()
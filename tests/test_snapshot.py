@@ -0,0 +1,107 @@
+"""Tests for binary setup snapshots."""
+
+from __future__ import annotations
+
+import json
+import pickle
+import struct
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from pyoverkiz.auth.credentials import UsernamePasswordCredentials
+from pyoverkiz.client import OverkizClient
+from pyoverkiz.converter import converter
+from pyoverkiz.enums import Server
+from pyoverkiz.exceptions import InvalidSnapshotError
+from pyoverkiz.models import Device, Setup
+from pyoverkiz.snapshot import SNAPSHOT_VERSION, dump_setup, load_setup
+
+SETUP_FIXTURES = Path(__file__).parent / "fixtures" / "setup"
+
+
+def _setup(fixture_name: str = "setup_tahoma_pro.json") -> Setup:
+    return converter.structure(
+        json.loads((SETUP_FIXTURES / fixture_name).read_text(encoding="utf-8")),
+        Setup,
+    )
+
+
+@pytest.mark.parametrize(
+    "fixture_name",
+    sorted(path.name for path in SETUP_FIXTURES.glob("*.json")),
+)
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip(fixture_name: str, compress: bool):
+    """A restored setup equals the original, including computed fields."""
+    setup = _setup(fixture_name)
+
+    restored = load_setup(dump_setup(setup, compress=compress))
+
+    assert restored == setup
+    for device, original in zip(restored.devices, setup.devices, strict=True):
+        assert device.identifier == original.identifier
+        assert list(device.states) == list(original.states)
+        assert list(device.definition.commands) == list(original.definition.commands)
+
+
+def test_restore_does_not_run_validation():
+    """Models are rebuilt from their fields without running __init__."""
+    setup = _setup()
+    data = dump_setup(setup)
+
+    with patch.object(Device, "__attrs_post_init__", side_effect=AssertionError):
+        restored = load_setup(data)
+
+    assert restored.devices[0].ui_class is setup.devices[0].ui_class
+
+
+def test_compression_shrinks_snapshot():
+    """Compressed snapshots are smaller than the raw payload."""
+    setup = _setup()
+    assert len(dump_setup(setup)) < len(dump_setup(setup, compress=False))
+
+
+def test_rejects_invalid_snapshots():
+    """Truncated, foreign, outdated and corrupt data is rejected."""
+    data = dump_setup(_setup())
+
+    with pytest.raises(InvalidSnapshotError, match="truncated"):
+        load_setup(data[:4])
+    with pytest.raises(InvalidSnapshotError, match="not a setup snapshot"):
+        load_setup(b"X" * len(data))
+    with pytest.raises(InvalidSnapshotError, match="version"):
+        load_setup(data[:8] + struct.pack(">H", SNAPSHOT_VERSION + 1) + data[10:])
+    with pytest.raises(InvalidSnapshotError, match="different models"):
+        load_setup(data[:10] + b"\x00\x00\x00\x00" + data[14:])
+    with pytest.raises(InvalidSnapshotError, match="Corrupt"):
+        load_setup(data[:-10])
+
+
+def test_rejects_foreign_classes():
+    """Only pyoverkiz models and enums can be loaded from a snapshot."""
+    data = dump_setup(_setup(), compress=False)
+    header = data[:15]
+    payload = pickle.dumps(Path("/"), protocol=pickle.HIGHEST_PROTOCOL)
+
+    with pytest.raises(InvalidSnapshotError, match="not allowed"):
+        load_setup(header + payload)
+
+
+@pytest.mark.asyncio
+async def test_client_restore_setup_skips_bulk_load():
+    """A restored setup is served from the cache without an API call."""
+    client = OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("username", "password"),
+    )
+    setup = load_setup(dump_setup(_setup()))
+
+    client.restore_setup(setup)
+
+    with patch.object(client, "_get", side_effect=AssertionError):
+        assert await client.get_setup() is setup
+        assert await client.get_devices() is setup.devices
+        assert await client.get_gateways() is setup.gateways
+    await client.close()
@@ -0,0 +1,203 @@
+"""Tests for the columnar numeric state store."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from statistics import fmean
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from pyoverkiz.auth.credentials import UsernamePasswordCredentials
+from pyoverkiz.client import OverkizClient
+from pyoverkiz.converter import converter
+from pyoverkiz.enums import DataType, EventName, ProductType, Server
+from pyoverkiz.models import (
+    Definition,
+    Device,
+    DeviceRemovedEvent,
+    DeviceStateChangedEvent,
+    EventState,
+    Setup,
+    State,
+    States,
+)
+from pyoverkiz.state_columns import StateColumns
+
+SETUP_FIXTURES = Path(__file__).parent / "fixtures" / "setup"
+CLOSURE = "core:ClosureState"
+TEMPERATURE = "core:TemperatureState"
+
+
+def _device(device_url: str, *states: State) -> Device:
+    return Device(
+        available=True,
+        enabled=True,
+        label=device_url,
+        device_url=device_url,
+        controllable_name="io:RollerShutterGenericIOComponent",
+        definition=Definition(
+            widget_name="PositionableRollerShutter", ui_class="RollerShutter"
+        ),
+        states=States(list(states)),
+        type=ProductType.ACTUATOR,
+    )
+
+
+def _closure(value: object) -> State:
+    return State(name=CLOSURE, type=DataType.INTEGER, value=value)  # type: ignore[arg-type]
+
+
+def _columns() -> StateColumns:
+    return StateColumns(
+        [
+            _device("io://1/1", _closure(0)),
+            _device("io://1/2", _closure(60)),
+            _device(
+                "io://1/3",
+                _closure(100),
+                State(name=TEMPERATURE, type=DataType.FLOAT, value=21.5),
+                State(name="core:NameState", type=DataType.STRING, value="Shutter"),
+            ),
+            _device("io://1/4", _closure(None)),
+        ]
+    )
+
+
+def test_numeric_states_are_stored_by_column():
+    """Each numeric state gets a column; other types are ignored."""
+    columns = _columns()
+
+    assert columns.names == [CLOSURE, TEMPERATURE]
+    assert columns.device_urls == ["io://1/1", "io://1/2", "io://1/3", "io://1/4"]
+    assert columns.column(CLOSURE).typecode == "d"
+    assert list(columns.mask(CLOSURE)) == [1, 1, 1, 0]
+    assert list(columns.mask(TEMPERATURE)) == [0, 0, 1, 0]
+    assert columns.get("io://1/2", CLOSURE) == 60
+    assert columns.get("io://1/4", CLOSURE) is None
+    assert columns.get("io://1/1", TEMPERATURE) is None
+
+
+def test_filter():
+    """Filters compare one column against a value."""
+    columns = _columns()
+
+    assert columns.filter(CLOSURE, ">", 50) == ["io://1/2", "io://1/3"]
+    assert columns.filter(CLOSURE, "==", 0) == ["io://1/1"]
+    assert columns.filter(CLOSURE, "<", 100, devices=["io://1/2", "io://1/4"]) == [
+        "io://1/2"
+    ]
+    assert columns.filter("core:Missing", ">", 0) == []
+    with pytest.raises(ValueError, match="comparison"):
+        columns.filter(CLOSURE, "~", 0)  # type: ignore[arg-type]
+
+
+def test_aggregates():
+    """Aggregates skip rows without a value."""
+    columns = _columns()
+
+    assert columns.aggregate(CLOSURE, "count") == 3
+    assert columns.aggregate(CLOSURE, "sum") == 160
+    assert columns.aggregate(CLOSURE, "mean") == pytest.approx(160 / 3)
+    assert columns.aggregate(CLOSURE, "min") == 0
+    assert columns.aggregate(CLOSURE, "max", devices=["io://1/1", "io://1/2"]) == 60
+    assert columns.aggregate("core:Missing", "mean") is None
+    assert columns.aggregate("core:Missing", "count") == 0
+    assert columns.aggregate_by(
+        CLOSURE, "mean", {"living": ["io://1/1", "io://1/2"], "empty": []}
+    ) == {"living": 30, "empty": None}
+    with pytest.raises(ValueError, match="aggregate"):
+        columns.aggregate(CLOSURE, "median")  # type: ignore[arg-type]
+
+
+def test_events_update_columns_in_place():
+    """State changes are written into the rows; removed devices free theirs."""
+    columns = _columns()
+    closure = columns.column(CLOSURE)
+
+    columns.observe_events(
+        [
+            DeviceStateChangedEvent(
+                name=EventName.DEVICE_STATE_CHANGED,
+                device_url="io://1/4",
+                device_states=[
+                    EventState(name=CLOSURE, type=DataType.INTEGER, value="30"),
+                    EventState(name=TEMPERATURE, type=DataType.FLOAT, value="19.0"),
+                ],
+            ),
+            DeviceRemovedEvent(name=EventName.DEVICE_REMOVED, device_url="io://1/1"),
+        ]
+    )
+
+    assert columns.column(CLOSURE) is closure
+    assert columns.get("io://1/4", CLOSURE) == 30
+    assert columns.aggregate(TEMPERATURE, "mean") == pytest.approx(20.25)
+    assert "io://1/1" not in columns
+    assert columns.filter(CLOSURE, ">=", 0) == ["io://1/2", "io://1/3", "io://1/4"]
+
+    columns.add_device(_device("io://1/5", _closure(10)))
+    assert columns.row("io://1/5") == 0
+    assert columns.get("io://1/5", CLOSURE) == 10
+
+
+@pytest.mark.parametrize(
+    "fixture_name",
+    ["setup_tahoma_pro.json", "setup_cozytouch.json", "setup_hi_kumo.json"],
+)
+def test_matches_a_scan_of_device_states(fixture_name: str):
+    """Aggregates agree with walking the devices' state mappings."""
+    setup = converter.structure(
+        json.loads((SETUP_FIXTURES / fixture_name).read_text(encoding="utf-8")),
+        Setup,
+    )
+    columns = StateColumns(setup.devices)
+
+    for name in columns.names:
+        expected = [
+            float(device.states[name].value)  # type: ignore[arg-type]
+            for device in setup.devices
+            if name in device.states
+            and isinstance(device.states[name].value, int | float)
+            and device.states[name].type
+            in {DataType.INTEGER, DataType.FLOAT, DataType.DATE, DataType.BOOLEAN}
+        ]
+        assert columns.aggregate(name, "count") == len(expected)
+        assert columns.aggregate(name, "mean") == pytest.approx(fmean(expected))
+
+
+@pytest.mark.asyncio
+async def test_client_columns_follow_the_device_list():
+    """The client builds columns from its devices and feeds them events."""
+    client = OverkizClient(
+        server=Server.SOMFY_EUROPE,
+        credentials=UsernamePasswordCredentials("username", "password"),
+    )
+    client.devices = [_device("io://1/1", _closure(10))]
+    client._event_listener_id = "listener"
+
+    columns = client.get_state_columns()
+    assert client.get_state_columns() is columns
+    assert columns.get("io://1/1", CLOSURE) == 10
+
+    with patch.object(
+        client,
+        "_post",
+        new=AsyncMock(
+            return_value=[
+                {
+                    "name": "DeviceStateChangedEvent",
+                    "deviceURL": "io://1/1",
+                    "deviceStates": [{"name": CLOSURE, "type": 1, "value": "90"}],
+                }
+            ]
+        ),
+    ):
+        await client.fetch_events()
+    assert columns.get("io://1/1", CLOSURE) == 90
+
+    client.devices = [_device("io://1/2", _closure(20))]
+    assert client.get_state_columns().device_urls == ["io://1/2"]
+
+    client._event_listener_id = None
+    await client.close()
@@ -0,0 +1,213 @@
+"""Tests for the ring-buffered state history store."""
+
+from __future__ import annotations
+
+from array import array
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from pyoverkiz.auth.credentials import UsernamePasswordCredentials
+from pyoverkiz.client import OverkizClient, OverkizClientSettings
+from pyoverkiz.enums import DataType, EventName, Server
+from pyoverkiz.models import (
+    DeviceRemovedEvent,
+    DeviceStateChangedEvent,
+    EventState,
+    State,
+)
+from pyoverkiz.state_history import (
+    StateHistory,
+    StateHistorySettings,
+    StateHistoryStore,
+)
+
+DEVICE_URL = "io://1234-5678-1234/1"
+
+
+def _history(data_type: DataType, *values: object, size: int = 4) -> StateHistory:
+    history = StateHistory(size, data_type)
+    for index, value in enumerate(values):
+        history.append(index * 1000, value)  # type: ignore[arg-type]
+    return history
+
+
+def test_settings_validate():
+    """A non-positive size is rejected."""
+    with pytest.raises(ValueError, match="size"):
+        StateHistorySettings(size=0).validate()
+    StateHistorySettings().validate()
+
+
+@pytest.mark.parametrize(
+    ("data_type", "values", "typecode"),
+    [
+        (DataType.INTEGER, [1, 2, 3], "q"),
+        (DataType.DATE, [1700000000, 1700000060], "q"),
+        (DataType.FLOAT, [20.5, 21.0], "d"),
+        (DataType.BOOLEAN, [True, False], "b"),
+    ],
+)
+def test_numeric_states_use_typed_arrays(
+    data_type: DataType, values: list[object], typecode: str
+):
+    """Numeric values are stored unboxed and read back with their type."""
+    history = _history(data_type, *values)
+
+    assert history.typed
+    stored = history.values()
+    assert isinstance(stored, array)
+    assert stored.typecode == typecode
+    assert [value for _, value in history.samples()] == values
+    assert history.latest() == ((len(values) - 1) * 1000, values[-1])
+
+
+def test_other_states_use_a_list():
+    """Strings and JSON values are kept as Python objects."""
+    history = _history(DataType.STRING, "open", "closed")
+    assert not history.typed
+    assert history.values() == ["open", "closed"]
+
+
+def test_ring_buffer_keeps_the_last_samples():
+    """Once full, the oldest samples are overwritten."""
+    history = _history(DataType.INTEGER, 1, 2, 3, 4, 5, 6)
+
+    assert len(history) == 4
+    assert list(history.values()) == [3, 4, 5, 6]
+    assert list(history.timestamps()) == [2000, 3000, 4000, 5000]
+    assert list(history) == [(2000, 3), (3000, 4), (4000, 5), (5000, 6)]
+
+
+def test_windowed_reads():
+    """Windows are half-open and work across the ring's wrap-around."""
+    history = _history(DataType.FLOAT, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+
+    assert list(history.values(since=3000)) == [4.0, 5.0, 6.0]
+    assert list(history.values(until=4000)) == [3.0, 4.0]
+    assert history.samples(since=3500, until=5000) == [(4000, 5.0)]
+    assert list(history.values(since=9000)) == []
+    assert list(history.values(since=4000, until=1000)) == []
+
+
+def test_out_of_order_samples_keep_timestamps_sorted():
+    """A sample older than the latest one is recorded at the latest timestamp."""
+    history = StateHistory(4, DataType.INTEGER)
+    history.append(2000, 1)
+    history.append(1000, 2)
+    assert list(history.timestamps()) == [2000, 2000]
+
+
+def test_unexpected_values_fall_back_to_a_list():
+    """A value the typed array cannot hold converts the history to a list."""
+    history = _history(DataType.BOOLEAN, True, False, True, False, True)
+    history.append(9000, None)
+
+    assert not history.typed
+    assert history.samples() == [
+        (2000, True),
+        (3000, False),
+        (4000, True),
+        (9000, None),
+    ]
+
+
+def test_store_records_events_and_filters_states():
+    """State change events are recorded; removed devices are dropped."""
+    store = StateHistoryStore(StateHistorySettings(states=frozenset({"core:A"})))
+    store.observe_events(
+        [
+            DeviceStateChangedEvent(
+                name=EventName.DEVICE_STATE_CHANGED,
+                timestamp=1000,
+                device_url=DEVICE_URL,
+                device_states=[
+                    EventState(name="core:A", type=DataType.INTEGER, value="5"),
+                    EventState(name="core:B", type=DataType.INTEGER, value="7"),
+                ],
+            )
+        ]
+    )
+
+    history = store.get(DEVICE_URL, "core:A")
+    assert history is not None
+    assert history.samples() == [(1000, 5)]
+    assert store.get(DEVICE_URL, "core:B") is None
+    assert list(store.get_device(DEVICE_URL)) == ["core:A"]
+
+    store.observe_events(
+        [DeviceRemovedEvent(name=EventName.DEVICE_REMOVED, device_url=DEVICE_URL)]
+    )
+    assert len(store) == 0
+
+
+def test_store_timestamps_default_to_now():
+    """Samples recorded without a timestamp use the clock, in milliseconds."""
+    store = StateHistoryStore(clock=lambda: 12.5)
+    store.record(DEVICE_URL, State(name="core:A", type=DataType.FLOAT, value=1.5))
+    assert store.get(DEVICE_URL, "core:A").samples() == [(12500, 1.5)]
+
+
+class TestClientStateHistory:
+    """Tests for the history store wired into the client."""
+
+    @pytest.mark.asyncio
+    async def test_events_and_get_state_are_recorded(self):
+        """Both fetched events and polled states feed the history."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+            settings=OverkizClientSettings(state_history=StateHistorySettings()),
+        )
+        client._event_listener_id = "listener"
+        assert client.state_history is not None
+
+        with patch.object(
+            client,
+            "_post",
+            new=AsyncMock(
+                return_value=[
+                    {
+                        "name": "DeviceStateChangedEvent",
+                        "timestamp": 1000,
+                        "deviceURL": DEVICE_URL,
+                        "deviceStates": [
+                            {
+                                "name": "core:TemperatureState",
+                                "type": 2,
+                                "value": "20.5",
+                            }
+                        ],
+                    }
+                ]
+            ),
+        ):
+            await client.fetch_events()
+
+        with patch.object(
+            client,
+            "_get",
+            new=AsyncMock(
+                return_value=[
+                    {"name": "core:TemperatureState", "type": 2, "value": 21.0}
+                ]
+            ),
+        ):
+            await client.get_state(DEVICE_URL)
+
+        history = client.state_history.get(DEVICE_URL, "core:TemperatureState")
+        assert history is not None
+        assert list(history.values()) == [20.5, 21.0]
+
+        client._event_listener_id = None
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self):
+        """Without settings, the client records no history."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+        )
+        assert client.state_history is None
+        await client.close()
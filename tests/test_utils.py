@@ -2,7 +2,14 @@
 
 import pytest
 
-from pyoverkiz.utils import create_local_server_config, is_overkiz_gateway
+from pyoverkiz.const import SUPPORTED_SERVERS
+from pyoverkiz.enums import Server
+from pyoverkiz.exceptions import OverkizError
+from pyoverkiz.utils import (
+    create_local_server_config,
+    is_overkiz_gateway,
+    normalize_server,
+)
 
 LOCAL_HOST = "gateway-1234-5678-1243.local:8443"
 LOCAL_HOST_BY_IP = "192.168.1.105:8443"
@@ -53,3 +60,14 @@ class TestUtils:
     def test_is_overkiz_gateway(self, gateway_id: str, overkiz_gateway: bool):
         """Detect whether a gateway id follows the Overkiz gateway pattern."""
         assert is_overkiz_gateway(gateway_id) == overkiz_gateway
+
+    def test_normalize_server(self):
+        """Resolve server keys and enums; pass server configs through."""
+        somfy = SUPPORTED_SERVERS[Server.SOMFY_EUROPE]
+        local_server = create_local_server_config(host=LOCAL_HOST)
+
+        assert normalize_server(Server.SOMFY_EUROPE) is somfy
+        assert normalize_server("somfy_europe") is somfy
+        assert normalize_server(local_server) is local_server
+        with pytest.raises(OverkizError, match="Unknown server 'nope'"):
+            normalize_server("nope")
@@ -0,0 +1,267 @@
+"""Tests for client-side command validation."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
+import pytest
+
+from pyoverkiz.action_queue import ActionQueueSettings
+from pyoverkiz.auth.credentials import UsernamePasswordCredentials
+from pyoverkiz.client import OverkizClient, OverkizClientSettings
+from pyoverkiz.enums import ProductType, Server, UIProfile
+from pyoverkiz.exceptions import InvalidCommandError
+from pyoverkiz.models import (
+    Action,
+    Command,
+    CommandDefinition,
+    CommandDefinitions,
+    CommandParameter,
+    CommandPrototype,
+    Definition,
+    Device,
+    States,
+    UIProfileCommand,
+    UIProfileDefinition,
+    ValuePrototype,
+)
+from pyoverkiz.validation import CommandValidator
+from tests.helpers import MockResponse
+
+DEVICE_URL = "io://1234-5678-9012/1"
+
+
+def _device() -> Device:
+    return Device(
+        attributes=States(),
+        available=True,
+        enabled=True,
+        label="Shutter",
+        device_url=DEVICE_URL,
+        controllable_name="io:RollerShutterGenericIOComponent",
+        definition=Definition(
+            commands=CommandDefinitions(
+                [
+                    CommandDefinition(command_name="close", nparams=0),
+                    CommandDefinition(command_name="setClosure", nparams=1),
+                    CommandDefinition(command_name="setMode", nparams=1),
+                ]
+            ),
+            widget_name="PositionableRollerShutter",
+            ui_class="RollerShutter",
+            ui_profiles=[UIProfile.STATEFUL_CLOSEABLE_SHUTTER],
+        ),
+        type=ProductType.ACTUATOR,
+    )
+
+
+def _profile() -> UIProfileDefinition:
+    return UIProfileDefinition(
+        name=str(UIProfile.STATEFUL_CLOSEABLE_SHUTTER),
+        commands=[
+            UIProfileCommand(
+                name="setClosure",
+                prototype=CommandPrototype(
+                    parameters=[
+                        CommandParameter(
+                            optional=False,
+                            sensitive=False,
+                            value_prototypes=[
+                                ValuePrototype(type="INT", min_value=0, max_value=100)
+                            ],
+                        )
+                    ]
+                ),
+            ),
+            UIProfileCommand(
+                name="setMode",
+                prototype=CommandPrototype(
+                    parameters=[
+                        CommandParameter(
+                            optional=False,
+                            sensitive=False,
+                            value_prototypes=[
+                                ValuePrototype(
+                                    type="STRING", enum_values=["auto", "manual"]
+                                )
+                            ],
+                        )
+                    ]
+                ),
+            ),
+        ],
+    )
+
+
+class TestCommandValidator:
+    """Tests for validating commands against device definitions."""
+
+    def test_valid_commands(self) -> None:
+        """Known commands with valid parameters pass."""
+        validator = CommandValidator([_device()], [_profile()])
+        validator.validate(
+            [
+                Action(
+                    device_url=DEVICE_URL,
+                    commands=[
+                        Command(name="close"),
+                        Command(name="setClosure", parameters=[100]),
+                        Command(name="setMode", parameters=["auto"]),
+                    ],
+                )
+            ]
+        )
+
+    def test_unknown_command(self) -> None:
+        """A command missing from the device definition is rejected."""
+        validator = CommandValidator([_device()])
+        with pytest.raises(InvalidCommandError, match="not supported"):
+            validator.validate_command(DEVICE_URL, Command(name="open"))
+
+    def test_too_many_parameters(self) -> None:
+        """More parameters than nparams are rejected."""
+        validator = CommandValidator([_device()])
+        with pytest.raises(InvalidCommandError, match="at most 0"):
+            validator.validate_command(
+                DEVICE_URL, Command(name="close", parameters=[1])
+            )
+
+    @pytest.mark.parametrize(
+        "command",
+        [
+            Command(name="setClosure", parameters=[101]),
+            Command(name="setClosure", parameters=["50"]),
+            Command(name="setClosure"),
+            Command(name="setMode", parameters=["eco"]),
+        ],
+    )
+    def test_prototype_violations(self, command: Command) -> None:
+        """Values outside the UI profile prototype are rejected."""
+        validator = CommandValidator([_device()], [_profile()])
+        with pytest.raises(InvalidCommandError, match="Invalid parameters"):
+            validator.validate_command(DEVICE_URL, command)
+
+    def test_ranges_require_ui_profile(self) -> None:
+        """Without a known UI profile only the parameter count is checked."""
+        validator = CommandValidator([_device()])
+        validator.validate_command(
+            DEVICE_URL, Command(name="setClosure", parameters=[500])
+        )
+
+        validator.add_ui_profile(_profile())
+        with pytest.raises(InvalidCommandError):
+            validator.validate_command(
+                DEVICE_URL, Command(name="setClosure", parameters=[500])
+            )
+
+    def test_unknown_device_is_not_checked(self) -> None:
+        """Devices unknown to the validator are passed through."""
+        CommandValidator([_device()]).validate_command(
+            "io://1234-5678-9012/999", Command(name="anything", parameters=[1, 2])
+        )
+
+
+class TestClientValidation:
+    """Tests for preflight validation in execute_action_group."""
+
+    @pytest.mark.asyncio
+    async def test_invalid_command_is_rejected_without_request(self) -> None:
+        """An invalid command raises before any request is made."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+            settings=OverkizClientSettings(validate_commands=True),
+        )
+        client.devices = [_device()]
+
+        with (
+            patch.object(client, "_post", new_callable=AsyncMock) as mock_post,
+            pytest.raises(InvalidCommandError),
+        ):
+            await client.execute_action_group(
+                actions=[Action(device_url=DEVICE_URL, commands=[Command(name="open")])]
+            )
+
+        mock_post.assert_not_called()
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_invalid_caller_does_not_poison_batch(self) -> None:
+        """With the queue enabled, only the invalid caller fails."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+            settings=OverkizClientSettings(
+                validate_commands=True,
+                action_queue=ActionQueueSettings(delay=0.05),
+            ),
+        )
+        client.devices = [_device()]
+
+        with patch.object(client, "_post", new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = {"execId": "exec-1"}
+            with pytest.raises(InvalidCommandError):
+                await client.execute_action_group(
+                    actions=[
+                        Action(
+                            device_url=DEVICE_URL,
+                            commands=[Command(name="close", parameters=[1])],
+                        )
+                    ]
+                )
+            exec_id = await client.execute_action_group(
+                actions=[
+                    Action(device_url=DEVICE_URL, commands=[Command(name="close")])
+                ]
+            )
+
+        assert exec_id == "exec-1"
+        assert client.get_pending_actions_count() == 0
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_fetched_ui_profile_enables_range_checks(self) -> None:
+        """UI profiles fetched from the reference API are used for validation."""
+        client = OverkizClient(
+            server=Server.SOMFY_EUROPE,
+            credentials=UsernamePasswordCredentials("username", "password"),
+            settings=OverkizClientSettings(validate_commands=True),
+        )
+        client.devices = [_device()]
+        profile = {
+            "name": "StatefulCloseableShutter",
+            "commands": [
+                {
+                    "name": "setClosure",
+                    "prototype": {
+                        "parameters": [
+                            {
+                                "optional": False,
+                                "sensitive": False,
+                                "valuePrototypes": [
+                                    {"type": "INT", "minValue": 0, "maxValue": 100}
+                                ],
+                            }
+                        ]
+                    },
+                }
+            ],
+        }
+
+        with patch.object(
+            aiohttp.ClientSession, "get", return_value=MockResponse(json.dumps(profile))
+        ):
+            await client.get_reference_ui_profile("StatefulCloseableShutter")
+
+        with pytest.raises(InvalidCommandError):
+            await client.execute_action_group(
+                actions=[
+                    Action(
+                        device_url=DEVICE_URL,
+                        commands=[Command(name="setClosure", parameters=[150])],
+                    )
+                ]
+            )
+        await client.close()